@@ -1,3 +1,8 @@
+import os, time
+
+# Measured before anything else is imported, for the startup timing report
+import_start = time.perf_counter()
+
 import bpy
 from bpy.utils import register_class, unregister_class
 from bpy.path import abspath
@@ -49,6 +54,8 @@ from .fast64_internal.render_settings import (
     on_update_render_settings,
 )
 
+import_time = time.perf_counter() - import_start
+
 # info about add on
 bl_info = {
     "name": "Fast64",
@@ -92,6 +99,7 @@ class F3D_GlobalSettingsPanel(bpy.types.Panel):
                 "While inlining, all meshes will be restored to world default values.\n         You can configure these values in the world properties tab.",
                 icon="INFO",
             )
+            col.prop(context.scene, "optimizeF3DDrawOrder")
         col.prop(context.scene, "ignoreTextureRestrictions")
         if context.scene.ignoreTextureRestrictions:
             col.box().label(text="Width/height must be < 1024. Must be png format.")
@@ -292,6 +300,26 @@ class UpgradeF3DMaterialsDialog(bpy.types.Operator):
 # 	scene.currentGameEditorMode = scene.gameEditorMode
 
 
+# (step name, seconds) for the startup timing report
+startup_timings: list[tuple[str, float]] = []
+
+
+def timed_register(name: str, func, *args):
+    start = time.perf_counter()
+    func(*args)
+    startup_timings.append((name, time.perf_counter() - start))
+
+
+def print_startup_report():
+    """Printed when the FAST64_STARTUP_TIMING environment variable is set"""
+    if not os.environ.get("FAST64_STARTUP_TIMING"):
+        return
+    total = import_time + sum(seconds for _, seconds in startup_timings)
+    print(f"Fast64 startup: {total * 1000:.1f} ms")
+    for name, seconds in [("imports", import_time)] + startup_timings:
+        print(f"    {name}: {seconds * 1000:.1f} ms")
+
+
 class ExampleAddonPreferences(bpy.types.AddonPreferences, addon_updater_ops.AddonUpdaterPreferences):
     bl_idname = __package__
 
@@ -375,23 +403,23 @@ def register():
     register_class(ExampleAddonPreferences)
     addon_updater_ops.register(bl_info)
 
-    utility_anim_register()
-    mat_register()
-    render_engine_register()
-    bsdf_conv_register()
-    sm64_register(True)
-    oot_register(True)
+    timed_register("utility_anim", utility_anim_register)
+    timed_register("f3d_material", mat_register)
+    timed_register("render_engine", render_engine_register)
+    timed_register("bsdf_conv", bsdf_conv_register)
+    timed_register("sm64", sm64_register, True)
+    timed_register("oot", oot_register, True)
 
-    repo_settings_operators_register()
+    timed_register("repo_settings", repo_settings_operators_register)
 
     for cls in classes:
         register_class(cls)
 
-    bsdf_conv_panel_regsiter()
-    f3d_writer_register()
-    flipbook_register()
-    f3d_parser_register()
-    op_largetexture_register()
+    timed_register("bsdf_conv_panel", bsdf_conv_panel_regsiter)
+    timed_register("f3d_writer", f3d_writer_register)
+    timed_register("flipbook", flipbook_register)
+    timed_register("f3d_parser", f3d_parser_register)
+    timed_register("op_largetexture", op_largetexture_register)
 
     # ROM
 
@@ -407,6 +435,12 @@ def register():
         description="Inlines and bleeds materials in a single mesh. GeoLayout + Armature exports bleed over entire model",
         default=False,
     )
+    bpy.types.Scene.optimizeF3DDrawOrder = bpy.props.BoolProperty(
+        name="Optimize Material Draw Order",
+        description="Reorders materials within a mesh's draw layer so that bleeding removes as many commands as possible. "
+        "Only opaque and alpha tested meshes are reordered",
+        default=False,
+    )
     bpy.types.Scene.blenderF3DScale = bpy.props.FloatProperty(
         name="F3D Blender Scale", default=100, update=on_update_render_settings
     )
@@ -417,6 +451,8 @@ def register():
 
     bpy.app.handlers.load_post.append(after_load)
 
+    print_startup_report()
+
 
 # called on add-on disabling
 def unregister():
@@ -437,6 +473,7 @@ def unregister():
     del bpy.types.Scene.saveTextures
     del bpy.types.Scene.gameEditorMode
     del bpy.types.Scene.exportHiddenGeometry
+    del bpy.types.Scene.optimizeF3DDrawOrder
     del bpy.types.Scene.blenderF3DScale
 
     del bpy.types.Scene.fast64
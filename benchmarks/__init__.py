@@ -0,0 +1,4 @@
+"""
+Timings for fast64's pure-Python export and import kernels, runnable with a regular Python interpreter.
+See __main__.py for usage.
+"""
@@ -0,0 +1,86 @@
+"""
+Runs the benchmarks and writes the results as JSON. From the repository root:
+
+    python -m benchmarks --output baseline.json
+    python -m benchmarks --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from .shims import install_blender_shims
+from .runner import compare_reports, get_git_revision, make_report, registeredBenchmarks, run_benchmarks, write_report
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n")[1])
+    parser.add_argument("-k", "--filter", action="append", default=[], help="only run benchmarks containing this")
+    parser.add_argument("--quick", action="store_true", help="use small fixtures, for checking the suite runs")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per benchmark (default 5)")
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="minimum seconds per repeat, sets the loop count (default 0.05)"
+    )
+    parser.add_argument("-o", "--output", help="write results to this file instead of stdout")
+    parser.add_argument("--compare", help="results file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=1.1, help="best time ratio counted as a regression (default 1.1)"
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+
+    shimmed = install_blender_shims()
+    importStart = time.perf_counter()
+    from . import cases
+
+    importTime = time.perf_counter() - importStart
+
+    benchmarks = [
+        bench
+        for bench in registeredBenchmarks
+        if not args.filter or any(text in bench.key(bench.params) for text in args.filter)
+    ]
+    if args.list:
+        for bench in benchmarks:
+            print(bench.key(bench.params))
+        return 0
+    if not benchmarks:
+        sys.stderr.write("No benchmarks match the filter.\n")
+        return 1
+
+    results = run_benchmarks(benchmarks, args.quick, args.repeat, args.min_time)
+    metadata = {
+        "revision": get_git_revision(REPO_DIR),
+        "blender_shims": shimmed,
+        "quick": args.quick,
+        "seed": cases.FIXTURE_SEED,
+        "f3d_type": cases.F3D_TYPE,
+        "import_time": importTime,
+    }
+    report = make_report(results, metadata)
+    write_report(report, args.output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("quick") != args.quick:
+            sys.stderr.write("Warning: comparing quick and full results, fixture sizes differ.\n")
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions:
+            sys.stderr.write(f"{len(regressions)} benchmark(s) slower than {args.threshold}x the baseline.\n")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+The benchmarked kernels. Each setup builds its fixture and returns the call that is timed.
+Importing this module imports fast64_internal, so shims.install_blender_shims must be called first outside Blender.
+"""
+
+import random
+import re
+from types import SimpleNamespace
+
+from fast64_internal.f3d.f3d_gbi import (
+    DLFormat,
+    DPLoadBlock,
+    DPLoadSync,
+    DPPipeSync,
+    DPSetCombineMode,
+    DPSetTextureImage,
+    DPSetTile,
+    DPSetTileSize,
+    FImage,
+    GfxList,
+    GfxListTag,
+    SP1Triangle,
+    SP2Triangles,
+    SPEndDisplayList,
+    SPTexture,
+    SPVertex,
+    Vtx,
+    VtxList,
+    get_cached_F3D_GBI,
+)
+from fast64_internal.f3d.f3d_parser import parseDLData, parseMacroList, weldVertexPositions
+from fast64_internal.f3d.f3d_texture_writer import (
+    encodeCITextureData,
+    encodeNonCITextureData,
+    getColorsUsedInImage,
+    getImagePixelsRGBA,
+    mergePalettes,
+)
+from fast64_internal.f3d.f3d_writer import BufferVertex, F3DVert, TriangleConverter
+from fast64_internal.sm64.sm64_collision import buildCollision
+from fast64_internal.sm64.sm64_compression import compressData, decompressData
+
+from .fixtures import (
+    SyntheticMesh,
+    collision_faces,
+    gradient_image,
+    image_rgba,
+    palette_image,
+    random_mesh,
+    vanilla_c_asset,
+    vertex_batches,
+)
+from .runner import benchmark
+
+FIXTURE_SEED = 64
+F3D_TYPE = "F3DEX2/LX2"
+# Only used to resolve segmented addresses in to_binary
+BENCH_SEGMENTS = {0x07: (0, 0x1000000)}
+
+
+def make_rng() -> random.Random:
+    return random.Random(FIXTURE_SEED)
+
+
+def converted_fimage(name: str, fmt: str, bitSize: str, width: int, height: int, data: bytearray) -> FImage:
+    fImage = FImage(name, fmt, bitSize, width, height, name + ".png")
+    fImage.setDataSource(lambda: data)
+    return fImage
+
+
+def build_display_list(mesh: SyntheticMesh, textureSize: int = 32) -> tuple[GfxList, VtxList, FImage]:
+    """Builds the commands the SM64 exporter would write for the mesh with one RGBA16 textured material."""
+    fImage = converted_fimage(
+        "bench_texture", "G_IM_FMT_RGBA", "G_IM_SIZ_16b", textureSize, textureSize, bytearray(textureSize**2 * 2)
+    )
+    vtxList = VtxList("bench_vtx")
+    gfxList = GfxList("bench_dl", GfxListTag.Geometry, DLFormat.Static)
+    wrap = ["G_TX_WRAP", "G_TX_NOMIRROR"]
+    gfxList.commands.extend(
+        [
+            DPPipeSync(),
+            DPSetCombineMode(*(["TEXEL0", "0", "SHADE", "0"] * 4)),
+            SPTexture(0xFFFF, 0xFFFF, 0, 0, 1),
+            DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 1, fImage),
+            DPSetTile("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 0, 0, 7, 0, wrap, 0, 0, wrap, 0, 0),
+            DPLoadSync(),
+            DPLoadBlock(7, 0, 0, textureSize**2 - 1, 256),
+            DPSetTile("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 8, 0, 0, 0, wrap, 5, 0, wrap, 5, 0),
+            DPSetTileSize(0, 0, 0, (textureSize - 1) << 2, (textureSize - 1) << 2),
+        ]
+    )
+    for vertIndices, triangles in vertex_batches(mesh):
+        gfxList.commands.append(SPVertex(vtxList, len(vtxList.vertices), len(vertIndices), 0))
+        for v in vertIndices:
+            position = [int(round(value)) for value in mesh.positions[v]]
+            uv = [int(round(value * textureSize * 32)) for value in mesh.uvs[v]]
+            normal = [int(round(value * 127)) & 0xFF for value in mesh.normals[v]]
+            vtxList.vertices.append(Vtx(position, uv, normal + [0xFF]))
+        for i in range(0, len(triangles) - 1, 2):
+            gfxList.commands.append(SP2Triangles(*triangles[i], 0, *triangles[i + 1], 0))
+        if len(triangles) % 2 == 1:
+            gfxList.commands.append(SP1Triangle(*triangles[-1], 0))
+    gfxList.commands.extend([SPTexture(0xFFFF, 0xFFFF, 0, 0, 0), DPPipeSync(), SPEndDisplayList()])
+    return gfxList, vtxList, fImage
+
+
+def vanilla_segment(meshGrid: int, textureCount: int) -> bytes:
+    """
+    A level segment laid out like a vanilla one: vertices, display lists, textures and collision back to back,
+    8 byte aligned, followed by the unused zero space an extended bank usually ends with.
+    """
+    rng = make_rng()
+    mesh = random_mesh(rng, meshGrid)
+    gfxList, vtxList, _ = build_display_list(mesh)
+    f3d = get_cached_F3D_GBI(F3D_TYPE)
+    parts = [vtxList.to_binary(), gfxList.to_binary(f3d, BENCH_SEGMENTS)]
+    for i in range(textureCount):
+        image = gradient_image(rng, 32, 32) if i % 2 == 0 else palette_image(rng, 32, 32, 16)
+        parts.append(encodeNonCITextureData(image_rgba(image), "RGBA16"))
+    parts.append(buildCollision("bench_collision", collision_faces(rng, mesh)).to_binary())
+
+    data = bytearray()
+    for part in parts:
+        data += part
+        data += bytes(-len(data) % 8)
+    return bytes(data + bytes(len(data) // 4))
+
+
+# Texture encoding
+
+
+@benchmark("texture", "read_pixels", quick={"size": 32}, size=128)
+def bench_read_pixels(size: int):
+    image = gradient_image(make_rng(), size, size)
+    return lambda: getImagePixelsRGBA(image)
+
+
+@benchmark("texture", "encode", quick={"fmt": "I4", "size": 32}, fmt="I4", size=128)
+@benchmark("texture", "encode", quick={"fmt": "I8", "size": 32}, fmt="I8", size=128)
+@benchmark("texture", "encode", quick={"fmt": "IA4", "size": 32}, fmt="IA4", size=128)
+@benchmark("texture", "encode", quick={"fmt": "IA8", "size": 32}, fmt="IA8", size=128)
+@benchmark("texture", "encode", quick={"fmt": "IA16", "size": 32}, fmt="IA16", size=128)
+@benchmark("texture", "encode", quick={"fmt": "RGBA32", "size": 32}, fmt="RGBA32", size=128)
+@benchmark("texture", "encode", quick={"fmt": "RGBA16", "size": 32}, fmt="RGBA16", size=128)
+def bench_encode(fmt: str, size: int):
+    rgba = image_rgba(gradient_image(make_rng(), size, size))
+    return lambda: encodeNonCITextureData(rgba, fmt)
+
+
+# Palettes
+
+
+@benchmark("palette", "colors_used", quick={"colors": 256, "size": 32}, colors=256, size=128)
+def bench_colors_used(colors: int, size: int):
+    image = palette_image(make_rng(), size, size, colors)
+    return lambda: getColorsUsedInImage(image, "RGBA16")
+
+
+@benchmark("palette", "merge", quick={"colors": 64}, colors=256)
+def bench_merge_palettes(colors: int):
+    rng = make_rng()
+    # overlapping halves, like two CI textures sharing a palette
+    pal0 = getColorsUsedInImage(palette_image(rng, 64, 64, colors), "RGBA16")
+    pal1 = getColorsUsedInImage(palette_image(rng, 64, 64, colors), "RGBA16") + pal0[: len(pal0) // 2]
+    return lambda: mergePalettes(pal0, pal1)
+
+
+@benchmark("palette", "encode_ci", quick={"fmt": "CI8", "size": 32}, fmt="CI8", size=128)
+@benchmark("palette", "encode_ci", quick={"fmt": "CI4", "size": 32}, fmt="CI4", size=128)
+def bench_encode_ci(fmt: str, size: int):
+    image = palette_image(make_rng(), size, size, 16 if fmt == "CI4" else 256)
+    palette = getColorsUsedInImage(image, "RGBA16")
+    return lambda: encodeCITextureData(image, palette, "RGBA16", fmt)
+
+
+# GBI serialization
+
+
+@benchmark("gbi", "gfxlist_to_c", quick={"grid": 16, "dl": "static"}, grid=64, dl="static")
+@benchmark("gbi", "gfxlist_to_c", quick={"grid": 16, "dl": "dynamic"}, grid=64, dl="dynamic")
+def bench_gfxlist_to_c(grid: int, dl: str):
+    gfxList, _, _ = build_display_list(random_mesh(make_rng(), grid))
+    gfxList.DLFormat = DLFormat.Static if dl == "static" else DLFormat.Dynamic
+    f3d = get_cached_F3D_GBI(F3D_TYPE)
+    return lambda: gfxList.to_c(f3d, homebrew=False)
+
+
+@benchmark("gbi", "gfxlist_to_binary", quick={"grid": 16}, grid=64)
+def bench_gfxlist_to_binary(grid: int):
+    gfxList, _, _ = build_display_list(random_mesh(make_rng(), grid))
+    f3d = get_cached_F3D_GBI(F3D_TYPE)
+    return lambda: gfxList.to_binary(f3d, BENCH_SEGMENTS)
+
+
+@benchmark("gbi", "vtxlist_to_c", quick={"grid": 16}, grid=64)
+def bench_vtxlist_to_c(grid: int):
+    _, vtxList, _ = build_display_list(random_mesh(make_rng(), grid))
+    return lambda: vtxList.to_c()
+
+
+@benchmark("gbi", "vtxlist_to_binary", quick={"grid": 16}, grid=64)
+def bench_vtxlist_to_binary(grid: int):
+    _, vtxList, _ = build_display_list(random_mesh(make_rng(), grid))
+    return lambda: vtxList.to_binary()
+
+
+@benchmark("gbi", "fimage_to_c", quick={"size": 32}, size=128)
+def bench_fimage_to_c(size: int):
+    data = encodeNonCITextureData(image_rgba(gradient_image(make_rng(), size, size)), "RGBA16")
+    fImage = converted_fimage("bench_texture", "G_IM_FMT_RGBA", "G_IM_SIZ_16b", size, size, data)
+    return lambda: fImage.to_c(64)
+
+
+# C parsing
+
+
+@benchmark("parser", "parse_macro_list", quick={"grid": 16}, grid=64)
+def bench_parse_macro_list(grid: int):
+    text = vanilla_c_asset("bench", random_mesh(make_rng(), grid))
+    dlBody = re.search(r"Gfx\s*bench_dl\s*\[\s*\]\s*=\s*\{([^\}]*)\}", text).group(1)
+    return lambda: parseMacroList(dlBody)
+
+
+@benchmark("parser", "parse_dl_data", quick={"grid": 16}, grid=64)
+def bench_parse_dl_data(grid: int):
+    text = vanilla_c_asset("bench", random_mesh(make_rng(), grid))
+    return lambda: parseDLData(text, "bench_dl")
+
+
+# Vertex dedupe
+
+
+@benchmark("vertices", "buffer_dedupe", quick={"grid": 16}, grid=64)
+def bench_buffer_dedupe(grid: int):
+    """The vertex buffer lookups TriangleConverter does for every face corner, flushing when the buffer is full."""
+    mesh = random_mesh(make_rng(), grid)
+    vertices = [
+        BufferVertex(F3DVert(mesh.positions[v], mesh.uvs[v], None, mesh.normals[v], 1.0), 0, 0)
+        for triangle in mesh.triangles
+        for v in triangle
+    ]
+    vertInBuffer = TriangleConverter.vertInBuffer
+
+    def dedupe():
+        converter = SimpleNamespace(vertBuffer=[], existingVertexMaterialRegions=None)
+        for bufferVert in vertices:
+            if not vertInBuffer(converter, bufferVert, 0):
+                if len(converter.vertBuffer) == 32:
+                    converter.vertBuffer = []
+                converter.vertBuffer.append(bufferVert)
+
+    return dedupe
+
+
+@benchmark("vertices", "weld_positions", quick={"grid": 16}, grid=64)
+def bench_weld_positions(grid: int):
+    mesh = random_mesh(make_rng(), grid)
+    corners = [mesh.positions[v] for triangle in mesh.triangles for v in triangle]
+    return lambda: weldVertexPositions(corners)
+
+
+# Collision
+
+
+@benchmark("collision", "build", quick={"grid": 8}, grid=32)
+def bench_collision_build(grid: int):
+    rng = make_rng()
+    collisionDict = collision_faces(rng, random_mesh(rng, grid), ("SURFACE_DEFAULT", "SURFACE_NOT_SLIPPERY"))
+    return lambda: buildCollision("bench_collision", collisionDict)
+
+
+@benchmark("collision", "to_c", quick={"grid": 8}, grid=32)
+def bench_collision_to_c(grid: int):
+    rng = make_rng()
+    collision = buildCollision("bench_collision", collision_faces(rng, random_mesh(rng, grid)))
+    return lambda: collision.to_c()
+
+
+@benchmark("collision", "to_binary", quick={"grid": 8}, grid=32)
+def bench_collision_to_binary(grid: int):
+    rng = make_rng()
+    collision = buildCollision("bench_collision", collision_faces(rng, random_mesh(rng, grid)))
+    return lambda: collision.to_binary()
+
+
+# Segment compression
+
+
+@benchmark("compression", "compress", quick={"fmt": "yay0", "grid": 8, "textures": 2}, fmt="yay0", grid=32, textures=8)
+@benchmark("compression", "compress", quick={"fmt": "mio0", "grid": 8, "textures": 2}, fmt="mio0", grid=32, textures=8)
+def bench_compress(fmt: str, grid: int, textures: int):
+    data = vanilla_segment(grid, textures)
+    ratio = len(compressData(data, fmt)) / len(data)
+    return lambda: compressData(data, fmt), {"bytes": len(data), "ratio": ratio}
+
+
+@benchmark(
+    "compression", "decompress", quick={"fmt": "yay0", "grid": 8, "textures": 2}, fmt="yay0", grid=32, textures=8
+)
+@benchmark(
+    "compression", "decompress", quick={"fmt": "mio0", "grid": 8, "textures": 2}, fmt="mio0", grid=32, textures=8
+)
+def bench_decompress(fmt: str, grid: int, textures: int):
+    data = vanilla_segment(grid, textures)
+    compressed = compressData(data, fmt)
+    return lambda: decompressData(compressed), {"bytes": len(data), "ratio": len(compressed) / len(data)}
@@ -0,0 +1,207 @@
+"""
+Synthetic, seeded inputs for the benchmarks. Everything is plain Python data, so fixtures are identical between runs
+and machines given the same seed. Generating them is never part of a timing.
+"""
+
+import random
+from dataclasses import dataclass
+
+
+@dataclass
+class SyntheticMesh:
+    # one entry per vertex, positions in N64 units
+    positions: list[tuple[float, float, float]]
+    uvs: list[tuple[float, float]]
+    normals: list[tuple[float, float, float]]
+    # vertex indices per triangle
+    triangles: list[tuple[int, int, int]]
+
+
+class SyntheticImage:
+    """Has the attributes of bpy.types.Image read by getImagePixelsRGBA, with pixels stored bottom row first."""
+
+    def __init__(self, name: str, width: int, height: int, pixels: list[float], channels: int = 4):
+        self.name = name
+        self.size = (width, height)
+        self.channels = channels
+        self.pixels = pixels
+
+
+def random_mesh(rng: random.Random, gridSize: int, scale: float = 100.0) -> SyntheticMesh:
+    """
+    A jittered heightfield of gridSize x gridSize quads.
+    Neighbouring triangles share vertices, like a real terrain mesh, which is what vertex dedupe has to find.
+    """
+    positions = []
+    uvs = []
+    normals = []
+    for j in range(gridSize + 1):
+        for i in range(gridSize + 1):
+            height = rng.uniform(-0.5, 0.5) * scale
+            positions.append((i * scale + rng.uniform(-0.1, 0.1) * scale, height, j * scale))
+            uvs.append((i / gridSize, j / gridSize))
+            nx, nz = rng.uniform(-0.3, 0.3), rng.uniform(-0.3, 0.3)
+            length = (nx * nx + 1 + nz * nz) ** 0.5
+            normals.append((nx / length, 1 / length, nz / length))
+
+    triangles = []
+    rowLength = gridSize + 1
+    for j in range(gridSize):
+        for i in range(gridSize):
+            v0 = j * rowLength + i
+            v1, v2, v3 = v0 + 1, v0 + rowLength, v0 + rowLength + 1
+            triangles.append((v0, v2, v1))
+            triangles.append((v1, v2, v3))
+    return SyntheticMesh(positions, uvs, normals, triangles)
+
+
+def gradient_image(rng: random.Random, width: int, height: int, noise: float = 0.05) -> SyntheticImage:
+    """A noisy gradient, which has close to one distinct color per pixel like a photo based texture."""
+    pixels = []
+    for y in range(height):
+        for x in range(width):
+            u, v = x / max(width - 1, 1), y / max(height - 1, 1)
+            pixels.extend(
+                (
+                    min(max(u + rng.uniform(-noise, noise), 0.0), 1.0),
+                    min(max(v + rng.uniform(-noise, noise), 0.0), 1.0),
+                    min(max(1 - u * v + rng.uniform(-noise, noise), 0.0), 1.0),
+                    1.0 if rng.random() > 0.1 else 0.0,
+                )
+            )
+    return SyntheticImage(f"gradient_{width}x{height}", width, height, pixels)
+
+
+def palette_image(rng: random.Random, width: int, height: int, colorCount: int) -> SyntheticImage:
+    """
+    An image drawn in 4x4 blocks from colorCount colors that are exact in RGBA16,
+    so its palette has at most colorCount entries and is valid for CI4 (16) or CI8 (256).
+    """
+    colors = [
+        (rng.randrange(32) / 31, rng.randrange(32) / 31, rng.randrange(32) / 31, float(rng.random() > 0.2))
+        for _ in range(colorCount)
+    ]
+    blocksPerRow = (width + 3) // 4
+    blockColors = [rng.choice(colors) for _ in range(blocksPerRow * ((height + 3) // 4))]
+    pixels = []
+    for y in range(height):
+        for x in range(width):
+            pixels.extend(blockColors[(y // 4) * blocksPerRow + x // 4])
+    return SyntheticImage(f"palette_{colorCount}_{width}x{height}", width, height, pixels)
+
+
+def image_rgba(image: SyntheticImage) -> list[float]:
+    """Top row first RGBA floats, the same layout getImagePixelsRGBA returns."""
+    width, height = image.size
+    rowLength = width * 4
+    return [value for j in reversed(range(height)) for value in image.pixels[j * rowLength : (j + 1) * rowLength]]
+
+
+def vertex_batches(mesh: SyntheticMesh, bufferSize: int = 32) -> list[tuple[list[int], list[tuple[int, int, int]]]]:
+    """
+    Splits the triangles into loads of at most bufferSize vertices, like the exporter fills the RSP vertex buffer.
+    Returns (mesh vertex indices, triangles as buffer indices) per load.
+    """
+    batches = []
+    vertIndices: list[int] = []
+    bufferIndices: dict[int, int] = {}
+    triangles: list[tuple[int, int, int]] = []
+    for triangle in mesh.triangles:
+        newVerts = [v for v in dict.fromkeys(triangle) if v not in bufferIndices]
+        if len(vertIndices) + len(newVerts) > bufferSize:
+            batches.append((vertIndices, triangles))
+            vertIndices, bufferIndices, triangles = [], {}, []
+            newVerts = list(dict.fromkeys(triangle))
+        for v in newVerts:
+            bufferIndices[v] = len(vertIndices)
+            vertIndices.append(v)
+        triangles.append(tuple(bufferIndices[v] for v in triangle))
+    if triangles:
+        batches.append((vertIndices, triangles))
+    return batches
+
+
+def collision_faces(
+    rng: random.Random, mesh: SyntheticMesh, collisionTypes: tuple[str, ...] = ("SURFACE_DEFAULT",)
+) -> dict[str, list]:
+    """
+    The collisionDict built by sm64_collision.addCollisionTriangles for this mesh:
+    collision type : list of (rounded positions, special param, room).
+    """
+    rounded = [tuple(int(round(value)) for value in position) for position in mesh.positions]
+    collisionDict: dict[str, list] = {}
+    for triangle in mesh.triangles:
+        collisionType = rng.choice(collisionTypes)
+        collisionDict.setdefault(collisionType, []).append((tuple(rounded[v] for v in triangle), None, 0))
+    return collisionDict
+
+
+def vanilla_c_asset(name: str, mesh: SyntheticMesh, textureSize: int = 32) -> str:
+    """
+    C source for the mesh laid out like a decompiled SM64 model.inc.c:
+    a lights struct, Vtx arrays per vertex load and a Gfx list drawing them with a textured material.
+    """
+    lines = [
+        f"static const Lights1 {name}_lights = gdSPDefLights1(",
+        "    0x3f, 0x3f, 0x3f,",
+        "    0xff, 0xff, 0xff, 0x28, 0x28, 0x28",
+        ");",
+        "",
+        f"ALIGNED8 static const Texture {name}_texture[] = {{",
+        '#include "actors/bench/texture.rgba16.inc.c"',
+        "};",
+        "",
+    ]
+    batches = vertex_batches(mesh)
+    for batchIndex, (vertIndices, _) in enumerate(batches):
+        lines.append(f"static const Vtx {name}_vertex_{batchIndex}[] = {{")
+        for v in vertIndices:
+            x, y, z = (int(round(value)) for value in mesh.positions[v])
+            s, t = (int(round(value * textureSize * 32)) for value in mesh.uvs[v])
+            nx, ny, nz = (int(round(value * 127)) & 0xFF for value in mesh.normals[v])
+            position = f"{{{x:6}, {y:6}, {z:6}}}"
+            uv = f"{{{s:6}, {t:6}}}"
+            normal = f"{{{nx:#04x}, {ny:#04x}, {nz:#04x}, 0xff}}"
+            lines.append(f"    {{{{{position}, 0, {uv}, {normal}}}}},")
+        lines.append("};")
+        lines.append("")
+
+    lines.extend(
+        [
+            f"const Gfx {name}_dl[] = {{",
+            "    gsDPPipeSync(),",
+            "    gsDPSetCombineMode(G_CC_MODULATERGB, G_CC_MODULATERGB),",
+            "    gsSPTexture(0xFFFF, 0xFFFF, 0, G_TX_RENDERTILE, G_ON),",
+            f"    gsDPSetTextureImage(G_IM_FMT_RGBA, G_IM_SIZ_16b, 1, {name}_texture),",
+            "    gsDPSetTile(G_IM_FMT_RGBA, G_IM_SIZ_16b, 0, 0, G_TX_LOADTILE, 0, G_TX_WRAP | G_TX_NOMIRROR, "
+            "G_TX_NOMASK, G_TX_NOLOD, G_TX_WRAP | G_TX_NOMIRROR, G_TX_NOMASK, G_TX_NOLOD),",
+            "    gsDPLoadSync(),",
+            f"    gsDPLoadBlock(G_TX_LOADTILE, 0, 0, {textureSize} * {textureSize} - 1, "
+            f"CALC_DXT({textureSize}, G_IM_SIZ_16b_BYTES)),",
+            "    gsDPSetTile(G_IM_FMT_RGBA, G_IM_SIZ_16b, 8, 0, G_TX_RENDERTILE, 0, G_TX_WRAP | G_TX_NOMIRROR, "
+            "5, G_TX_NOLOD, G_TX_WRAP | G_TX_NOMIRROR, 5, G_TX_NOLOD),",
+            f"    gsDPSetTileSize(0, 0, 0, ({textureSize} - 1) << G_TEXTURE_IMAGE_FRAC, "
+            f"({textureSize} - 1) << G_TEXTURE_IMAGE_FRAC),",
+            f"    gsSPLight(&{name}_lights.l, 1),",
+            f"    gsSPLight(&{name}_lights.a, 2),",
+        ]
+    )
+    for batchIndex, (vertIndices, triangles) in enumerate(batches):
+        lines.append(f"    gsSPVertex({name}_vertex_{batchIndex}, {len(vertIndices)}, 0),")
+        for i in range(0, len(triangles) - 1, 2):
+            (a, b, c), (d, e, f) = triangles[i], triangles[i + 1]
+            lines.append(f"    gsSP2Triangles({a:2}, {b:2}, {c:2}, 0x0, {d:2}, {e:2}, {f:2}, 0x0),")
+        if len(triangles) % 2 == 1:
+            a, b, c = triangles[-1]
+            lines.append(f"    gsSP1Triangle({a:2}, {b:2}, {c:2}, 0x0),")
+    lines.extend(
+        [
+            "    gsSPTexture(0xFFFF, 0xFFFF, 0, G_TX_RENDERTILE, G_OFF),",
+            "    gsDPPipeSync(),",
+            "    gsDPSetCombineMode(G_CC_SHADE, G_CC_SHADE),",
+            "    gsSPEndDisplayList(),",
+            "};",
+            "",
+        ]
+    )
+    return "\n".join(lines)
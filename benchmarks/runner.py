@@ -0,0 +1,162 @@
+"""
+Registry, timing and JSON reporting for the benchmarks.
+Timings use timeit, which turns off garbage collection while timing and picks a loop count per benchmark,
+and every result is reported per call so runs with different loop counts compare directly.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+RESULTS_VERSION = 1
+
+
+@dataclass
+class Benchmark:
+    group: str
+    name: str
+    # receives the params and returns the zero argument callable that is timed, so setup is never measured.
+    # It can also return (callable, metrics), where metrics is a dict copied into the result.
+    # A "bytes" metric adds the throughput in bytes per second.
+    setup: Callable[..., Callable[[], object]]
+    params: dict = field(default_factory=dict)
+    # params used instead when running with --quick
+    quickParams: Optional[dict] = None
+
+    def key(self, params: dict) -> str:
+        if not params:
+            return f"{self.group}.{self.name}"
+        return f"{self.group}.{self.name}[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+registeredBenchmarks: list[Benchmark] = []
+
+
+def benchmark(group: str, name: str, quick: Optional[dict] = None, **params):
+    """Decorator registering a setup function. It can be stacked to register the same kernel with other params."""
+
+    def register(setup):
+        registeredBenchmarks.append(Benchmark(group, name, setup, params, quick))
+        return setup
+
+    return register
+
+
+def time_benchmark(bench: Benchmark, params: dict, repeat: int, minTime: float) -> dict:
+    func = bench.setup(**params)
+    metrics = {}
+    if isinstance(func, tuple):
+        func, metrics = func
+    timer = timeit.Timer(func)
+    number = 1
+    # like Timer.autorange, but stops at minTime instead of always 0.2 seconds
+    while timer.timeit(number) < minTime:
+        number *= 2
+    times = [t / number for t in timer.repeat(repeat, number)]
+    result = {
+        "name": bench.key(params),
+        "group": bench.group,
+        "params": params,
+        "number": number,
+        "repeat": repeat,
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+    if metrics:
+        result["metrics"] = metrics
+        if "bytes" in metrics:
+            result["throughput"] = metrics["bytes"] / result["best"]
+    return result
+
+
+def get_git_revision(path: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    benchmarks: list[Benchmark], quick: bool, repeat: int, minTime: float, log=sys.stderr.write
+) -> list[dict]:
+    results = []
+    for bench in benchmarks:
+        params = bench.quickParams if quick and bench.quickParams is not None else bench.params
+        result = time_benchmark(bench, params, repeat, minTime)
+        line = (
+            f"{result['name']:<60} {format_time(result['best']):>10} best, {format_time(result['median']):>10} median"
+        )
+        if "throughput" in result:
+            line += f", {result['throughput'] / 2**20:.2f} MiB/s"
+        if "ratio" in result.get("metrics", {}):
+            line += f", ratio {result['metrics']['ratio']:.3f}"
+        log(line + "\n")
+        results.append(result)
+    return results
+
+
+def make_report(results: list[dict], metadata: dict) -> dict:
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        **metadata,
+        "results": results,
+    }
+
+
+def write_report(report: dict, path: Optional[str]):
+    text = json.dumps(report, indent=2) + "\n"
+    if path is None:
+        sys.stdout.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def compare_reports(baseline: dict, report: dict, threshold: float, log=sys.stderr.write) -> list[str]:
+    """
+    Prints the ratio of each benchmark's best time to the baseline's and returns the names slower than threshold.
+    Benchmarks missing from either report never count as regressions.
+    """
+    if baseline.get("version") != report["version"]:
+        log(f"Warning: baseline results are version {baseline.get('version')}, expected {report['version']}\n")
+    baselineResults = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = baselineResults.pop(result["name"], None)
+        if old is None:
+            log(f"{result['name']:<60} {'new':>10}\n")
+            continue
+        ratio = result["best"] / old["best"] if old["best"] > 0 else float("inf")
+        status = ""
+        if ratio > threshold:
+            status = "slower"
+            regressions.append(result["name"])
+        elif ratio < 1 / threshold:
+            status = "faster"
+        log(
+            f"{result['name']:<60} {format_time(old['best']):>10} -> {format_time(result['best']):>10} {ratio:6.2f}x {status}\n"
+        )
+    if baselineResults:
+        log(f"{len(baselineResults)} benchmark(s) in the baseline were not run.\n")
+    return regressions
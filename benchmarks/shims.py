@@ -0,0 +1,100 @@
+"""
+Stand-ins for Blender's Python modules, so fast64_internal can be imported by a regular interpreter.
+The kernels that are benchmarked never call into them. They only have to survive the addon's
+import-time class definitions. Nothing is installed when bpy can already be imported (e.g. running inside Blender).
+"""
+
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import sys
+import types
+from unittest import mock
+
+BLENDER_MODULES = (
+    "addon_utils",
+    "bgl",
+    "bl_math",
+    "bl_operators",
+    "bl_ui",
+    "blf",
+    "bmesh",
+    "bpy",
+    "bpy_extras",
+    "gpu",
+    "gpu_extras",
+    "idprop",
+    "mathutils",
+)
+
+# Modules whose attributes are subclassed by the addon, so they must be real classes
+CLASS_MODULES = (
+    "bl_operators.presets",
+    "bl_ui.properties_material",
+    "bpy.types",
+    "bpy_extras.io_utils",
+)
+
+
+def make_stand_in_class(name: str) -> type:
+    # bpy.types.PropertyGroup etc. accept class keywords in some Blender versions
+    return type(name, (object,), {"__init_subclass__": classmethod(lambda cls, **kwargs: None)})
+
+
+class ClassModule(types.ModuleType):
+    """Module where every attribute is a distinct, cached, empty class."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__path__ = []
+        self._classes: dict[str, type] = {}
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name not in self._classes:
+            self._classes[name] = make_stand_in_class(name)
+        return self._classes[name]
+
+
+class Vector(list):
+    """Enough of mathutils.Vector for annotations and module level constants."""
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        super().__init__(values)
+
+    def __getattr__(self, name: str):
+        return mock.MagicMock()
+
+
+class BlenderModuleFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in BLENDER_MODULES:
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        if spec.name in CLASS_MODULES:
+            return ClassModule(spec.name)
+        module = mock.MagicMock()
+        module.__name__ = spec.name
+        module.__spec__ = spec
+        module.__path__ = []
+        module.__all__ = []
+        if spec.name == "mathutils":
+            # the addon uses star imports from mathutils
+            module.__all__ = ["Color", "Euler", "Matrix", "Quaternion", "Vector"]
+            module.Vector = Vector
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def install_blender_shims() -> bool:
+    """Returns whether shims were installed, which is False when running with Blender's own modules."""
+    if "bpy" in sys.modules or importlib.util.find_spec("bpy") is not None:
+        return False
+    if not any(isinstance(finder, BlenderModuleFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, BlenderModuleFinder())
+    return True
@@ -0,0 +1,410 @@
+"""
+Reads export geometry from the evaluated depsgraph instead of duplicating objects,
+applying their modifiers and transforms with operators, and joining them.
+combined_export_object creates no temporary objects, and every mesh made here is freed when its context manager exits.
+Exporters that walk the object hierarchy use ExportHierarchy, which copies the objects through the data API instead.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+import bpy
+from mathutils import Matrix, Vector
+
+from .utility import PluginError
+
+EXPORT_COLOR_LAYERS = ("Col", "Alpha")
+
+
+@contextmanager
+def evaluated_mesh(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph, matrix: Optional[Matrix] = None):
+    """
+    Yields (evaluated object, mesh) with modifiers and shape keys applied, transformed by matrix if given.
+    The mesh is owned by the evaluated object and is cleared on exit.
+    """
+    objEval = obj.evaluated_get(depsgraph)
+    mesh = objEval.to_mesh()
+    try:
+        if matrix is not None:
+            mesh.transform(matrix)
+        yield objEval, mesh
+    finally:
+        objEval.to_mesh_clear()
+
+
+def is_export_visible(obj: bpy.types.Object) -> bool:
+    """Whether bpy.ops.object.duplicate, which exports used before, would have copied obj."""
+    return obj.visible_get() and not obj.hide_get() and not obj.hide_select
+
+
+def get_export_objects(
+    obj: bpy.types.Object,
+    include: Callable[[bpy.types.Object], bool],
+    getChildren: Callable[[bpy.types.Object], Iterable[bpy.types.Object]] = lambda current: current.children,
+) -> list[bpy.types.Object]:
+    """
+    obj followed by the objects under it that include accepts, parents first.
+    Hidden and unselectable objects are left out, but their children are still visited.
+    getChildren returns the children of an object that are visited.
+    """
+    exportObjs = [obj]
+
+    def visit(current: bpy.types.Object):
+        for child in getChildren(current):
+            if include(child) and is_export_visible(child):
+                exportObjs.append(child)
+            visit(child)
+
+    visit(obj)
+    return exportObjs
+
+
+def get_export_mesh_objects(obj: bpy.types.Object, includeChildren: bool) -> list[bpy.types.Object]:
+    """Mesh objects that are combined for obj."""
+    exportObjs = get_export_objects(obj, lambda child: child.type == "MESH") if includeChildren else [obj]
+    return [exportObj for exportObj in exportObjs if exportObj.type == "MESH"]
+
+
+def get_corner_colors(mesh: bpy.types.Mesh, loopVerts: list[int], layer: str) -> Optional[list[float]]:
+    """Flat RGBA per loop of a color layer, read the same way as getColorLayer, or None if the layer doesn't exist."""
+    if layer in mesh.attributes and getattr(mesh.attributes[layer], "data", None):
+        attribute = mesh.attributes[layer]
+        colors = [0.0] * (4 * len(attribute.data))
+        attribute.data.foreach_get("color", colors)
+        if attribute.domain == "POINT":
+            return [value for vertIndex in loopVerts for value in colors[4 * vertIndex : 4 * vertIndex + 4]]
+        return colors
+    if layer in mesh.vertex_colors:
+        colors = [0.0] * (4 * len(mesh.loops))
+        mesh.vertex_colors[layer].data.foreach_get("color", colors)
+        return colors
+    return None
+
+
+def get_bound_box(co: list[float]) -> list[tuple[float, float, float]]:
+    """Corners in the same order as bpy.types.Object.bound_box."""
+    if len(co) == 0:
+        return [(0.0, 0.0, 0.0)] * 8
+    xs, ys, zs = co[0::3], co[1::3], co[2::3]
+    x0, y0, z0, x1, y1, z1 = min(xs), min(ys), min(zs), max(xs), max(ys), max(zs)
+    return [
+        (x0, y0, z0),
+        (x0, y0, z1),
+        (x0, y1, z1),
+        (x0, y1, z0),
+        (x1, y0, z0),
+        (x1, y0, z1),
+        (x1, y1, z1),
+        (x1, y1, z0),
+    ]
+
+
+class CombinedMeshBuilder:
+    """Appends evaluated meshes into flat arrays, then writes them into a single mesh with foreach_set."""
+
+    def __init__(self):
+        self.co: list[float] = []
+        self.loopVerts: list[int] = []
+        self.loopStarts: list[int] = []
+        self.loopTotals: list[int] = []
+        self.materialIndices: list[int] = []
+        self.smooth: list[bool] = []
+        self.normals: list[float] = []
+        self.uvs: list[float] = []
+        self.hasUVMap = False
+        # layer name : list of (loop count, colors or None) per source mesh
+        self.colors: dict[str, list[tuple[int, Optional[list[float]]]]] = {layer: [] for layer in EXPORT_COLOR_LAYERS}
+        self.materials: list[Optional[bpy.types.Material]] = []
+        self.materialIndexOf: dict[Optional[bpy.types.Material], int] = {}
+
+    def add_mesh(self, obj: bpy.types.Object, objEval: bpy.types.Object, mesh: bpy.types.Mesh):
+        vertOffset = len(self.co) // 3
+        loopOffset = len(self.loopVerts)
+        numLoops = len(mesh.loops)
+        numPolygons = len(mesh.polygons)
+
+        co = [0.0] * (3 * len(mesh.vertices))
+        mesh.vertices.foreach_get("co", co)
+        self.co.extend(co)
+
+        loopVerts = [0] * numLoops
+        mesh.loops.foreach_get("vertex_index", loopVerts)
+        self.loopVerts.extend([vertIndex + vertOffset for vertIndex in loopVerts])
+
+        loopStarts = [0] * numPolygons
+        mesh.polygons.foreach_get("loop_start", loopStarts)
+        self.loopStarts.extend([loopStart + loopOffset for loopStart in loopStarts])
+        loopTotals = [0] * numPolygons
+        mesh.polygons.foreach_get("loop_total", loopTotals)
+        self.loopTotals.extend(loopTotals)
+        smooth = [False] * numPolygons
+        mesh.polygons.foreach_get("use_smooth", smooth)
+        self.smooth.extend(smooth)
+
+        # Material slots are merged by material, like joining objects does
+        slotIndices = []
+        for slot in objEval.material_slots:
+            material = getattr(slot.material, "original", slot.material)
+            if material not in self.materialIndexOf:
+                self.materialIndexOf[material] = len(self.materials)
+                self.materials.append(material)
+            slotIndices.append(self.materialIndexOf[material])
+        materialIndices = [0] * numPolygons
+        mesh.polygons.foreach_get("material_index", materialIndices)
+        for materialIndex in materialIndices:
+            if materialIndex >= len(slotIndices):
+                raise PluginError(
+                    f"Mesh object {obj.name} has faces"
+                    " with an invalid material slot assigned."
+                    " Assign the faces to a valid slot."
+                    f" (0-indexed: slot {materialIndex}, aka the {materialIndex+1}th slot)."
+                )
+        self.materialIndices.extend([slotIndices[materialIndex] for materialIndex in materialIndices])
+
+        # in blender version 4.1 func was removed, in 4.1+ normals are always calculated
+        if bpy.app.version < (4, 1, 0):
+            mesh.calc_normals_split()
+        normals = [0.0] * (3 * numLoops)
+        mesh.loops.foreach_get("normal", normals)
+        self.normals.extend(normals)
+
+        uvLayer = mesh.uv_layers.get("UVMap")
+        if uvLayer is not None:
+            uvs = [0.0] * (2 * numLoops)
+            uvLayer.data.foreach_get("uv", uvs)
+            self.uvs.extend(uvs)
+            self.hasUVMap = True
+        elif len(mesh.uv_layers) > 0:
+            raise PluginError("Object '" + obj.name + "' does not have a UV layer named 'UVMap.'")
+        else:
+            self.uvs.extend([0.0] * (2 * numLoops))
+
+        for layer in EXPORT_COLOR_LAYERS:
+            self.colors[layer].append((numLoops, get_corner_colors(mesh, loopVerts, layer)))
+
+    def build(self, mesh: bpy.types.Mesh):
+        mesh.vertices.add(len(self.co) // 3)
+        mesh.vertices.foreach_set("co", self.co)
+        mesh.loops.add(len(self.loopVerts))
+        mesh.loops.foreach_set("vertex_index", self.loopVerts)
+        mesh.polygons.add(len(self.loopStarts))
+        mesh.polygons.foreach_set("loop_start", self.loopStarts)
+        # loop_total is derived from loop_start in 4.0+
+        if bpy.app.version < (4, 0, 0):
+            mesh.polygons.foreach_set("loop_total", self.loopTotals)
+        mesh.polygons.foreach_set("material_index", self.materialIndices)
+        mesh.polygons.foreach_set("use_smooth", self.smooth)
+        mesh.update(calc_edges=True)
+
+        for material in self.materials:
+            mesh.materials.append(material)
+
+        if self.hasUVMap:
+            mesh.uv_layers.new(name="UVMap").data.foreach_set("uv", self.uvs)
+
+        for layer, layerColors in self.colors.items():
+            if all(colors is None for _, colors in layerColors):
+                continue
+            values = []
+            for numLoops, colors in layerColors:
+                # Meshes without the layer are filled with white, which is also the exporter's default
+                values.extend(colors if colors is not None else [1.0] * (4 * numLoops))
+            if bpy.app.version >= (3, 2, 0):
+                mesh.color_attributes.new(layer, "FLOAT_COLOR", "CORNER").data.foreach_set("color", values)
+            else:
+                mesh.vertex_colors.new(name=layer).data.foreach_set("color", values)
+
+        # Baking the evaluated normals as custom normals keeps smoothing from every source mesh
+        if bpy.app.version < (4, 1, 0):
+            mesh.use_auto_smooth = True
+        normals = self.normals
+        mesh.normals_split_custom_set([normals[i : i + 3] for i in range(0, len(normals), 3)])
+
+
+@dataclass
+class ExportMaterialSlot:
+    material: Optional[bpy.types.Material]
+
+
+class ExportObject:
+    """
+    Stands in for the object that used to be created by joining duplicates.
+    data, material_slots and bound_box describe the combined mesh,
+    the attributes in SOURCE_ATTRIBUTES are read from the source object.
+    """
+
+    # Object settings read by the F3D, SM64 and OoT display list exporters
+    SOURCE_ATTRIBUTES = {
+        "get",
+        "use_f3d_culling",
+        "draw_layer_static",
+        "ootDrawLayer",
+        "ootDynamicTransform",
+    }
+
+    def __init__(self, source: bpy.types.Object, mesh: bpy.types.Mesh, co: list[float]):
+        self.source = source
+        self.data = mesh
+        self.name = source.name
+        self.original_name = source.name
+        self.type = "MESH"
+        self.material_slots = [ExportMaterialSlot(material) for material in mesh.materials]
+        self.bound_box = get_bound_box(co)
+
+    def __getattr__(self, name):
+        if name not in ExportObject.SOURCE_ATTRIBUTES:
+            raise AttributeError(f"{name} is not available on the combined export object of {self.name}.")
+        return getattr(self.source, name)
+
+
+@contextmanager
+def combined_export_object(
+    obj: bpy.types.Object, includeChildren: bool, depsgraph: Optional[bpy.types.Depsgraph] = None
+) -> Iterator[ExportObject]:
+    """
+    Replaces joining duplicated objects. Yields an ExportObject whose mesh is every mesh in the hierarchy
+    evaluated with modifiers, rotated and scaled into world space and positioned relative to obj.location,
+    like setting the origin of the joined object to obj.location did.
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    meshObjs = get_export_mesh_objects(obj, includeChildren)
+    if len(meshObjs) == 0:
+        raise PluginError(f"{obj.name} has no mesh objects to export.")
+
+    toOrigin = Matrix.Translation(-obj.location)
+    builder = CombinedMeshBuilder()
+    for meshObj in meshObjs:
+        matrix = toOrigin @ meshObj.evaluated_get(depsgraph).matrix_world
+        with evaluated_mesh(meshObj, depsgraph, matrix) as (objEval, mesh):
+            builder.add_mesh(meshObj, objEval, mesh)
+
+    combinedMesh = bpy.data.meshes.new(f"{obj.name}_export")
+    try:
+        builder.build(combinedMesh)
+        yield ExportObject(obj, combinedMesh, builder.co)
+    finally:
+        bpy.data.meshes.remove(combinedMesh)
+
+
+class ExportHierarchy:
+    """
+    Temporary copies of export objects, replacing duplicating them and making their data single user,
+    then applying their modifiers and transforms with operators.
+    - Mesh copies get the evaluated mesh of their source, so modifiers and shape keys are applied.
+    - Like bpy.ops.object.duplicate, copies are linked into the collections of their source,
+      and parented to the copy of their parent if it was copied too.
+    Transforms are changed with matrices. Call update() when done, so matrix_world and matrix_local are current.
+    The geolayout and skeleton exporters walk the result as real objects, reading parents, children,
+    custom properties and matrix_world, and removing constraints, so the copies can't be evaluated data.
+    """
+
+    # Types whose data transform_data can bake a transform into, others keep their basis
+    TRANSFORMABLE_TYPES = {"MESH", "CURVE", "EMPTY"}
+
+    def __init__(self, objs: list[bpy.types.Object], depsgraph: Optional[bpy.types.Depsgraph] = None):
+        if depsgraph is None:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+        self.copies: dict[bpy.types.Object, bpy.types.Object] = {}
+        for obj in objs:
+            objCopy = obj.copy()
+            if obj.type == "MESH":
+                objCopy.data = bpy.data.meshes.new_from_object(
+                    obj.evaluated_get(depsgraph), preserve_all_data_layers=True, depsgraph=depsgraph
+                )
+                objCopy.modifiers.clear()
+            elif obj.data is not None:
+                objCopy.data = obj.data.copy()
+            for collection in obj.users_collection:
+                collection.objects.link(objCopy)
+            self.copies[obj] = objCopy
+        # parents first, since objs are
+        self.objects = list(self.copies.values())
+        self.order = {objCopy: index for index, objCopy in enumerate(self.objects)}
+        for obj, objCopy in self.copies.items():
+            if obj.parent in self.copies:
+                objCopy.parent = self.copies[obj.parent]
+        self.childrenOf: dict[bpy.types.Object, list[bpy.types.Object]] = {}
+        for objCopy in self.objects:
+            self.childrenOf.setdefault(objCopy.parent, []).append(objCopy)
+
+        self.worlds = {objCopy: obj.matrix_world.copy() for obj, objCopy in self.copies.items()}
+        # everything between the basis and world matrix of a copy: parent, parent inverse, bone and constraints
+        self.parentMatrices = {
+            objCopy: self.worlds[objCopy] @ objCopy.matrix_basis.inverted_safe() for objCopy in self.objects
+        }
+
+    def children(self, objCopy: bpy.types.Object) -> list[bpy.types.Object]:
+        return list(self.childrenOf.get(objCopy, []))
+
+    def set_world(self, objCopy: bpy.types.Object, matrix: Matrix, moveChildren: bool = False):
+        """Moves objCopy to matrix. Its children keep their world transform unless moveChildren is set."""
+        delta = matrix @ self.worlds[objCopy].inverted_safe()
+        self.worlds[objCopy] = matrix
+        objCopy.matrix_basis = self.parentMatrices[objCopy].inverted_safe() @ matrix
+        for child in self.childrenOf.get(objCopy, []):
+            self.parentMatrices[child] = delta @ self.parentMatrices[child]
+            if moveChildren:
+                self.set_world(child, delta @ self.worlds[child], True)
+            else:
+                child.matrix_basis = self.parentMatrices[child].inverted_safe() @ self.worlds[child]
+
+    def transform_data(self, objCopy: bpy.types.Object, matrix: Matrix):
+        if objCopy.type in {"MESH", "CURVE"}:
+            objCopy.data.transform(matrix)
+        elif objCopy.type == "EMPTY":
+            objCopy.empty_display_size *= max(abs(value) for value in matrix.to_scale())
+        else:
+            raise PluginError(f"Can't apply the transform of {objCopy.name}, it is a {objCopy.type.lower()} object.")
+
+    def can_transform(self, objCopy: bpy.types.Object) -> bool:
+        return objCopy.type in ExportHierarchy.TRANSFORMABLE_TYPES
+
+    def apply_transform(self, objCopies: Iterable[bpy.types.Object], location: bool, rotation: bool, scale: bool):
+        """
+        Like bpy.ops.object.transform_apply, bakes parts of the basis transform of each copy into its data.
+        Copies that aren't TRANSFORMABLE_TYPES, such as armatures, cameras and lights, are left unchanged.
+        """
+        identity = Matrix.Identity(4)
+        for objCopy in sorted(objCopies, key=self.order.get):
+            if not self.can_transform(objCopy):
+                continue
+            translation, quaternion, scaling = objCopy.matrix_basis.decompose()
+            parts = (
+                (location, Matrix.Translation(translation)),
+                (rotation, quaternion.to_matrix().to_4x4()),
+                (scale, Matrix.Diagonal(scaling).to_4x4()),
+            )
+            applied, kept = identity.copy(), identity.copy()
+            for isApplied, part in parts:
+                if isApplied:
+                    applied = applied @ part
+                else:
+                    kept = kept @ part
+            self.transform_data(objCopy, applied)
+            self.set_world(objCopy, self.parentMatrices[objCopy] @ kept)
+
+    def set_origin(self, objCopy: bpy.types.Object, point: Vector):
+        """Like bpy.ops.object.origin_set(type="ORIGIN_CURSOR") with the 3D cursor at point."""
+        if not self.can_transform(objCopy):
+            return
+        offset = self.worlds[objCopy].inverted_safe() @ point
+        self.transform_data(objCopy, Matrix.Translation(-offset))
+        self.set_world(objCopy, self.worlds[objCopy] @ Matrix.Translation(offset))
+
+    def reparent(self, objCopy: bpy.types.Object, parent: Optional[bpy.types.Object]):
+        """Parents objCopy to parent, keeping its world transform like parent_set(keep_transform=True)."""
+        parentWorld = self.worlds.get(parent, parent.matrix_world) if parent is not None else Matrix.Identity(4)
+        self.childrenOf[objCopy.parent].remove(objCopy)
+        siblings = self.childrenOf.setdefault(parent, [])
+        siblings.append(objCopy)
+        siblings.sort(key=self.order.get)
+        objCopy.parent = parent
+        objCopy.parent_type = "OBJECT"
+        objCopy.matrix_parent_inverse = parentWorld.inverted_safe()
+        self.parentMatrices[objCopy] = Matrix.Identity(4)
+        objCopy.matrix_basis = self.worlds[objCopy]
+
+    def update(self):
+        bpy.context.view_layer.update()
@@ -46,6 +46,10 @@ from .f3d_gbi import (
     GfxList,
     FTriGroup,
     GbiMacro,
+    get_F3D_GBI,
+    renderFlagListToWord,
+    GBL_c1,
+    GBL_c2,
 )
 
 
@@ -61,6 +65,9 @@ class BleedGraphics:
         # build world default cmds to compare against, f3d types needed for reset cmd building
         self.is_f3d_old = bpy.context.scene.f3d_type == "F3D"
         self.is_f3dex2 = "F3DEX2" in bpy.context.scene.f3d_type
+        self.reorder_materials = bpy.context.scene.optimizeF3DDrawOrder
+        # FMaterial: [texture loads, loads skipped because the data was still resident in TMEM]
+        self.tmem_reuse = dict()
         self.build_default_geo()
         self.build_default_othermodes()
 
@@ -122,6 +129,7 @@ class BleedGraphics:
         for drawLayer, fMesh in fMeshes.items():
             self.bleed_fmesh(fMesh, None, fMesh.draw, fModel.getAllMaterials().items(), fModel.getRenderMode(drawLayer))
         self.clear_gfx_lists(fModel)
+        self.print_tmem_report()
 
     # clear the gfx lists so they don't export
     def clear_gfx_lists(self, fModel: FModel):
@@ -148,23 +156,31 @@ class BleedGraphics:
         cur_fmat = None
         reset_cmd_dict = dict()
         bleed_gfx_lists = BleedGfxLists()
+        material_lookup = build_material_jump_lookup(fmodel_materials)
+        if self.reorder_materials:
+            self.optimize_draw_order(cmd_list, material_lookup, default_render_mode)
         fmesh_static_cmds, fmesh_jump_cmds = self.on_bleed_start(cmd_list)
+        # TMEM contents are tracked through the whole mesh, not just the last material
+        resident_tmem = update_tmem_residency(dict(), last_mat.texture_DL) if last_mat else dict()
         for jump_list_cmd in fmesh_jump_cmds:
             # bleed mat and tex
             if jump_list_cmd.displayList.tag & GfxListTag.Material:
                 # update last_mat
                 if cur_fmat:
                     last_mat = cur_fmat
-                _, cur_fmat = find_material_from_jump_cmd(fmodel_materials, jump_list_cmd)
+                _, cur_fmat = material_lookup.get(jump_list_cmd.displayList, (None, None))
                 if not cur_fmat:
                     # make better error msg
                     print("could not find material used in fmesh draw")
                     continue
                 bleed_gfx_lists.bled_mats = self.bleed_mat(cur_fmat, last_mat, bleed_state)
                 if not (cur_fmat.isTexLarge[0] or cur_fmat.isTexLarge[1]):
-                    bleed_gfx_lists.bled_tex = self.bleed_textures(cur_fmat, last_mat, bleed_state)
+                    bleed_gfx_lists.bled_tex = self.bleed_textures(cur_fmat, last_mat, bleed_state, resident_tmem)
+                    resident_tmem = update_tmem_residency(resident_tmem, cur_fmat.texture_DL)
                 else:
                     bleed_gfx_lists.bled_tex = cur_fmat.texture_DL.commands
+                    # large textures are loaded piece by piece in the tri groups
+                    resident_tmem = dict()
             # bleed tri group (for large textures) and to remove other unnecessary cmds
             if jump_list_cmd.displayList.tag & GfxListTag.Geometry:
                 tri_list = jump_list_cmd.displayList
@@ -180,6 +196,122 @@ class BleedGraphics:
         self.on_bleed_end(last_mat, cmd_list, fmesh_static_cmds, reset_cmd_dict, default_render_mode)
         return last_mat
 
+    # Reorders the material blocks (a material call and the tri groups drawn with it) of an FMesh.draw so that
+    # consecutive materials share as many cmds as possible, which bleeding will then remove.
+    # Every FMesh.draw belongs to a single draw layer, so layers are never mixed.
+    # Blended surfaces depend on draw order, so only meshes where every material renders opaque or alpha tested are
+    # reordered. Materials without their own render mode use the draw layer's, meshes without either are left alone.
+    # The first block stays first, since it bleeds against whatever was drawn before this mesh.
+    def optimize_draw_order(self, cmd_list: GfxList, material_lookup: dict, default_render_mode: list[str] = None):
+        blocks, start, end = self.get_material_blocks(cmd_list, material_lookup)
+        if len(blocks) < 3:
+            return 0
+        layer_render_mode = DPSetRenderMode(default_render_mode, None) if default_render_mode else None
+        for fmaterial, _ in blocks:
+            render_mode = next(
+                (cmd for cmd in fmaterial.mat_only_DL.commands if type(cmd) == DPSetRenderMode), layer_render_mode
+            )
+            if render_mode is None or self.render_mode_blends(render_mode):
+                return 0
+
+        state_cmds = {}
+        for fmaterial, _ in blocks:
+            if fmaterial not in state_cmds:
+                cmds = [*fmaterial.mat_only_DL.commands, *fmaterial.texture_DL.commands]
+                state_cmds[fmaterial] = (cmds, CommandLookup(cmds))
+
+        # number of cmds that can't be bled when going from one material to the next
+        costs = {}
+
+        def change_cost(last_mat: FMaterial, cur_mat: FMaterial):
+            if last_mat is cur_mat:
+                return 0
+            cost = costs.get((last_mat, cur_mat))
+            if cost is None:
+                last_lookup = state_cmds[last_mat][1]
+                cost = costs[(last_mat, cur_mat)] = sum(cmd not in last_lookup for cmd in state_cmds[cur_mat][0])
+            return cost
+
+        def total_cost(order: list):
+            return sum(change_cost(order[i - 1][0], order[i][0]) for i in range(1, len(order)))
+
+        # greedy nearest neighbour tour, ties keep the original order
+        remaining = blocks[1:]
+        ordered = [blocks[0]]
+        while remaining:
+            last_mat = ordered[-1][0]
+            next_index = min(range(len(remaining)), key=lambda i: change_cost(last_mat, remaining[i][0]))
+            ordered.append(remaining.pop(next_index))
+
+        saved = total_cost(blocks) - total_cost(ordered)
+        if saved <= 0:
+            return 0
+        cmd_list.commands[start:end] = [cmd for _, block_cmds in ordered for cmd in block_cmds]
+        print(f"{cmd_list.name}: reordered {len(blocks)} materials, saving {saved} state changes (~{saved * 8} bytes)")
+        return saved
+
+    # true if the render mode blends with the framebuffer color or uses the translucent or decal z mode,
+    # as opposed to opaque and alpha tested (TEX_EDGE) surfaces which can be drawn in any order
+    def render_mode_blends(self, render_mode: DPSetRenderMode):
+        f3d = get_F3D_GBI()
+        word = renderFlagListToWord(render_mode.flagList, f3d)
+        if not render_mode.use_preset:
+            word |= render_mode.getGBL_c(f3d)
+        if word & f3d.ZMODE_DEC in (f3d.ZMODE_XLU, f3d.ZMODE_DEC):
+            return True
+        if not word & f3d.FORCE_BL:
+            return False
+        # p/a and m/b blender inputs of both cycles, memory color only matters with a non zero factor
+        for GBL_c in (GBL_c1, GBL_c2):
+            clr_mem, factor_0 = GBL_c(*[f3d.G_BL_CLR_MEM] * 4), GBL_c(*[f3d.G_BL_0] * 4)
+            for color, factor in ((GBL_c(3, 0, 0, 0), GBL_c(0, 3, 0, 0)), (GBL_c(0, 0, 3, 0), GBL_c(0, 0, 0, 3))):
+                if word & color == clr_mem & color and word & factor != factor_0 & factor:
+                    return True
+        return False
+
+    # splits the jumps of an FMesh.draw into (FMaterial, cmds) blocks, and returns the blocks and the range they cover
+    # blocks are only returned if they can be safely reordered
+    def get_material_blocks(self, cmd_list: GfxList, material_lookup: dict):
+        commands = cmd_list.commands
+        start = next((j for j, cmd in enumerate(commands) if type(cmd) == SPDisplayList), len(commands))
+        blocks = []
+        end = start
+        for end in range(start, len(commands) + 1):
+            cmd = commands[end] if end < len(commands) else None
+            if type(cmd) != SPDisplayList:
+                break
+            if cmd.displayList.tag & GfxListTag.Material:
+                fmaterial = material_lookup.get(cmd.displayList, (None, None))[1]
+                if not fmaterial:
+                    return [], start, start
+                blocks.append((fmaterial, [cmd]))
+            elif cmd.displayList.tag & GfxListTag.Geometry and blocks:
+                # tri groups that reuse verts loaded by an earlier tri group depend on draw order
+                if not self.tri_group_self_contained(cmd.displayList):
+                    return [], start, start
+                blocks[-1][1].append(cmd)
+            else:
+                return [], start, start
+        # anything else drawn after the blocks may depend on the last material
+        if any(type(cmd) == SPDisplayList for cmd in commands[end:]):
+            return [], start, start
+        return blocks, start, end
+
+    def tri_group_self_contained(self, tri_list: GfxList):
+        loaded = set()
+        for cmd in tri_list.commands:
+            if type(cmd) == SPVertex:
+                loaded.update(range(cmd.index, cmd.index + cmd.count))
+            elif type(cmd) == SP1Triangle:
+                if not loaded.issuperset((cmd.v0, cmd.v1, cmd.v2)):
+                    return False
+            elif type(cmd) == SP2Triangles:
+                if not loaded.issuperset((cmd.v00, cmd.v01, cmd.v02, cmd.v10, cmd.v11, cmd.v12)):
+                    return False
+            elif type(cmd) in (SPLine3D, SPLineW3D, SPModifyVertex, SPDisplayList, SPBranchList):
+                return False
+        return True
+
     def build_tmem_dict(self, cmd_list: GfxList):
         im_buffer = None
         tmem_dict = dict()
@@ -195,19 +327,26 @@ class BleedGraphics:
                 continue
         return tmem_dict
 
-    def bleed_textures(self, cur_fmat: FMaterial, last_mat: FMaterial, bleed_state: int):
+    def bleed_textures(
+        self, cur_fmat: FMaterial, last_mat: FMaterial, bleed_state: int, resident_tmem: dict[int, TmemLoad] = None
+    ):
         if last_mat:
             # bleed cmds if matching tile has duplicate cmds
             # deep copy breaks on Image objects so I will only copy the levels needed
             commands_bled = copy.copy(cur_fmat.texture_DL)
             commands_bled.commands = copy.copy(cur_fmat.texture_DL.commands)  # copy the commands also
-            # eliminate set tex images, but only if there is an overlap of the same image at the same tmem location
-            last_im_loads = self.build_tmem_dict(last_mat.texture_DL)
+            # eliminate set tex images, but only if the same image is still resident at the same tmem location
+            if resident_tmem is None:
+                resident_tmem = update_tmem_residency(dict(), last_mat.texture_DL)
             new_im_loads = self.build_tmem_dict(commands_bled)
-            removable_images = []
-            for tmem, image in new_im_loads.items():
-                if tmem in last_im_loads and last_im_loads[tmem] == image:
-                    removable_images.append(image)
+            removable_images = CommandLookup(
+                image
+                for tmem, image in new_im_loads.items()
+                if tmem in resident_tmem and resident_tmem[tmem].image == image
+            )
+            reuse = self.tmem_reuse.setdefault(cur_fmat, [0, 0])
+            reuse[0] += len(new_im_loads)
+            reuse[1] += len(removable_images)
             # now go through list and cull out loads for the specific cmds
             # this will be the set tex image, and the loading cmds
             rm_load = False
@@ -224,46 +363,53 @@ class BleedGraphics:
                     rm_load = None
                     continue
             # now eval as normal conditionals
+            last_tex_cmds = CommandLookup(last_mat.texture_DL.commands)
             for j, cmd in enumerate(cur_fmat.texture_DL.commands):
                 if not cmd:
                     continue  # some cmds are None from previous step
                 if self.bleed_individual_cmd(commands_bled, cmd, bleed_state):
-                    if cmd in last_mat.texture_DL.commands:
+                    if cmd in last_tex_cmds:
                         commands_bled.commands[j] = None
             # remove Nones from list
-            while None in commands_bled.commands:
-                commands_bled.commands.remove(None)
+            commands_bled.commands = [cmd for cmd in commands_bled.commands if cmd is not None]
             bled_tex = commands_bled
         else:
             bled_tex = cur_fmat.texture_DL
         return bled_tex.commands
 
+    def print_tmem_report(self):
+        total_loads = sum(loads for loads, _ in self.tmem_reuse.values())
+        total_reused = sum(reused for _, reused in self.tmem_reuse.values())
+        if not total_reused:
+            return
+        print(f"TMEM reuse: skipped {total_reused} of {total_loads} texture loads")
+        for fmaterial, (loads, reused) in self.tmem_reuse.items():
+            if reused:
+                print(f"\t{fmaterial.material.name}: {reused} of {loads} loads reused resident TMEM")
+
     def bleed_mat(self, cur_fmat: FMaterial, last_mat: FMaterial, bleed_state: int):
         if last_mat:
             gfx = cur_fmat.mat_only_DL
             # deep copy breaks on Image objects so I will only copy the levels needed
             commands_bled = copy.copy(gfx)
             commands_bled.commands = copy.copy(gfx.commands)  # copy the commands also
-            last_cmd_list = last_mat.mat_only_DL.commands
+            last_cmd_list = CommandLookup(last_mat.mat_only_DL.commands)
             for j, cmd in enumerate(gfx.commands):
                 if self.bleed_individual_cmd(commands_bled, cmd, bleed_state, last_cmd_list):
                     commands_bled.commands[j] = None
             # remove Nones from list
-            while None in commands_bled.commands:
-                commands_bled.commands.remove(None)
+            commands_bled.commands = [cmd for cmd in commands_bled.commands if cmd is not None]
         else:
             commands_bled = self.bleed_cmd_list(cur_fmat.mat_only_DL, bleed_state)
         # some syncs may become redundant after bleeding
         self.optimize_syncs(commands_bled, bleed_state)
         # remove SPEndDisplayList
-        while SPEndDisplayList() in commands_bled.commands:
-            commands_bled.commands.remove(SPEndDisplayList())
+        commands_bled.commands = [cmd for cmd in commands_bled.commands if type(cmd) != SPEndDisplayList]
         return commands_bled.commands
 
     def bleed_tri_group(self, tri_list: GfxList, cur_fmat: fMaterial, bleed_state: int):
         # remove SPEndDisplayList from triGroup
-        while SPEndDisplayList() in tri_list.commands:
-            tri_list.commands.remove(SPEndDisplayList())
+        tri_list.commands[:] = [cmd for cmd in tri_list.commands if type(cmd) != SPEndDisplayList]
         if not cur_fmat or (cur_fmat.isTexLarge[0] or cur_fmat.isTexLarge[1]):
             tri_list = self.bleed_cmd_list(tri_list, bleed_state)
 
@@ -282,8 +428,7 @@ class BleedGraphics:
             if last_use == cmd or bleed_cmd_status != self.bleed_self_conflict:
                 commands_bled.commands[j] = None
         # remove Nones from list
-        while None in commands_bled.commands:
-            commands_bled.commands.remove(None)
+        commands_bled.commands = [cmd for cmd in commands_bled.commands if cmd is not None]
         return commands_bled
 
     # Put triGroup bleed gfx in the FMesh.draw object
@@ -329,8 +474,7 @@ class BleedGraphics:
                 cmd_list.commands[j] = None
                 non_jump_dl_cmds.append(cmd)
         # remove Nones from list
-        while None in cmd_list.commands:
-            cmd_list.commands.remove(None)
+        cmd_list.commands[:] = [cmd for cmd in cmd_list.commands if cmd is not None]
         return non_jump_dl_cmds, jump_dl_cmds
 
     def on_tri_group_bleed_end(self, triGroup: FTriGroup, last_mat: FMaterial, bleed_gfx_lists: BleedGfxLists):
@@ -360,8 +504,7 @@ class BleedGraphics:
         no_syncs_needed = {"DPSetPrimColor", "DPSetPrimDepth"}  # will not affect rdp
         syncs_needed = {"SPSetOtherMode"}  # will affect rdp
         if bleed_state == self.bleed_start:
-            while DPPipeSync() in cmd_list.commands:
-                cmd_list.commands.remove(DPPipeSync())
+            cmd_list.commands = [cmd for cmd in cmd_list.commands if type(cmd) != DPPipeSync]
         for cmd in cmd_list.commands:
             cmd_name = type(cmd).__name__
             if cmd == DPPipeSync():
@@ -370,8 +513,7 @@ class BleedGraphics:
                 return
             if cmd_name in syncs_needed:
                 return
-        while DPPipeSync() in cmd_list.commands:
-            cmd_list.commands.remove(DPPipeSync())
+        cmd_list.commands = [cmd for cmd in cmd_list.commands if type(cmd) != DPPipeSync]
 
     def create_reset_cmds(self, reset_cmd_dict: dict[GbiMacro], default_render_mode: list[str]):
         reset_cmds = []
@@ -518,6 +660,28 @@ class BleedGraphics:
         return False
 
 
+# O(1) membership tests against the commands of the previous material.
+# Macros with list fields (flag lists) can't be hashed, so those fall back to a scan over just those macros.
+class CommandLookup:
+    def __init__(self, commands=()):
+        self.hashed = set()
+        self.unhashable = []
+        for cmd in commands:
+            try:
+                self.hashed.add(cmd)
+            except TypeError:
+                self.unhashable.append(cmd)
+
+    def __contains__(self, cmd):
+        try:
+            return cmd in self.hashed
+        except TypeError:
+            return cmd in self.unhashable
+
+    def __len__(self):
+        return len(self.hashed) + len(self.unhashable)
+
+
 # small containers for data used in inline Gfx
 @dataclass
 class BleedGfxLists:
@@ -564,3 +728,74 @@ def find_material_from_jump_cmd(
         elif fmaterial.material == dl_jump.displayList:
             return bpy_material, fmaterial
     return None, None
+
+
+# TMEM is 512 64 bit words, the upper half holds palettes
+TMEM_WORDS = 512
+
+tmem_texel_bits = {
+    "G_IM_SIZ_4b": 4,
+    "G_IM_SIZ_8b": 8,
+    "G_IM_SIZ_16b": 16,
+    "G_IM_SIZ_32b": 32,
+}
+
+
+@dataclass
+class TmemLoad:
+    start: int  # in 64 bit words
+    end: int
+    image: DPSetTextureImage
+
+
+# returns a TmemLoad for every load cmd in the list
+def get_tmem_loads(cmd_list: GfxList):
+    im_buffer = None
+    tile_dict = {i: (0, 0, "G_IM_SIZ_16b") for i in range(8)}  # tile: (tmem, line, siz)
+    loads = []
+    for cmd in cmd_list.commands:
+        if type(cmd) == DPSetTextureImage:
+            im_buffer = cmd
+        elif type(cmd) == DPSetTile:
+            tile_dict[cmd.tile] = (cmd.tmem, cmd.line, cmd.siz.replace("_LOAD_BLOCK", ""))
+        elif type(cmd) in (DPLoadTLUTCmd, DPLoadTile, DPLoadBlock):
+            tmem, line, siz = tile_dict[cmd.tile]
+            bits = tmem_texel_bits.get(siz, 32)
+            if type(cmd) == DPLoadTLUTCmd:
+                # each palette entry is quadricated into a full word
+                size = cmd.count + 1
+            elif bits == 32:
+                # 32 bit textures are split across both halves of TMEM
+                tmem, size = 0, TMEM_WORDS
+            elif type(cmd) == DPLoadBlock:
+                # load blocks of 4 and 8 bit textures are done as 16 bit texels
+                size = ((cmd.lrs + 1) * 16 + 63) // 64
+            else:
+                size = line * (((cmd.lrt - cmd.ult) >> 2) + 1)
+            loads.append(TmemLoad(tmem, tmem + max(size, 1), im_buffer))
+    return loads
+
+
+# applies the loads of a texture list on top of what was resident, returns the new tmem: TmemLoad dict
+def update_tmem_residency(resident_tmem: dict[int, TmemLoad], cmd_list: GfxList):
+    resident_tmem = dict(resident_tmem)
+    for load in get_tmem_loads(cmd_list):
+        for tmem, resident in list(resident_tmem.items()):
+            if resident.start < load.end and load.start < resident.end:
+                del resident_tmem[tmem]
+        resident_tmem[load.start] = load
+    return resident_tmem
+
+
+# dict version of find_material_from_jump_cmd, maps material and revert gfx lists to (bpy material, FMaterial)
+def build_material_jump_lookup(
+    material_list: tuple[tuple[bpy.types.Material, str], tuple[FMaterial, tuple[int, int]]],
+):
+    lookup = dict()
+    for mat in material_list:
+        fmaterial = mat[1][0]
+        bpy_material = mat[0][0]
+        if fmaterial.revert:
+            lookup.setdefault(fmaterial.revert, (bpy_material, fmaterial))
+        lookup.setdefault(fmaterial.material, (bpy_material, fmaterial))
+    return lookup
@@ -1,9 +1,9 @@
 # Macros are all copied over from gbi.h
 from __future__ import annotations
 
-from typing import Sequence, Union, Tuple
+from typing import Callable, Optional, Sequence, Union, Tuple
 from dataclasses import dataclass, fields
-import bpy, os, enum, copy
+import bpy, os, enum, copy, binascii, operator
 from ..utility import *
 
 from typing import TYPE_CHECKING
@@ -1732,9 +1732,9 @@ class F3D:
         return int(((1 << self.G_TX_DXT_FRAC) + self.TXL2WORDS_4b(width) - 1) / self.TXL2WORDS_4b(width))
 
     def NUML(self, n):
-        if self.F3DEX_GBI_3:
-            return n * 0x10
         nVal = self.numLights[n]
+        if self.F3DEX_GBI_3:
+            return nVal * 0x10
         return ((nVal) * 24) if self.F3DEX_GBI_2 else (((nVal) + 1) * 32 + 0x80000000)
 
     def getLightMWO_a(self, n):
@@ -2175,27 +2175,28 @@ class GfxList:
         return data
 
     def to_c_static(self):
-        data = f"Gfx {self.name}[] = {{\n"
-        for command in self.commands:
-            data += f"\t{command.to_c(True)},\n"
-        data += "};\n\n"
-        return data
-
-    def to_c_dynamic(self):
-        data = f"Gfx* {self.name}(Gfx* glistp) {{\n"
-        for command in self.commands:
-            data += f"\t{command.to_c(False)};\n"
-        data += "\treturn glistp;\n}\n\n"
-        return data
-
-    def to_c(self, f3d):
+        lines = [f"Gfx {self.name}[] = {{"]
+        lines.extend([f"\t{command.to_c(True)}," for command in self.commands])
+        lines.append("};\n\n")
+        return "\n".join(lines)
+
+    def to_c_dynamic(self, homebrew: Optional[bool] = None):
+        # Resolved once for the whole list rather than for every pointer argument
+        if homebrew is None:
+            homebrew = isHomebrewGameMode()
+        lines = [f"Gfx* {self.name}(Gfx* glistp) {{"]
+        lines.extend([f"\t{command.to_c(False, homebrew)};" for command in self.commands])
+        lines.append("\treturn glistp;\n}\n\n")
+        return "\n".join(lines)
+
+    def to_c(self, f3d, homebrew: Optional[bool] = None):
         data = CData()
         if self.DLFormat == DLFormat.Static:
             data.header = f"extern Gfx {self.name}[];\n"
             data.source = self.to_c_static()
         elif self.DLFormat == DLFormat.Dynamic:
             data.header = f"Gfx* {self.name}(Gfx* glistp);\n"
-            data.source = self.to_c_dynamic()
+            data.source = self.to_c_dynamic(homebrew)
         else:
             raise PluginError("Invalid GfxList format: " + str(self.DLFormat))
         return data
@@ -3237,6 +3238,33 @@ class LookAt:
         )
 
 
+def bytesToCHexValues(data: bytes, bitsPerValue: int, valuesPerLine: int = 8) -> str:
+    """
+    Formats big endian data as a comma separated list of C hex literals of bitsPerValue bits each,
+    with valuesPerLine values per line. Trailing bytes that don't fill a whole value are zero padded on the right.
+    The hex digits of a big endian value are just the hex digits of its bytes in order, so the
+    conversion is done by binascii in one call instead of formatting each value separately.
+    """
+    view = memoryview(data).cast("B")
+    bytesPerValue = bitsPerValue // 8
+    numValues = len(view) // bytesPerValue
+    remainderCount = len(view) - numValues * bytesPerValue
+
+    code = ""
+    if numValues > 0:
+        values = binascii.hexlify(view[: numValues * bytesPerValue], " ", bytesPerValue).decode("ascii").split(" ")
+        lines = [", 0x".join(values[i : i + valuesPerLine]) for i in range(0, numValues, valuesPerLine)]
+        code = "0x" + ", \n\t0x".join(lines) + ", "
+        if numValues % valuesPerLine == 0:
+            code += "\n\t"
+
+    if remainderCount > 0:
+        remainder = bytes(view[numValues * bytesPerValue :]) + bytes(bytesPerValue - remainderCount)
+        code += "0x" + remainder.hex()
+
+    return code
+
+
 # A palette is just a RGBA16 texture with width = 1.
 class FImage:
     def __init__(self, name, fmt, bitSize, width, height, filename):
@@ -3246,11 +3274,31 @@ class FImage:
         self.width = width
         self.height = height
         self.startAddress = 0
-        self.data = bytearray(0)
+        self._data = bytearray(0)
+        self._dataSource = None
         self.filename = filename
         self.converted = False
         self.isLargeTexture = False
 
+    @property
+    def data(self) -> bytearray:
+        # Encoding is deferred until the bytes are actually needed,
+        # so exports that only reference the texture (e.g. separate PNGs) never pay for it.
+        if self._dataSource is not None:
+            dataSource, self._dataSource = self._dataSource, None
+            self._data = dataSource()
+        return self._data
+
+    @data.setter
+    def data(self, value: bytearray):
+        self._dataSource = None
+        self._data = value
+
+    def setDataSource(self, dataSource: Callable[[], bytearray]):
+        """Marks the image as converted, with dataSource producing its bytes on first access."""
+        self._dataSource = dataSource
+        self.converted = True
+
     def size(self):
         return len(self.data)
 
@@ -3281,32 +3329,7 @@ class FImage:
                 "Error: Trying to write texture data to C, but haven't actually converted the image file to bytes yet."
             )
 
-        bytesPerValue = int(bitsPerValue / 8)
-        numValues = int(len(self.data) / bytesPerValue)
-        remainderCount = len(self.data) - numValues * bytesPerValue
-        digits = 2 + 2 * bytesPerValue
-
-        code = "".join(
-            [
-                format(
-                    int.from_bytes(self.data[i * bytesPerValue : (i + 1) * bytesPerValue], "big"),
-                    "#0" + str(digits) + "x",
-                )
-                + ", "
-                + ("\n\t" if i % 8 == 7 else "")
-                for i in range(numValues)
-            ]
-        )
-
-        if remainderCount > 0:
-            start = numValues * bytesPerValue
-            end = (numValues + 1) * bytesPerValue
-            code += format(
-                int.from_bytes(self.data[start:end], "big") << (8 * (bytesPerValue - remainderCount)),
-                "#0" + str(digits) + "x",
-            )
-
-        return code
+        return bytesToCHexValues(self.data, bitsPerValue)
 
     def set_addr(self, startAddress):
         startAddress = get64bitAlignedAddr(startAddress)
@@ -3341,6 +3364,70 @@ def gsSPNoOp(f3d):
     return gsDma0p(f3d.G_SPNOOP, 0, 0)
 
 
+def isHomebrewGameMode() -> bool:
+    return bpy.context.scene.gameEditorMode == "Homebrew"
+
+
+class GbiMacroCFormatter:
+    """
+    Formats a GbiMacro subclass as C. Field names, macro names and per class flags are resolved once,
+    instead of calling dataclasses.fields and checking the flags for every command.
+    """
+
+    def __init__(self, macroClass: type):
+        fieldNames = tuple(field.name for field in fields(macroClass))
+        if len(fieldNames) == 1:
+            # attrgetter returns a bare value for a single name
+            getter = operator.attrgetter(fieldNames[0])
+            self.get_values = lambda macro: (getter(macro),)
+        elif fieldNames:
+            self.get_values = operator.attrgetter(*fieldNames)
+        else:
+            self.get_values = lambda macro: ()
+        self.static_prefix = f"gs{macroClass.__name__}("
+        self.dynamic_prefix = f"g{macroClass.__name__}(glistp++, "
+        self.segptrs = macroClass._segptrs
+        self.ptr_amp = macroClass._ptr_amp
+        self.hex = macroClass._hex
+
+    def format_arg(self, field, static, homebrew=None) -> str:
+        fieldType = type(field)
+        if fieldType is str:
+            return field
+        if fieldType is int:
+            if self.hex > 0:
+                temp = field if field >= 0 else (1 << (self.hex * 4)) + field
+                return f"{temp:#0{self.hex + 2}x}"  # + 2 for the 0x part
+            return str(field)
+        if hasattr(field, "name"):
+            if self.segptrs and not static:
+                if homebrew is None:
+                    homebrew = isHomebrewGameMode()
+                if homebrew:
+                    return f"segmented_to_virtual({field.name})"
+            if self.ptr_amp:
+                return f"&{field.name}"
+            else:
+                return field.name
+        if hasattr(field, "__iter__"):
+            return " | ".join(field) if len(field) else "0"
+        if self.hex > 0 and isinstance(field, int):
+            temp = field if field >= 0 else (1 << (self.hex * 4)) + field
+            return f"{temp:#0{self.hex + 2}x}"
+        return str(field)
+
+    def format_args(self, macro: "GbiMacro", static, homebrew=None) -> list[str]:
+        # Most arguments are already strings (enum names), so those skip the generic path
+        format_arg = self.format_arg
+        return [
+            value if type(value) is str else format_arg(value, static, homebrew) for value in self.get_values(macro)
+        ]
+
+    def to_c(self, macro: "GbiMacro", static=True, homebrew=None) -> str:
+        prefix = self.static_prefix if static else self.dynamic_prefix
+        return prefix + ", ".join(self.format_args(macro, static, homebrew)) + ")"
+
+
 # base class for gbi macros
 @dataclass(unsafe_hash=True)
 class GbiMacro:
@@ -3366,29 +3453,27 @@ class GbiMacro:
     def get_ptr_offsets(self, f3d):
         return [4]
 
-    def getargs(self, static):
-        return (self.getattr_virtual(getattr(self, field.name), static) for field in fields(self))
+    @classmethod
+    def get_c_formatter(cls) -> "GbiMacroCFormatter":
+        # Looked up in the class dict so subclasses don't reuse their parent's formatter
+        formatter = cls.__dict__.get("_c_formatter")
+        if formatter is None:
+            formatter = GbiMacroCFormatter(cls)
+            cls._c_formatter = formatter
+        return formatter
 
-    def getattr_virtual(self, field, static):
-        if hasattr(field, "name"):
-            if self._segptrs and not static and bpy.context.scene.gameEditorMode == "Homebrew":
-                return f"segmented_to_virtual({field.name})"
-            if self._ptr_amp:
-                return f"&{field.name}"
-            else:
-                return field.name
-        if hasattr(field, "__iter__") and type(field) is not str:
-            return " | ".join(field) if len(field) else "0"
-        if self._hex > 0 and isinstance(field, int):
-            temp = field if field >= 0 else (1 << (self._hex * 4)) + field
-            return f"{temp:#0{self._hex + 2}x}"  # + 2 for the 0x part
-        return str(field)
+    def getargs(self, static, homebrew=None):
+        return self.get_c_formatter().format_args(self, static, homebrew)
 
-    def to_c(self, static=True):
-        if static:
-            return f"g{'s'*static}{type(self).__name__}({', '.join( self.getargs(static) )})"
-        else:
-            return f"g{'s'*static}{type(self).__name__}(glistp++, {', '.join( self.getargs(static) )})"
+    def getattr_virtual(self, field, static, homebrew=None):
+        return self.get_c_formatter().format_arg(field, static, homebrew)
+
+    def to_c(self, static=True, homebrew=None):
+        """
+        homebrew is whether the scene's game mode is Homebrew, which only matters for dynamic DLs.
+        If None, it is looked up from the scene when needed.
+        """
+        return self.get_c_formatter().to_c(self, static, homebrew)
 
     def size(self, f3d):
         return GFX_SIZE
@@ -3439,9 +3524,9 @@ class SPVertex(GbiMacro):
         else:
             return gsDma1p(f3d.G_VTX, vertPtr, VTX_SIZE * self.count, (self.count - 1) << 4 | self.index)
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         header = "gsSPVertex(" if static else "gSPVertex(glistp++, "
-        if not static and bpy.context.scene.gameEditorMode == "Homebrew":
+        if not static and (isHomebrewGameMode() if homebrew is None else homebrew):
             header += "segmented_to_virtual(" + self.vertList.name + " + " + str(self.offset) + ")"
         else:
             header += self.vertList.name + " + " + str(self.offset)
@@ -3474,12 +3559,12 @@ class SPDisplayList(GbiMacro):
         dlPtr = int.from_bytes(encodeSegmentedAddr(self.displayList.startAddress, segments), "big")
         return gsDma1p(f3d.G_DL, dlPtr, 0, f3d.G_DL_PUSH)
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         if static:
             return "gsSPDisplayList(" + self.displayList.name + ")"
         elif self.displayList.DLFormat == DLFormat.Static:
             header = "gSPDisplayList(glistp++, "
-            if bpy.context.scene.gameEditorMode == "Homebrew":
+            if isHomebrewGameMode() if homebrew is None else homebrew:
                 return header + "segmented_to_virtual(" + self.displayList.name + "))"
             else:
                 return header + self.displayList.name + ")"
@@ -3561,7 +3646,7 @@ def _gsSP1Triangle_w1(v0, v1, v2):
 
 
 def _gsSP1Triangle_w1f(v0, v1, v2, flag, f3d):
-    if f3d.F3DLP_GBI or f3d.F3DEX_GBI:
+    if not f3d.F3D_OLD_GBI:
         if flag == 0:
             return _gsSP1Triangle_w1(v0, v1, v2)
         elif flag == 1:
@@ -3577,7 +3662,7 @@ def _gsSPLine3D_w1(v0, v1, wd):
 
 
 def _gsSPLine3D_w1f(v0, v1, wd, flag, f3d):
-    if f3d.F3DLP_GBI or f3d.F3DEX_GBI:
+    if not f3d.F3D_OLD_GBI:
         if flag == 0:
             return _gsSPLine3D_w1(v0, v1, wd)
         else:
@@ -3672,7 +3757,7 @@ class SP2Triangles(GbiMacro):
     flag1: int
 
     def to_binary(self, f3d, segments):
-        if f3d.F3DLP_GBI or f3d.F3DEX_GBI:
+        if not f3d.F3D_OLD_GBI:
             words = (
                 _SHIFTL(f3d.G_TRI2, 24, 8) | _gsSP1Triangle_w1f(self.v00, self.v01, self.v02, self.flag0, f3d)
             ), _gsSP1Triangle_w1f(self.v10, self.v11, self.v12, self.flag1, f3d)
@@ -3692,7 +3777,7 @@ class SPCullDisplayList(GbiMacro):
     vend: int
 
     def to_binary(self, f3d, segments):
-        if f3d.F3DLP_GBI or f3d.F3DEX_GBI:
+        if not f3d.F3D_OLD_GBI:
             words = _SHIFTL(f3d.G_CULLDL, 24, 8) | _SHIFTL((self.vstart) * 2, 0, 16), _SHIFTL((self.vend) * 2, 0, 16)
         else:
             words = _SHIFTL(f3d.G_CULLDL, 24, 8) | ((0x0F & (self.vstart)) * 40), ((0x0F & ((self.vend) + 1)) * 40)
@@ -3707,7 +3792,7 @@ class SPSegment(GbiMacro):
     def to_binary(self, f3d, segments):
         return gsMoveWd(f3d.G_MW_SEGMENT, (self.segment) * 4, self.base, f3d)
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         header = "gsSPSegment(" if static else "gSPSegment(glistp++, "
         return header + str(self.segment) + ", " + "0x" + format(self.base, "X") + ")"
 
@@ -3917,7 +4002,7 @@ class SPModifyVertex(GbiMacro):
     val: int
 
     def to_binary(self, f3d, segments):
-        if f3d.F3DLP_GBI or f3d.F3DEX_GBI:
+        if not f3d.F3D_OLD_GBI:
             words = (
                 _SHIFTL(f3d.G_MODIFYVTX, 24, 8) | _SHIFTL((self.where), 16, 8) | _SHIFTL((self.vtx) * 2, 0, 16),
                 self.val,
@@ -3938,6 +4023,8 @@ class SPBranchLessZraw(GbiMacro):
     zval: int
 
     def to_binary(self, f3d, segments):
+        if f3d.F3D_OLD_GBI:
+            raise PluginError("SPBranchLessZraw not available in Fast3D.")
         dlPtr = int.from_bytes(encodeSegmentedAddr(self.dl.startAddress, segments), "big")
 
         words0 = _SHIFTL(f3d.G_RDPHALF_1, 24, 8), dlPtr
@@ -4017,11 +4104,11 @@ class SPLightColor(GbiMacro):
         return self.col[0] * 0x1000000 + self.col[1] * 0x10000 + self.col[2] * 0x100 + 0xFF
 
     def to_binary(self, f3d, segments):
-        return gsMoveWd(f3d.G_MW_LIGHTCOL, f3d.getLightMWO_a(self.n), self.color_to_int(), f3d) + gsMoveWd(
-            f3d.G_MW_LIGHTCOL, f3d.getLightMWO_b(self.n), self.col, f3d
+        return gsMoveWd(f3d.G_MW_LIGHTCOL, f3d.getLightMWO_a("G_MWO_a" + self.n), self.color_to_int(), f3d) + gsMoveWd(
+            f3d.G_MW_LIGHTCOL, f3d.getLightMWO_b("G_MWO_b" + self.n), self.color_to_int(), f3d
         )
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         header = "gsSPLightColor(" if static else "gSPLightColor(glistp++, "
         return header + f"{self.n}, 0x" + format(self.color_to_int(), "08X") + ")"
 
@@ -4047,9 +4134,8 @@ class SPSetLights(GbiMacro):
         n = len(self.lights.l)
         data = SPNumLights(f"NUMLIGHTS_{n}").to_binary(f3d, segments)
         if f3d.F3DEX_GBI_3:
-            data += gsDma2p(
-                f3d.G_MOVEMEM, self.lights.startAddress, len(self.lights.l) * 0x10 + 8, f3d.G_MV_LIGHT, 0x10
-            )
+            lightsPtr = int.from_bytes(encodeSegmentedAddr(self.lights.startAddress, segments), "big")
+            data += gsDma2p(f3d.G_MOVEMEM, lightsPtr, len(self.lights.l) * 0x10 + 8, f3d.G_MV_LIGHT, 0x10)
         elif len(self.lights.l) == 0:
             # The light does not exist in python, but is added in
             # when converted to binary, making this address valid.
@@ -4061,10 +4147,10 @@ class SPSetLights(GbiMacro):
             data += SPLight(self.lights.getAmbientPointer(), "LIGHT_" + str(n + 1)).to_binary(f3d, segments)
         return data
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         n = len(self.lights.l)
         header = f"gsSPSetLights{n}(" if static else f"gSPSetLights{n}(glistp++, "
-        if not static and bpy.context.scene.gameEditorMode == "Homebrew":
+        if not static and (isHomebrewGameMode() if homebrew is None else homebrew):
             header += f"(*(Lights{n}*) segmented_to_virtual(&{self.lights.name}))"
         else:
             header += self.lights.name
@@ -4170,7 +4256,7 @@ class SPFogPosition(GbiMacro):
             f3d,
         )
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         header = "gsSPFogPosition(" if static else "gSPFogPosition(glistp++, "
         return header + str(self.minVal) + ", " + str(self.maxVal) + ")"
 
@@ -4211,7 +4297,7 @@ class SPPerspNormalize(GbiMacro):
 
     def to_binary(self, f3d, segments):
         if f3d.F3DEX_GBI_3:
-            return gsMoveHalfwd(f3d.G_MW_FX, G_MWO_PERSPNORM, (self.s), f3d)
+            return gsMoveHalfwd(f3d.G_MW_FX, f3d.G_MWO_PERSPNORM, (self.s), f3d)
         else:
             return gsMoveWd(f3d.G_MW_PERSPNORM, 0, (self.s), f3d)
 
@@ -4514,9 +4600,10 @@ class DPSetDepthSource(GbiMacro):
 
 
 def renderFlagListToWord(flagList, f3d):
+    # presets for both cycles share their flags, so they are or'ed like gsDPSetRenderMode does
     word = 0
     for name in flagList:
-        word += getattr(f3d, name)
+        word |= getattr(f3d, name)
 
     return word
 
@@ -4566,7 +4653,7 @@ class DPSetRenderMode(GbiMacro):
         else:
             return gsSPSetOtherMode(f3d.G_SETOTHERMODE_L, f3d.G_MDSFT_RENDERMODE, 29, flagWord, f3d)
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         data = "gsDPSetRenderMode(" if static else "gDPSetRenderMode(glistp++, "
 
         if not self.use_preset:
@@ -4688,11 +4775,11 @@ class DPSetCombineMode(GbiMacro):
         )
         return words[0].to_bytes(4, "big") + words[1].to_bytes(4, "big")
 
-    def to_c(self, static=True):
+    def to_c(self, static=True, homebrew=None):
         if static:
-            return f"gsDPSetCombineLERP({', '.join( self.getargs(static) )})"
+            return f"gsDPSetCombineLERP({', '.join( self.getargs(static, homebrew) )})"
         else:
-            return f"gDPSetCombineLERP(glistp++, {', '.join( self.getargs(static) )})"
+            return f"gDPSetCombineLERP(glistp++, {', '.join( self.getargs(static, homebrew) )})"
 
 
 def gsDPSetColor(c, d):
@@ -5385,7 +5472,18 @@ class DPLoadTLUT_pal16(GbiMacro):
             DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 1, self.dram).to_binary(f3d, segments)
             + DPTileSync().to_binary(f3d, segments)
             + DPSetTile(
-                "0", "0", 0, (256 + (((self.pal) & 0xF) * 16)), f3d.G_TX_LOADTILE, 0, 0, 0, 0, 0, 0, 0
+                "0",
+                "0",
+                0,
+                (256 + (((self.pal) & 0xF) * 16)),
+                f3d.G_TX_LOADTILE,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
             ).to_binary(f3d, segments)
             + DPLoadSync().to_binary(f3d, segments)
             + DPLoadTLUTCmd(f3d.G_TX_LOADTILE, 15).to_binary(f3d, segments)
@@ -5405,7 +5503,20 @@ class DPLoadTLUT_pal256(GbiMacro):
         return (
             DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 1, self.dram).to_binary(f3d, segments)
             + DPTileSync().to_binary(f3d, segments)
-            + DPSetTile("0", "0", 0, 256, f3d.G_TX_LOADTILE, 0, 0, 0, 0, 0, 0, 0).to_binary(f3d, segments)
+            + DPSetTile(
+                "0",
+                "0",
+                0,
+                256,
+                f3d.G_TX_LOADTILE,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
+            ).to_binary(f3d, segments)
             + DPLoadSync().to_binary(f3d, segments)
             + DPLoadTLUTCmd(f3d.G_TX_LOADTILE, 255).to_binary(f3d, segments)
             + DPPipeSync().to_binary(f3d, segments)
@@ -5426,7 +5537,20 @@ class DPLoadTLUT(GbiMacro):
         return (
             DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 1, self.dram).to_binary(f3d, segments)
             + DPTileSync().to_binary(f3d, segments)
-            + DPSetTile("0", "0", 0, self.tmemaddr, f3d.G_TX_LOADTILE, 0, 0, 0, 0, 0, 0, 0).to_binary(f3d, segments)
+            + DPSetTile(
+                "0",
+                "0",
+                0,
+                self.tmemaddr,
+                f3d.G_TX_LOADTILE,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
+                ("G_TX_NOMIRROR", "G_TX_WRAP"),
+                0,
+                0,
+            ).to_binary(f3d, segments)
             + DPLoadSync().to_binary(f3d, segments)
             + DPLoadTLUTCmd(f3d.G_TX_LOADTILE, self.count - 1).to_binary(f3d, segments)
             + DPPipeSync().to_binary(f3d, segments)
@@ -5521,15 +5645,10 @@ class SPTextureRectangle(GbiMacro):
             gsImmp1(f3d.G_RDPHALF_2, (_SHIFTL(self.dsdx, 16, 16) | _SHIFTL(self.dtdy, 0, 16))),
         )
 
-        return (
-            words[0].to_bytes(4, "big")
-            + words[1].to_bytes(4, "big")
-            + words[2].to_bytes(4, "big")
-            + words[3].to_bytes(4, "big")
-        )
+        return words[0].to_bytes(4, "big") + words[1].to_bytes(4, "big") + words[2] + words[3]
 
     def size(self, f3d):
-        return GFX_SIZE * 2
+        return GFX_SIZE * 3
 
 
 @dataclass(unsafe_hash=True)
@@ -1,4 +1,6 @@
 import logging
+import array
+import ast
 import bpy, math, os
 from bpy.types import (
     Attribute,
@@ -35,7 +37,13 @@ from .f3d_gbi import get_F3D_GBI, GBL_c1, GBL_c2, enumTexScroll, isUcodeF3DEX1
 from .f3d_material_presets import *
 from ..utility import *
 from ..render_settings import Fast64RenderSettings_Properties, update_scene_props_from_render_settings
-from .f3d_material_helpers import F3DMaterial_UpdateLock, node_tree_copy
+from .f3d_material_helpers import (
+    F3DMaterial_UpdateLock,
+    node_tree_copy,
+    link_sockets,
+    set_node_group,
+    set_socket_value,
+)
 from bpy.app.handlers import persistent
 from typing import Generator, Optional, Tuple, Any, Dict, Union
 
@@ -1406,7 +1414,7 @@ def update_node_values(self, context, update_preset):
         if not material:
             return
 
-        update_node_values_of_material(material, context)
+        queue_node_update(material, context, NODE_UPDATE_ALL)
         if update_preset:
             material.f3d_mat.presetName = "Custom"
 
@@ -1425,6 +1433,157 @@ def update_node_values_without_preset(self, context):
     update_node_values(self, context, update_preset=False)
 
 
+# Kinds of deferred node updates, NODE_UPDATE_ALL covers every other kind
+NODE_UPDATE_ALL = "ALL"
+NODE_UPDATE_TEX0 = "TEX0"
+NODE_UPDATE_TEX1 = "TEX1"
+NODE_UPDATE_COMBINER1 = "COMBINER1"
+NODE_UPDATE_COMBINER2 = "COMBINER2"
+
+
+class F3DNodeUpdateQueue:
+    """
+    Coalesces node tree updates from property callbacks. Applying a preset or converting materials sets many
+    properties in a row, so instead of relinking the node tree for each one, callbacks mark the material dirty
+    and the accumulated updates are applied once per material on the next event loop tick.
+    """
+
+    def __init__(self):
+        # material pointer : update kinds, pointers stay the same when a material is renamed
+        self.dirty: dict[int, set[str]] = {}
+
+    def mark(self, material: Material, kinds: set[str]):
+        self.dirty.setdefault(material.as_pointer(), set()).update(kinds)
+        if not bpy.app.timers.is_registered(flush_f3d_node_updates):
+            bpy.app.timers.register(flush_f3d_node_updates, first_interval=0.0)
+
+    def flush(self, context: Context):
+        dirty, self.dirty = self.dirty, {}
+        if len(dirty) == 0:
+            return
+        # Only pointers of materials that still exist are used, removed materials are skipped
+        materials = {material.as_pointer(): material for material in bpy.data.materials}
+        for pointer, kinds in dirty.items():
+            material = materials.get(pointer)
+            if material is None or material.node_tree is None:
+                continue
+            with F3DMaterial_UpdateLock(material) as material:
+                if material:
+                    apply_node_updates(material, context, kinds)
+
+    def clear(self):
+        self.dirty.clear()
+
+
+f3d_node_update_queue = F3DNodeUpdateQueue()
+
+
+def flush_f3d_node_updates():
+    """Timer callback, also safe to call directly to apply pending updates immediately."""
+    context = bpy.context
+    windows = context.window_manager.windows if context.window_manager else []
+    if context.window is None and len(windows) > 0:
+        # Timers run without a window, which operators invoked by the updates (color management popup) need
+        with context.temp_override(window=windows[0]):
+            f3d_node_update_queue.flush(bpy.context)
+    else:
+        f3d_node_update_queue.flush(context)
+    return None  # don't repeat
+
+
+def update_f3d_mat_props(material: Material, prop_path: str | None = None):
+    """
+    Properties that node updates also write to. These are exported, so unlike the nodes they can't wait
+    for the deferred update and are set right away.
+    """
+    f3dMat: "F3DMaterialProperty" = material.f3d_mat
+    update_ambient_from_light(f3dMat)
+
+    useDict = all_combiner_uses(f3dMat)
+    tex0_used = useDict["Texture 0"] and f3dMat.tex0.tex is not None
+    tex1_used = useDict["Texture 1"] and f3dMat.tex1.tex is not None
+    if not tex0_used and not tex1_used:
+        return
+
+    if f3dMat.scale_autoprop:
+        if f3dMat.rdp_settings.g_lighting and f3dMat.rdp_settings.g_tex_gen:
+            tex_size = get_tex_basis_size(f3dMat)
+            if tex_size is not None:
+                f3dMat.tex_scale = get_tex_gen_size(tex_size)
+        else:
+            f3dMat.tex_scale = (1, 1)
+
+    for tex_prop, tex_used, tex_key in ((f3dMat.tex0, tex0_used, "tex0"), (f3dMat.tex1, tex1_used, "tex1")):
+        if tex_used and tex_prop.autoprop and (not prop_path or tex_key in prop_path):
+            tex_size = tex_prop.tex.size
+            if tex_size[0] > 0 and tex_size[1] > 0:
+                setAutoProp(tex_prop.S, tex_size[0])
+                setAutoProp(tex_prop.T, tex_size[1])
+
+
+def apply_node_updates(material: Material, context: Context, kinds: set[str]):
+    if NODE_UPDATE_ALL in kinds:
+        update_node_values_of_material(material, context)
+        return
+
+    f3d_mat: "F3DMaterialProperty" = material.f3d_mat
+    if NODE_UPDATE_COMBINER1 in kinds or NODE_UPDATE_COMBINER2 in kinds:
+        combiner = None
+        if NODE_UPDATE_COMBINER2 not in kinds:
+            combiner = 1
+        elif NODE_UPDATE_COMBINER1 not in kinds:
+            combiner = 2
+        update_combiner_connections(material, context, combiner=combiner)
+
+        toggle_texture_node_muting(material, 0, f3d_mat.tex0.tex and combiner_uses_tex0(f3d_mat))
+        toggle_texture_node_muting(material, 1, f3d_mat.tex1.tex and combiner_uses_tex1(f3d_mat))
+
+    if NODE_UPDATE_TEX0 in kinds or NODE_UPDATE_TEX1 in kinds:
+        prop_path = None
+        if NODE_UPDATE_TEX1 not in kinds:
+            prop_path = "tex0"
+        elif NODE_UPDATE_TEX0 not in kinds:
+            prop_path = "tex1"
+        update_tex_values_manual(material, context, prop_path=prop_path)
+
+
+def queue_node_update(material: Material, context: Context, *kinds: str, prop_path: str | None = None):
+    """Call with the material locked, like the rest of the property callbacks."""
+    if material.node_tree is None:
+        return
+    # Combiner only updates leave the tex autoprops and tex_scale alone
+    if not {NODE_UPDATE_ALL, NODE_UPDATE_TEX0, NODE_UPDATE_TEX1}.isdisjoint(kinds):
+        update_f3d_mat_props(material, prop_path)
+    if bpy.app.background:
+        # There is no event loop to run timers in background mode
+        apply_node_updates(material, context, set(kinds))
+    else:
+        f3d_node_update_queue.mark(material, set(kinds))
+
+
+def get_tex_node_update_kinds(prop_path: str | None) -> tuple[str, ...]:
+    if prop_path is None or ("tex0" in prop_path) == ("tex1" in prop_path):
+        return (NODE_UPDATE_TEX0, NODE_UPDATE_TEX1)
+    return (NODE_UPDATE_TEX0,) if "tex0" in prop_path else (NODE_UPDATE_TEX1,)
+
+
+@persistent
+def f3d_node_update_load_handler(_scene):
+    f3d_node_update_queue.clear()
+
+
+@persistent
+def f3d_node_update_undo_handler(_scene):
+    # Undo steps are stored before the deferred update runs, so the restored node trees
+    # can be a step behind. Refresh the materials that are most likely being edited.
+    obj = bpy.context.object
+    if obj is None:
+        return
+    for slot in obj.material_slots:
+        if slot.material is not None and slot.material.is_f3d and slot.material.node_tree is not None:
+            f3d_node_update_queue.mark(slot.material, {NODE_UPDATE_ALL})
+
+
 def update_light_properties(self, context):
     with F3DMaterial_UpdateLock(get_material_from_context(context)) as material:
         if not material:
@@ -1558,7 +1717,7 @@ def update_node_combiner(material, combinerInputs, cycleIndex):
             if node_name is not None:
                 input_node = nodes[node_name]
                 input_value = input_node.outputs[output_key]
-                material.node_tree.links.new(cycle_node.inputs[i], input_value)
+                link_sockets(material.node_tree, input_value, cycle_node.inputs[i])
         else:
             node_name, output_key = alpha_combiner_inputs[combiner_input]
             if cycleIndex == 2:
@@ -1568,7 +1727,7 @@ def update_node_combiner(material, combinerInputs, cycleIndex):
             if node_name is not None:
                 input_node = nodes[node_name]
                 input_value = input_node.outputs[output_key]
-                material.node_tree.links.new(cycle_node.inputs[i], input_value)
+                link_sockets(material.node_tree, input_value, cycle_node.inputs[i])
 
 
 def update_fog_nodes(material: Material, context: Context):
@@ -1580,13 +1739,16 @@ def update_fog_nodes(material: Material, context: Context):
     # if NOT setting rendermode, it is more likely that the user is setting
     # rendermodes in code, so to be safe we'll enable fog. Plus we are checking
     # that fog is enabled in the geometry mode, so if so that's probably the intent.
-    fogBlender.node_tree = bpy.data.node_groups[
-        (
-            "FogBlender_On"
-            if shade_alpha_is_fog and is_blender_doing_fog(material.f3d_mat.rdp_settings, True)
-            else "FogBlender_Off"
-        )
-    ]
+    set_node_group(
+        fogBlender,
+        bpy.data.node_groups[
+            (
+                "FogBlender_On"
+                if shade_alpha_is_fog and is_blender_doing_fog(material.f3d_mat.rdp_settings, True)
+                else "FogBlender_Off"
+            )
+        ],
+    )
 
     if shade_alpha_is_fog:
         inherit_fog = f3dMat.use_global_fog or not f3dMat.set_fog
@@ -1602,9 +1764,9 @@ def update_fog_nodes(material: Material, context: Context):
             remove_first_link_if_exists(material, nodes["CalcFog"].inputs["FogNear"].links)
             remove_first_link_if_exists(material, nodes["CalcFog"].inputs["FogFar"].links)
 
-        fogBlender.inputs["Fog Color"].default_value = s_rgb_alpha_1_tuple(f3dMat.fog_color)
-        nodes["CalcFog"].inputs["FogNear"].default_value = f3dMat.fog_position[0]
-        nodes["CalcFog"].inputs["FogFar"].default_value = f3dMat.fog_position[1]
+        set_socket_value(fogBlender.inputs["Fog Color"], s_rgb_alpha_1_tuple(f3dMat.fog_color))
+        set_socket_value(nodes["CalcFog"].inputs["FogNear"], f3dMat.fog_position[0])
+        set_socket_value(nodes["CalcFog"].inputs["FogFar"], f3dMat.fog_position[1])
 
 
 def update_noise_nodes(material: Material):
@@ -1659,27 +1821,29 @@ def set_output_node_groups(material: Material):
 
     output_group_name = f"OUTPUT_{cycle}CYCLE_{output_method}"
     output_group = bpy.data.node_groups[output_group_name]
-    output_node.node_tree = output_group
+    set_node_group(output_node, output_group)
 
+    output_links = {
+        "Cycle_C_1": nodes["Cycle_1"].outputs["Color"],
+        "Cycle_A_1": nodes["Cycle_1"].outputs["Alpha"],
+        "Cycle_C_2": nodes["FogBlender"].outputs["Color"],
+        "Cycle_A_2": nodes["Cycle_2"].outputs["Alpha"],
+    }
     for inp in output_node.inputs:
-        remove_first_link_if_exists(material, inp.links)
-    output_node.inputs["Cycle_C_1"].default_value = (0.0, 0.0, 0.0, 1.0)
-    output_node.inputs["Cycle_A_1"].default_value = 0.5
-    output_node.inputs["Cycle_C_2"].default_value = (0.0, 0.0, 0.0, 1.0)
-    output_node.inputs["Cycle_A_2"].default_value = 0.5
+        if inp.name not in output_links:
+            remove_first_link_if_exists(material, inp.links)
+    set_socket_value(output_node.inputs["Cycle_C_1"], (0.0, 0.0, 0.0, 1.0))
+    set_socket_value(output_node.inputs["Cycle_A_1"], 0.5)
+    set_socket_value(output_node.inputs["Cycle_C_2"], (0.0, 0.0, 0.0, 1.0))
+    set_socket_value(output_node.inputs["Cycle_A_2"], 0.5)
     if output_method == "CLIP":
-        output_node.inputs["Alpha Threshold"].default_value = 0.125
-    material.node_tree.links.new(nodes["Cycle_1"].outputs["Color"], output_node.inputs["Cycle_C_1"])
-    material.node_tree.links.new(nodes["Cycle_1"].outputs["Alpha"], output_node.inputs["Cycle_A_1"])
-    material.node_tree.links.new(nodes["FogBlender"].outputs["Color"], output_node.inputs["Cycle_C_2"])
-    material.node_tree.links.new(nodes["Cycle_2"].outputs["Alpha"], output_node.inputs["Cycle_A_2"])
-    material.node_tree.links.new(output_node.outputs[0], nodes["Material Output F3D"].inputs[0])
+        set_socket_value(output_node.inputs["Alpha Threshold"], 0.125)
+    for input_name, from_socket in output_links.items():
+        link_sockets(material.node_tree, from_socket, output_node.inputs[input_name])
+    link_sockets(material.node_tree, output_node.outputs[0], nodes["Material Output F3D"].inputs[0])
 
 
-def update_light_colors(material, context):
-    f3dMat: "F3DMaterialProperty" = material.f3d_mat
-    nodes = material.node_tree.nodes
-
+def update_ambient_from_light(f3dMat: "F3DMaterialProperty"):
     if f3dMat.use_default_lighting and f3dMat.set_ambient_from_light:
         amb = Color(f3dMat.default_light_color[:3])
         # dividing by 4.672 approximates to half of the light color's value after gamma correction is performed on both ambient and light colors
@@ -1690,6 +1854,13 @@ def update_light_colors(material, context):
 
         f3dMat.ambient_light_color = new_amb
 
+
+def update_light_colors(material, context):
+    f3dMat: "F3DMaterialProperty" = material.f3d_mat
+    nodes = material.node_tree.nodes
+
+    update_ambient_from_light(f3dMat)
+
     if f3dMat.set_lights:
         remove_first_link_if_exists(material, nodes["Shade Color"].inputs["AmbientColor"].links)
         remove_first_link_if_exists(material, nodes["Shade Color"].inputs["Light0Color"].links)
@@ -1702,13 +1873,13 @@ def update_light_colors(material, context):
             light0 = f3dMat.f3d_light1.color if f3dMat.f3d_light1 is not None else [1.0, 1.0, 1.0, 1.0]
             light1 = f3dMat.f3d_light2.color if f3dMat.f3d_light2 is not None else light1
 
-        nodes["Shade Color"].inputs["AmbientColor"].default_value = s_rgb_alpha_1_tuple(f3dMat.ambient_light_color)
-        nodes["Shade Color"].inputs["Light0Color"].default_value = s_rgb_alpha_1_tuple(light0)
-        nodes["Shade Color"].inputs["Light1Color"].default_value = s_rgb_alpha_1_tuple(light1)
+        set_socket_value(nodes["Shade Color"].inputs["AmbientColor"], s_rgb_alpha_1_tuple(f3dMat.ambient_light_color))
+        set_socket_value(nodes["Shade Color"].inputs["Light0Color"], s_rgb_alpha_1_tuple(light0))
+        set_socket_value(nodes["Shade Color"].inputs["Light1Color"], s_rgb_alpha_1_tuple(light1))
     else:
-        nodes["Shade Color"].inputs["AmbientColor"].default_value = (0.5, 0.5, 0.5, 1.0)
-        nodes["Shade Color"].inputs["Light0Color"].default_value = (1.0, 1.0, 1.0, 1.0)
-        nodes["Shade Color"].inputs["Light1Color"].default_value = (0.0, 0.0, 0.0, 1.0)
+        set_socket_value(nodes["Shade Color"].inputs["AmbientColor"], (0.5, 0.5, 0.5, 1.0))
+        set_socket_value(nodes["Shade Color"].inputs["Light0Color"], (1.0, 1.0, 1.0, 1.0))
+        set_socket_value(nodes["Shade Color"].inputs["Light1Color"], (0.0, 0.0, 0.0, 1.0))
         link_if_none_exist(material, nodes["AmbientColorOut"].outputs[0], nodes["Shade Color"].inputs["AmbientColor"])
         link_if_none_exist(material, nodes["Light0ColorOut"].outputs[0], nodes["Shade Color"].inputs["Light0Color"])
         link_if_none_exist(material, nodes["Light1ColorOut"].outputs[0], nodes["Shade Color"].inputs["Light1Color"])
@@ -1717,8 +1888,8 @@ def update_light_colors(material, context):
 def update_color_node(combiner_inputs, color: Color, prefix: str):
     """Function for updating either Prim or Env colors"""
     # TODO: feature to toggle gamma correction
-    combiner_inputs[f"{prefix} Color"].default_value = s_rgb_alpha_1_tuple(color)
-    combiner_inputs[f"{prefix} Alpha"].default_value = color[3]
+    set_socket_value(combiner_inputs[f"{prefix} Color"], s_rgb_alpha_1_tuple(color))
+    set_socket_value(combiner_inputs[f"{prefix} Alpha"], color[3])
 
 
 # prim_color | Prim
@@ -1753,11 +1924,11 @@ def update_node_values_of_material(material: Material, context):
 
     if f3dMat.rdp_settings.g_lighting and f3dMat.rdp_settings.g_tex_gen:
         if f3dMat.rdp_settings.g_tex_gen_linear:
-            nodes["UV"].node_tree = bpy.data.node_groups["UV_EnvMap_Linear"]
+            set_node_group(nodes["UV"], bpy.data.node_groups["UV_EnvMap_Linear"])
         else:
-            nodes["UV"].node_tree = bpy.data.node_groups["UV_EnvMap"]
+            set_node_group(nodes["UV"], bpy.data.node_groups["UV_EnvMap"])
     else:
-        nodes["UV"].node_tree = bpy.data.node_groups["UV"]
+        set_node_group(nodes["UV"], bpy.data.node_groups["UV"])
 
     shdcol_inputs = nodes["Shade Color"].inputs
     for propName in [
@@ -1770,13 +1941,13 @@ def update_node_values_of_material(material: Material, context):
         "g_fog",
         "g_lighting",
     ]:
-        shdcol_inputs[propName.upper()].default_value = getattr(f3dMat.rdp_settings, propName)
+        set_socket_value(shdcol_inputs[propName.upper()], getattr(f3dMat.rdp_settings, propName))
 
-    shdcol_inputs["AO Ambient"].default_value = f3dMat.ao_ambient
-    shdcol_inputs["AO Directional"].default_value = f3dMat.ao_directional
-    shdcol_inputs["AO Point"].default_value = f3dMat.ao_point
-    shdcol_inputs["Fresnel Lo"].default_value = f3dMat.fresnel_lo
-    shdcol_inputs["Fresnel Hi"].default_value = f3dMat.fresnel_hi
+    set_socket_value(shdcol_inputs["AO Ambient"], f3dMat.ao_ambient)
+    set_socket_value(shdcol_inputs["AO Directional"], f3dMat.ao_directional)
+    set_socket_value(shdcol_inputs["AO Point"], f3dMat.ao_point)
+    set_socket_value(shdcol_inputs["Fresnel Lo"], f3dMat.fresnel_lo)
+    set_socket_value(shdcol_inputs["Fresnel Hi"], f3dMat.fresnel_hi)
 
     update_light_colors(material, context)
 
@@ -1785,19 +1956,24 @@ def update_node_values_of_material(material: Material, context):
     update_color_node(combiner_inputs, f3dMat.prim_color, "Prim")
     update_color_node(combiner_inputs, f3dMat.env_color, "Env")
 
-    combiner_inputs["Chroma Key Center"].default_value = (
-        f3dMat.key_center[0],
-        f3dMat.key_center[1],
-        f3dMat.key_center[2],
-        f3dMat.key_center[3],
+    set_socket_value(
+        combiner_inputs["Chroma Key Center"],
+        (
+            f3dMat.key_center[0],
+            f3dMat.key_center[1],
+            f3dMat.key_center[2],
+            f3dMat.key_center[3],
+        ),
     )
-    combiner_inputs["Chroma Key Scale"].default_value = [value for value in f3dMat.key_scale] + [1]
-    combiner_inputs["Prim LOD Fraction"].default_value = f3dMat.prim_lod_frac
-    combiner_inputs["YUVConvert K4"].default_value = f3dMat.k4
-    combiner_inputs["YUVConvert K5"].default_value = f3dMat.k5
+    set_socket_value(combiner_inputs["Chroma Key Scale"], [value for value in f3dMat.key_scale] + [1])
+    set_socket_value(combiner_inputs["Prim LOD Fraction"], f3dMat.prim_lod_frac)
+    set_socket_value(combiner_inputs["YUVConvert K4"], f3dMat.k4)
+    set_socket_value(combiner_inputs["YUVConvert K5"], f3dMat.k5)
 
-    material.show_transparent_back = f3dMat.rdp_settings.g_cull_front
-    material.use_backface_culling = f3dMat.rdp_settings.g_cull_back
+    if material.show_transparent_back != f3dMat.rdp_settings.g_cull_front:
+        material.show_transparent_back = f3dMat.rdp_settings.g_cull_front
+    if material.use_backface_culling != f3dMat.rdp_settings.g_cull_back:
+        material.use_backface_culling = f3dMat.rdp_settings.g_cull_back
 
     update_tex_values_manual(material, context)
     update_blend_method(material, context)
@@ -1832,8 +2008,8 @@ def set_texture_size(self, tex_size, tex_index):
     uv_basis: ShaderNodeGroup = nodes["UV Basis"]
     inputs = uv_basis.inputs
 
-    inputs[f"{tex_index} S TexSize"].default_value = tex_size[0]
-    inputs[f"{tex_index} T TexSize"].default_value = tex_size[1]
+    set_socket_value(inputs[f"{tex_index} S TexSize"], tex_size[0])
+    set_socket_value(inputs[f"{tex_index} T TexSize"], tex_size[1])
 
 
 def trunc_10_2(val: float):
@@ -1854,28 +2030,28 @@ def update_tex_values_field(self: Material, texProperty: "TextureProperty", tex_
     str_index = str(tex_index)
 
     # S/T Low
-    inputs[str_index + " S Low"].default_value = trunc_10_2(texProperty.S.low)
-    inputs[str_index + " T Low"].default_value = trunc_10_2(texProperty.T.low)
+    set_socket_value(inputs[str_index + " S Low"], trunc_10_2(texProperty.S.low))
+    set_socket_value(inputs[str_index + " T Low"], trunc_10_2(texProperty.T.low))
 
     # S/T High
-    inputs[str_index + " S High"].default_value = trunc_10_2(texProperty.S.high)
-    inputs[str_index + " T High"].default_value = trunc_10_2(texProperty.T.high)
+    set_socket_value(inputs[str_index + " S High"], trunc_10_2(texProperty.S.high))
+    set_socket_value(inputs[str_index + " T High"], trunc_10_2(texProperty.T.high))
 
     # Clamp
-    inputs[str_index + " ClampX"].default_value = 1 if texProperty.S.clamp else 0
-    inputs[str_index + " ClampY"].default_value = 1 if texProperty.T.clamp else 0
+    set_socket_value(inputs[str_index + " ClampX"], 1 if texProperty.S.clamp else 0)
+    set_socket_value(inputs[str_index + " ClampY"], 1 if texProperty.T.clamp else 0)
 
     # Mask
-    inputs[str_index + " S Mask"].default_value = texProperty.S.mask
-    inputs[str_index + " T Mask"].default_value = texProperty.T.mask
+    set_socket_value(inputs[str_index + " S Mask"], texProperty.S.mask)
+    set_socket_value(inputs[str_index + " T Mask"], texProperty.T.mask)
 
     # Mirror
-    inputs[str_index + " MirrorX"].default_value = 1 if texProperty.S.mirror > 0 else 0
-    inputs[str_index + " MirrorY"].default_value = 1 if texProperty.T.mirror > 0 else 0
+    set_socket_value(inputs[str_index + " MirrorX"], 1 if texProperty.S.mirror > 0 else 0)
+    set_socket_value(inputs[str_index + " MirrorY"], 1 if texProperty.T.mirror > 0 else 0)
 
     # Shift
-    inputs[str_index + " S Shift"].default_value = texProperty.S.shift
-    inputs[str_index + " T Shift"].default_value = texProperty.T.shift
+    set_socket_value(inputs[str_index + " S Shift"], texProperty.S.shift)
+    set_socket_value(inputs[str_index + " T Shift"], texProperty.T.shift)
 
 
 def iter_tex_nodes(node_tree: NodeTree, texIndex: int) -> Generator[TextureNodeImage, None, None]:
@@ -1932,7 +2108,9 @@ def set_texture_nodes_settings(
     for texNode in iter_tex_nodes(node_tree, texIndex):
         if texNode.image is not texProperty.tex:
             texNode.image = texProperty.tex
-        texNode.interpolation = "Linear" if f3dMat.rdp_settings.g_mdsft_text_filt == "G_TF_AVERAGE" else "Closest"
+        interpolation = "Linear" if f3dMat.rdp_settings.g_mdsft_text_filt == "G_TF_AVERAGE" else "Closest"
+        if texNode.interpolation != interpolation:
+            texNode.interpolation = interpolation
 
         if texSize:
             continue
@@ -1968,28 +2146,37 @@ def update_tex_values_index(self: Material, *, texProperty: "TextureProperty", t
                     tex_I_node.node_tree = desired_node
 
 
-def get_color_info_from_tex(tex: bpy.types.Image):
-    is_greyscale, has_alpha_4_bit, has_alpha_1_bit = True, False, False
-    rgba_colors: set[int] = set()
+# (image name, size, channels, pixel hash) : color info, so reopening a material doesn't rescan its textures
+tex_color_info_cache: dict[tuple[str, tuple[int, int], int, int], tuple[bool, bool, bool, set[int]]] = {}
+TEX_COLOR_INFO_CACHE_SIZE = 256
 
-    pixels, channel_count = tex.pixels, tex.channels
 
-    for x in range(tex.size[0]):
-        for y in range(tex.size[1]):  # N64 is -Y, Blender is +Y, in this context this doesn´t matter
-            pixel_color = [1, 1, 1, 1]
-            for field in range(channel_count):
-                pixel_color[field] = pixels[(y * tex.size[0] + x) * channel_count + field]
-            rgba_colors.add(getRGBA16Tuple(pixel_color))
+def get_color_info_from_tex(tex: bpy.types.Image):
+    width, height = tex.size
+    channel_count = tex.channels
+    # One foreach_get instead of an RNA call per pixel component
+    pixels = array.array("f", bytes(4 * width * height * channel_count))
+    tex.pixels.foreach_get(pixels)
+
+    key = (tex.name_full, (width, height), channel_count, hash(pixels.tobytes()))
+    if key in tex_color_info_cache:
+        return tex_color_info_cache[key]
 
-            if not (pixel_color[0] == pixel_color[1] and pixel_color[1] == pixel_color[2]):
-                is_greyscale = False
+    # Missing channels default to 1, like an opaque white pixel
+    ones = array.array("f", [1.0]) * (width * height)
+    r, g, b, a = (pixels[field::channel_count] if field < channel_count else ones for field in range(4))
 
-            if pixel_color[3] < 0.9375:
-                has_alpha_4_bit = True
-            if pixel_color[3] < 0.5:
-                has_alpha_1_bit = True
+    is_greyscale = r == g and g == b
+    has_alpha_4_bit = len(a) > 0 and min(a) < 0.9375
+    has_alpha_1_bit = len(a) > 0 and min(a) < 0.5
+    # Deduplicate the float colors first, so only distinct colors are converted to RGBA16
+    rgba_colors: set[int] = {getRGBA16Tuple(color) for color in set(zip(r, g, b, a))}
 
-    return is_greyscale, has_alpha_1_bit, has_alpha_4_bit, rgba_colors
+    if len(tex_color_info_cache) >= TEX_COLOR_INFO_CACHE_SIZE:
+        tex_color_info_cache.clear()
+    info = is_greyscale, has_alpha_1_bit, has_alpha_4_bit, rgba_colors
+    tex_color_info_cache[key] = info
+    return info
 
 
 def get_optimal_format(tex: bpy.types.Image | None, prefer_rgba_over_ci: bool):
@@ -2028,7 +2215,7 @@ def update_tex_values_and_formats(self, context):
 
         settings_props = context.scene.fast64.settings
         if not settings_props.auto_pick_texture_format:
-            update_tex_values_manual(material, context)
+            queue_node_update(material, context, NODE_UPDATE_TEX0, NODE_UPDATE_TEX1)
             return
 
         f3d_mat: F3DMaterialProperty = material.f3d_mat
@@ -2051,7 +2238,7 @@ def update_tex_values_and_formats(self, context):
             elif tex1_props.tex_format.startswith("CI") and not tex0_props.tex_format.startswith("CI"):
                 tex1_props.tex_format = "RGBA16"
 
-        update_tex_values_manual(material, context)
+        queue_node_update(material, context, NODE_UPDATE_TEX0, NODE_UPDATE_TEX1)
 
 
 def update_tex_values(self, context):
@@ -2064,7 +2251,7 @@ def update_tex_values(self, context):
         except:
             prop_path = None
 
-        update_tex_values_manual(material, context, prop_path=prop_path)
+        queue_node_update(material, context, *get_tex_node_update_kinds(prop_path), prop_path=prop_path)
 
 
 def get_tex_basis_size(f3d_mat: "F3DMaterialProperty"):
@@ -2114,39 +2301,39 @@ def update_tex_values_manual(material: Material, context, prop_path=None):
             f3dMat.tex_scale = (1, 1)
 
         if f3dMat.tex0.tex is not None:
-            texture_inputs["0 S TexSize"].default_value = f3dMat.tex0.tex.size[0]
-            texture_inputs["0 T TexSize"].default_value = f3dMat.tex0.tex.size[0]
+            set_socket_value(texture_inputs["0 S TexSize"], f3dMat.tex0.tex.size[0])
+            set_socket_value(texture_inputs["0 T TexSize"], f3dMat.tex0.tex.size[0])
         if f3dMat.tex1.tex is not None:
-            texture_inputs["1 S TexSize"].default_value = f3dMat.tex1.tex.size[0]
-            texture_inputs["1 T TexSize"].default_value = f3dMat.tex1.tex.size[0]
+            set_socket_value(texture_inputs["1 S TexSize"], f3dMat.tex1.tex.size[0])
+            set_socket_value(texture_inputs["1 T TexSize"], f3dMat.tex1.tex.size[0])
 
     uv_basis: ShaderNodeGroup = nodes["UV Basis"]
     if f3dMat.uv_basis == "TEXEL0":
-        uv_basis.node_tree = bpy.data.node_groups["UV Basis 0"]
+        set_node_group(uv_basis, bpy.data.node_groups["UV Basis 0"])
     else:
-        uv_basis.node_tree = bpy.data.node_groups["UV Basis 1"]
+        set_node_group(uv_basis, bpy.data.node_groups["UV Basis 1"])
 
     if not isTexGen:
-        uv_basis.inputs["S Scale"].default_value = f3dMat.tex_scale[0]
-        uv_basis.inputs["T Scale"].default_value = f3dMat.tex_scale[1]
+        set_socket_value(uv_basis.inputs["S Scale"], f3dMat.tex_scale[0])
+        set_socket_value(uv_basis.inputs["T Scale"], f3dMat.tex_scale[1])
     elif f3dMat.scale_autoprop:
         # Tex gen is 1:1
-        uv_basis.inputs["S Scale"].default_value = 1
-        uv_basis.inputs["T Scale"].default_value = 1
+        set_socket_value(uv_basis.inputs["S Scale"], 1)
+        set_socket_value(uv_basis.inputs["T Scale"], 1)
     else:
         gen_size = get_tex_gen_size(get_tex_basis_size(f3dMat))
         # scale tex gen proportionally
         node_uv_scale = (f3dMat.tex_scale[0] / gen_size[0], f3dMat.tex_scale[1] / gen_size[1])
-        uv_basis.inputs["S Scale"].default_value = node_uv_scale[0]
-        uv_basis.inputs["T Scale"].default_value = node_uv_scale[1]
+        set_socket_value(uv_basis.inputs["S Scale"], node_uv_scale[0])
+        set_socket_value(uv_basis.inputs["T Scale"], node_uv_scale[1])
 
     if not prop_path or "tex0" in prop_path:
         update_tex_values_index(material, texProperty=f3dMat.tex0, texIndex=0, isUsed=tex0_used)
     if not prop_path or "tex1" in prop_path:
         update_tex_values_index(material, texProperty=f3dMat.tex1, texIndex=1, isUsed=tex1_used)
 
-    texture_inputs["3 Point"].default_value = int(f3dMat.rdp_settings.g_mdsft_text_filt == "G_TF_BILERP")
-    uv_basis.inputs["EnableOffset"].default_value = int(f3dMat.rdp_settings.g_mdsft_text_filt != "G_TF_POINT")
+    set_socket_value(texture_inputs["3 Point"], int(f3dMat.rdp_settings.g_mdsft_text_filt == "G_TF_BILERP"))
+    set_socket_value(uv_basis.inputs["EnableOffset"], int(f3dMat.rdp_settings.g_mdsft_text_filt != "G_TF_POINT"))
     set_texture_settings_node(material)
 
 
@@ -2208,10 +2395,172 @@ def update_preset_manual_v4(material, preset):
         material_apply_preset(material, findF3DPresetPath(preset))
 
 
+def get_preset_attr_path(node: ast.expr) -> tuple[str, tuple[str, ...]] | None:
+    """(variable, attribute names) of an attribute chain, with bpy.context.material as the "material" variable."""
+    attrs = []
+    while isinstance(node, ast.Attribute):
+        attrs.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    attrs.reverse()
+    if node.id == "bpy":
+        if attrs[:2] != ["context", "material"]:
+            return None
+        return "material", tuple(attrs[2:])
+    return node.id, tuple(attrs)
+
+
+def get_preset_method_call(node: ast.expr, variables: set[str]) -> tuple[str, tuple[str, ...]] | None:
+    """Path of the method for calls without arguments like levels.clear() and levels.add()"""
+    if not isinstance(node, ast.Call) or node.args or node.keywords:
+        return None
+    path = get_preset_attr_path(node.func)
+    if path is None or path[0] not in variables or len(path[1]) == 0:
+        return None
+    return path
+
+
+def compile_f3d_preset(source: str) -> list[tuple] | None:
+    """
+    Compiles a preset file into a list of operations for apply_compiled_f3d_preset.
+    Preset files are written by AddPresetBase and savePresets and only bind variables, assign values
+    and call collection methods. Returns None for anything else, which is then executed as a script instead.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    ops = []
+    variables = {"material"}
+    for statement in tree.body:
+        if isinstance(statement, ast.Import) and [alias.name for alias in statement.names] == ["bpy"]:
+            continue
+
+        if isinstance(statement, ast.Expr):
+            call = get_preset_method_call(statement.value, variables)
+            if call is None:
+                return None
+            ops.append(("call", *call))
+            continue
+
+        if not isinstance(statement, ast.Assign) or len(statement.targets) != 1:
+            return None
+        target, value = statement.targets[0], statement.value
+
+        if isinstance(target, ast.Name):
+            # f3d_mat = bpy.context.material.f3d_mat, item_sub_1 = f3d_mat.cel_shading.levels.add()
+            call = get_preset_method_call(value, variables)
+            path = get_preset_attr_path(value)
+            if call is not None:
+                ops.append(("bind_call", target.id, *call))
+            elif path is not None and path[0] in variables:
+                ops.append(("bind", target.id, *path))
+            else:
+                return None
+            variables.add(target.id)
+            continue
+
+        target_path = get_preset_attr_path(target)
+        if target_path is None or target_path[0] not in variables or len(target_path[1]) == 0:
+            return None
+        try:
+            ops.append(("set", *target_path, ast.literal_eval(value)))
+            continue
+        except ValueError:
+            pass
+        # f3d_mat.use_default_lighting = f3d_mat.use_default_lighting (to trigger its update callback),
+        # f3d_mat.presetName = 'Oot ' + f3d_mat.presetName
+        for node in ast.walk(value):
+            if isinstance(node, ast.Call) or (isinstance(node, ast.Name) and node.id not in variables):
+                return None
+        expression = compile(ast.Expression(value), "<f3d preset>", "eval")
+        ops.append(("eval", *target_path, expression))
+
+    return ops
+
+
+def apply_compiled_f3d_preset(material: Material, ops: list[tuple]):
+    variables = {"material": material}
+
+    def resolve(variable: str, attrs: tuple[str, ...]):
+        value = variables[variable]
+        for attr in attrs:
+            value = getattr(value, attr)
+        return value
+
+    for op in ops:
+        kind = op[0]
+        if kind == "set":
+            _, variable, attrs, value = op
+            setattr(resolve(variable, attrs[:-1]), attrs[-1], value)
+        elif kind == "eval":
+            _, variable, attrs, expression = op
+            setattr(resolve(variable, attrs[:-1]), attrs[-1], eval(expression, {"__builtins__": {}}, variables))
+        elif kind == "call":
+            _, variable, attrs = op
+            resolve(variable, attrs)()
+        elif kind == "bind":
+            _, name, variable, attrs = op
+            variables[name] = resolve(variable, attrs)
+        elif kind == "bind_call":
+            _, name, variable, attrs = op
+            variables[name] = resolve(variable, attrs)()
+
+
+class F3DPresetCache:
+    """
+    Compiled preset files, so applying a preset doesn't read and exec its file every time.
+    The files stay the source of truth, an entry is recompiled when its file's mtime or size changes.
+    """
+
+    def __init__(self):
+        # path : (mtime, size, compiled ops or None if the file has to be executed)
+        self.entries: dict[str, tuple[int, int, list[tuple] | None]] = {}
+        # preset filename without extension : path
+        self.paths: dict[str, str] = {}
+
+    def get_ops(self, filepath: str) -> list[tuple] | None:
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        entry = self.entries.get(filepath)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            with open(filepath, "r", encoding="utf-8") as file:
+                entry = (stat.st_mtime_ns, stat.st_size, compile_f3d_preset(file.read()))
+            self.entries[filepath] = entry
+        return entry[2]
+
+    def clear(self):
+        self.entries.clear()
+        self.paths.clear()
+
+
+f3d_preset_cache = F3DPresetCache()
+
+
+def execute_f3d_preset(material: Material, filepath: str):
+    ops = f3d_preset_cache.get_ops(filepath) if filepath.lower().endswith(".py") else None
+    if ops is None:
+        with bpy.context.temp_override(material=material):
+            bpy.ops.script.execute_preset(filepath=filepath, menu_idname="MATERIAL_MT_f3d_presets")
+        return
+
+    # Same as execute_preset, which changes the menu title to the most recently chosen option
+    MATERIAL_MT_f3d_presets.bl_label = bpy.path.display_name(os.path.basename(filepath), title_case=False)
+    # Update callbacks triggered by the preset read the material from context
+    with bpy.context.temp_override(material=material):
+        try:
+            apply_compiled_f3d_preset(material, ops)
+        except Exception as exc:
+            print(f"Failed to execute the preset {filepath}: {exc!r}")
+
+
 def material_apply_preset(material, filepath):
     material.f3d_update_flag = True
-    with bpy.context.temp_override(material=material):
-        bpy.ops.script.execute_preset(filepath=filepath, menu_idname="MATERIAL_MT_f3d_presets")
+    execute_f3d_preset(material, filepath)
 
     # Since the material preset is executed under f3d_update_flag,
     # it setting the rendermode presets does not propagate to the individual
@@ -2524,6 +2873,7 @@ def reloadDefaultF3DPresets():
     for material in bpy.data.materials:
         if material.f3d_mat.presetName in presetNameToFilename:
             update_preset_manual_v4(material, presetNameToFilename[material.f3d_mat.presetName])
+    flush_f3d_node_updates()
 
 
 def check_or_ask_color_management(context: Context):
@@ -2837,10 +3187,7 @@ def update_combiner_connections_and_preset(self, context: Context):
         prop_path = self.path_from_id()
         combiner = 1 if "combiner1" in prop_path else 2
 
-        update_combiner_connections(material, context, combiner=combiner)
-
-        toggle_texture_node_muting(material, 0, f3d_mat.tex0.tex and combiner_uses_tex0(material.f3d_mat))
-        toggle_texture_node_muting(material, 1, f3d_mat.tex1.tex and combiner_uses_tex1(material.f3d_mat))
+        queue_node_update(material, context, NODE_UPDATE_COMBINER1 if combiner == 1 else NODE_UPDATE_COMBINER2)
 
 
 def ui_image(
@@ -4724,16 +5071,23 @@ mat_classes = (
 
 
 def findF3DPresetPath(filename):
+    cachedPath = f3d_preset_cache.paths.get(filename)
+    if cachedPath is not None and os.path.isfile(cachedPath):
+        return cachedPath
+
     try:
         presetPath = bpy.utils.user_resource("SCRIPTS", os.path.join("presets", "f3d"), create=True)
     except:  # 3.0
         presetPath = bpy.utils.user_resource("SCRIPTS", path=os.path.join("presets", "f3d"), create=True)
+    # Index every preset while scanning, the first match wins like before
+    f3d_preset_cache.paths.clear()
     for subdir in os.listdir(presetPath):
         subPath = os.path.join(presetPath, subdir)
         if os.path.isdir(subPath):
             for preset in os.listdir(subPath):
-                if preset[:-3] == filename:
-                    return os.path.join(subPath, filename) + ".py"
+                f3d_preset_cache.paths.setdefault(preset[:-3], os.path.join(subPath, preset[:-3]) + ".py")
+    if filename in f3d_preset_cache.paths:
+        return f3d_preset_cache.paths[filename]
     raise PluginError("Preset " + str(filename) + " not found.")
 
 
@@ -4749,6 +5103,10 @@ def savePresets():
     for subdir, presets in material_presets.items():
         for filename, preset in presets.items():
             filepath = getF3DPresetPath(filename, "f3d/" + subdir)
+            if os.path.isfile(filepath):
+                with open(filepath, "r", encoding="utf-8") as file_preset:
+                    if file_preset.read() == preset:
+                        continue  # unchanged, keeping the file's mtime also keeps its compiled preset cached
             file_preset = open(filepath, "w", encoding="utf-8")
             file_preset.write(preset)
             file_preset.close()
@@ -4802,10 +5160,21 @@ def mat_register():
 
     VIEW3D_HT_header.append(draw_f3d_render_settings)
 
+    bpy.app.handlers.load_post.append(f3d_node_update_load_handler)
+    bpy.app.handlers.undo_post.append(f3d_node_update_undo_handler)
+    bpy.app.handlers.redo_post.append(f3d_node_update_undo_handler)
+
 
 def mat_unregister():
     VIEW3D_HT_header.remove(draw_f3d_render_settings)
 
+    bpy.app.handlers.load_post.remove(f3d_node_update_load_handler)
+    bpy.app.handlers.undo_post.remove(f3d_node_update_undo_handler)
+    bpy.app.handlers.redo_post.remove(f3d_node_update_undo_handler)
+    if bpy.app.timers.is_registered(flush_f3d_node_updates):
+        bpy.app.timers.unregister(flush_f3d_node_updates)
+    f3d_node_update_queue.clear()
+
     del Material.menu_tab
     del Material.f3d_mat
     del Material.is_f3d
@@ -1,5 +1,5 @@
 import bpy
-from bpy.types import NodeTree
+from bpy.types import NodeSocket, NodeTree, ShaderNodeGroup
 
 
 class F3DMaterial_UpdateLock:
@@ -37,6 +37,38 @@ class F3DMaterial_UpdateLock:
             self.material.f3d_update_flag = False
 
 
+# Node sockets store floats in single precision, so values written from python doubles don't compare exactly
+SOCKET_VALUE_TOLERANCE = 1e-6
+
+
+def socket_values_equal(current, desired) -> bool:
+    if hasattr(current, "__len__") or hasattr(desired, "__len__"):
+        current, desired = tuple(current), tuple(desired)
+        return len(current) == len(desired) and all(map(socket_values_equal, current, desired))
+    if isinstance(current, float) or isinstance(desired, float):
+        return abs(current - desired) <= SOCKET_VALUE_TOLERANCE * max(1.0, abs(current), abs(desired))
+    return current == desired
+
+
+def set_socket_value(socket: NodeSocket, value):
+    """Only writes default_value when it changes, since every write tags the node tree for an update."""
+    if not socket_values_equal(socket.default_value, value):
+        socket.default_value = value
+
+
+def link_sockets(node_tree: NodeTree, from_socket: NodeSocket, to_socket: NodeSocket):
+    """Links the sockets unless to_socket is already linked to from_socket and nothing else."""
+    links = to_socket.links
+    if len(links) == 1 and links[0].from_socket == from_socket:
+        return
+    node_tree.links.new(from_socket, to_socket)
+
+
+def set_node_group(node: ShaderNodeGroup, node_group: NodeTree):
+    if node.node_tree is not node_group:
+        node.node_tree = node_group
+
+
 EXCLUDE_FROM_NODE = (
     "rna_type",
     "type",
@@ -1,5 +1,5 @@
 from typing import Union, Optional, Callable, Any, TYPE_CHECKING
-import bmesh, bpy, mathutils, re, math, traceback
+import bpy, mathutils, re, math, struct, traceback, copy
 from mathutils import Vector
 from bpy.utils import register_class, unregister_class
 from .f3d_gbi import *
@@ -72,28 +72,17 @@ def getExportRotation(forwardAxisEnum, convertTransformMatrix):
     return convertTransformMatrix.to_quaternion() @ localToBlenderRotation
 
 
-def F3DtoBlenderObject(romfile, startAddress, scene, newname, transformMatrix, segmentData, shadeSmooth):
+def F3DtoBlenderObject(romfile, startAddress, scene, newname, transformMatrix, segmentData, f3dType):
     mesh = bpy.data.meshes.new(newname + "-mesh")
     obj = bpy.data.objects.new(newname, mesh)
     scene.collection.objects.link(obj)
-    createBlankMaterial(obj)
 
-    bMesh = bmesh.new()
-    bMesh.from_mesh(mesh)
-
-    parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, newname, segmentData, [None] * 16 * 16)
-
-    # bmesh.ops.rotate(bMesh, cent = [0,0,0],
-    # 	matrix = blenderToSM64Rotation,
-    # 	verts = bMesh.verts)
-    bMesh.to_mesh(mesh)
-    bMesh.free()
-    mesh.update()
-
-    if shadeSmooth:
-        bpy.ops.object.select_all(action="DESELECT")
-        obj.select_set(True)
-        bpy.ops.object.shade_smooth()
+    romfile.seek(0)
+    f3dContext = F3DBinaryContext(get_cached_F3D_GBI(f3dType), romfile.read(), segmentData, createF3DMat(None))
+    # Vertices are stored in SM64 units
+    transformMatrix = transformMatrix @ mathutils.Matrix.Scale(1 / scene.fast64.sm64.blender_to_sm64_scale, 4)
+    parseF3DBinary(startAddress, transformMatrix, newname, newname, "sm64", "1", f3dContext)
+    f3dContext.createMesh(obj, True, False, True)
 
     return obj
 
@@ -102,254 +91,356 @@ def cmdToPositiveInt(cmd):
     return cmd if cmd >= 0 else 256 + cmd
 
 
-def parseF3DBinary(romfile, startAddress, scene, bMesh, obj, transformMatrix, groupName, segmentData, vertexBuffer):
-    f3d = F3D("F3D")
-    currentAddress = startAddress
-    romfile.seek(currentAddress)
-    command = romfile.read(8)
-
-    faceSeq = bMesh.faces
-    vertSeq = bMesh.verts
-    uv_layer = bMesh.loops.layers.uv.verify()
-    deform_layer = bMesh.verts.layers.deform.verify()
-    vertexGroup = getOrMakeVertexGroup(obj, groupName)
-    groupIndex = vertexGroup.index
-
-    textureSize = [32, 32]
-
-    currentTextureAddr = -1
-    jumps = [startAddress]
-
-    # Used for remove_double op at end
-    vertList = []
-
-    while len(jumps) > 0:
-        # FD, FC, B7 (tex, shader, geomode)
-        # print(format(command[0], '#04x') + ' at ' + hex(currentAddress))
-        if command[0] == cmdToPositiveInt(f3d.G_TRI1):
-            try:
-                newVerts = interpretDrawTriangle(
-                    command, vertexBuffer, faceSeq, vertSeq, uv_layer, deform_layer, groupIndex
-                )
-                vertList.extend(newVerts)
-            except TypeError:
-                print("Ignoring triangle from unloaded vertices.")
-
-        elif command[0] == cmdToPositiveInt(f3d.G_VTX):
-            interpretLoadVertices(romfile, vertexBuffer, transformMatrix, command, segmentData)
-
-        # Note: size can usually be indicated in LoadTile / LoadBlock.
-        elif command[0] == cmdToPositiveInt(f3d.G_SETTILESIZE):
-            textureSize = interpretSetTileSize(int.from_bytes(command[4:8], "big"))
-
-        elif command[0] == cmdToPositiveInt(f3d.G_DL):
-            if command[1] == 0:
-                jumps.append(currentAddress)
-            currentAddress = decodeSegmentedAddr(command[4:8], segmentData=segmentData)
-            romfile.seek(currentAddress)
-            command = romfile.read(8)
-            continue
-
-        elif command[0] == cmdToPositiveInt(f3d.G_ENDDL):
-            currentAddress = jumps.pop()
-
-        elif command[0] == cmdToPositiveInt(f3d.G_SETGEOMETRYMODE):
-            pass
-        elif command[0] == cmdToPositiveInt(f3d.G_SETCOMBINE):
-            pass
-
-        elif command[0] == cmdToPositiveInt(f3d.G_SETTIMG):
-            currentTextureAddr = interpretSetTImage(command, segmentData)
-
-        elif command[0] == cmdToPositiveInt(f3d.G_LOADBLOCK):
-            # for now only 16bit RGBA is supported.
-            interpretLoadBlock(command, romfile, currentTextureAddr, textureSize, "RGBA", 16)
-
-        elif command[0] == cmdToPositiveInt(f3d.G_SETTILE):
-            interpretSetTile(int.from_bytes(command[4:8], "big"), None)
-
-        else:
-            pass
-            # print(format(command[0], '#04x') + ' at ' + hex(currentAddress))
-
-        currentAddress += 8
-        romfile.seek(currentAddress)
-        command = romfile.read(8)
-
-    bmesh.ops.remove_doubles(bMesh, verts=vertList, dist=0.0001)
-    return vertexBuffer
-
-
-def getPosition(vertexBuffer, index):
-    xStart = index * 16 + 0
-    yStart = index * 16 + 2
-    zStart = index * 16 + 4
-
-    xBytes = vertexBuffer[xStart : xStart + 2]
-    yBytes = vertexBuffer[yStart : yStart + 2]
-    zBytes = vertexBuffer[zStart : zStart + 2]
-
-    x = int.from_bytes(xBytes, "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-    y = int.from_bytes(yBytes, "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-    z = int.from_bytes(zBytes, "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-
-    return (x, y, z)
-
-
-def getNormalorColor(vertexBuffer, index, isNormal=True):
-    xByte = bytes([vertexBuffer[index * 16 + 12]])
-    yByte = bytes([vertexBuffer[index * 16 + 13]])
-    zByte = bytes([vertexBuffer[index * 16 + 14]])
-    wByte = bytes([vertexBuffer[index * 16 + 15]])
-
-    if isNormal:
-        x = int.from_bytes(xByte, "big", signed=True)
-        y = int.from_bytes(yByte, "big", signed=True)
-        z = int.from_bytes(zByte, "big", signed=True)
-        return (x, y, z)
-
-    else:  # vertex color
-        r = int.from_bytes(xByte, "big") / 255
-        g = int.from_bytes(yByte, "big") / 255
-        b = int.from_bytes(zByte, "big") / 255
-        a = int.from_bytes(wByte, "big") / 255
-        return (r, g, b, a)
-
-
-def getUV(vertexBuffer, index, textureDimensions=[32, 32]):
-    uStart = index * 16 + 8
-    vStart = index * 16 + 10
-
-    uBytes = vertexBuffer[uStart : uStart + 2]
-    vBytes = vertexBuffer[vStart : vStart + 2]
-
-    u = int.from_bytes(uBytes, "big", signed=True) / 32
-    v = int.from_bytes(vBytes, "big", signed=True) / 32
-
-    # We don't know texture size, so assume 32x32.
-    u /= textureDimensions[0]
-    v /= textureDimensions[1]
-    v = 1 - v
-
-    return (u, v)
-
-
-def interpretSetTile(data, texture):
-    clampMirrorFlags = bitMask(data, 18, 2)
-
-
-def interpretSetTileSize(data):
-    hVal = bitMask(data, 0, 12)
-    wVal = bitMask(data, 12, 12)
+# Color combiner mux names indexed by their G_CCMUX_* / G_ACMUX_* values.
+# Padding since index can go up to 31.
+combinerAList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "NOISE"] + ["0"] * 24
+combinerBList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "CENTER", "K4"] + ["0"] * 24
+combinerCList = [
+    "COMBINED",
+    "TEXEL0",
+    "TEXEL1",
+    "PRIMITIVE",
+    "SHADE",
+    "ENVIRONMENT",
+    "SCALE",
+    "COMBINED_ALPHA",
+    "TEXEL0_ALPHA",
+    "TEXEL1_ALPHA",
+    "PRIMITIVE_ALPHA",
+    "SHADE_ALPHA",
+    "ENV_ALPHA",
+    "LOD_FRACTION",
+    "PRIM_LOD_FRAC",
+    "K5",
+] + ["0"] * 16
+combinerDList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"] + ["0"] * 24
+
+combinerAAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
+combinerBAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
+combinerCAlphaList = [
+    "LOD_FRACTION",
+    "TEXEL0",
+    "TEXEL1",
+    "PRIMITIVE",
+    "SHADE",
+    "ENVIRONMENT",
+    "PRIM_LOD_FRAC",
+    "0",
+]
+combinerDAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
 
-    height = hVal >> 2 + 1
-    width = wVal >> 2 + 1
 
-    return (width, height)
+# Binary display list decoding.
+# Each decoder takes the two command words and returns the equivalent ParsedMacro records,
+# using the same macro names and parameter order that the C importer produces.
+# Numeric parameters are ints (math_eval passes them through), addresses are segmented ints.
+f3dBinaryDecodeTables: "dict[str, list[Optional[Callable[[int, int], tuple[ParsedMacro, ...]]]]]" = {}
 
 
-def interpretLoadVertices(romfile, vertexBuffer, transformMatrix, command, segmentData=None):
-    command = int.from_bytes(command, "big", signed=True)
+def getF3DBinaryDecodeTable(f3d: F3D):
+    """Returns the 256 entry opcode dispatch table for the microcode, building it on first use."""
+    table = f3dBinaryDecodeTables.get(f3d.F3D_VER)
+    if table is None:
+        table = buildF3DBinaryDecodeTable(f3d)
+        f3dBinaryDecodeTables[f3d.F3D_VER] = table
+    return table
 
-    numVerts = bitMask(command, 52, 4) + 1
-    startIndex = bitMask(command, 48, 4)
-    dataLength = bitMask(command, 32, 16)
-    segmentedAddr = bitMask(command, 0, 32)
 
-    dataStartAddr = decodeSegmentedAddr(segmentedAddr.to_bytes(4, "big"), segmentData=segmentData)
+def buildF3DBinaryDecodeTable(f3d: F3D):
+    table = [None] * 256
 
-    romfile.seek(dataStartAddr)
-    data = romfile.read(dataLength)
+    def setDecoder(opcodeName: str, decoder):
+        if hasattr(f3d, opcodeName):
+            table[cmdToPositiveInt(getattr(f3d, opcodeName))] = decoder
 
-    for i in range(numVerts):
-        vert = Vector(readVectorFromShorts(data, i * 16))
-        vert = transformMatrix @ vert
-        transformedVert = bytearray(6)
-        writeVectorToShorts(transformedVert, 0, vert)
+    # Triangle indices are stored premultiplied by the vertex size in the RSP's vertex buffer.
+    triIndexScale = 10 if f3d.F3D_OLD_GBI else 2
 
-        start = (startIndex + i) * 16
-        vertexBuffer[start : start + 6] = transformedVert
-        vertexBuffer[start + 6 : start + 16] = data[i * 16 + 6 : i * 16 + 16]
+    def triIndices(word):
+        return [
+            bitMask(word, 16, 8) // triIndexScale,
+            bitMask(word, 8, 8) // triIndexScale,
+            bitMask(word, 0, 8) // triIndexScale,
+            0,
+        ]
 
+    # RSP geometry commands, which differ between microcodes
+    if f3d.F3DEX_GBI_2:
 
-# Note the divided by 0x0A, which is due to the way BF command stores indices.
-# Without this the triangles are drawn incorrectly.
-def interpretDrawTriangle(command, vertexBuffer, faceSeq, vertSeq, uv_layer, deform_layer, groupIndex):
-    verts = [None, None, None]
+        def decodeVertex(w0, w1):
+            count = bitMask(w0, 12, 8)
+            return (ParsedMacro("gsSPVertex", [w1, count, bitMask(w0, 1, 7) - count]),)
 
-    index0 = int(command[5] / 0x0A)
-    index1 = int(command[6] / 0x0A)
-    index2 = int(command[7] / 0x0A)
+        def decodeTri1(w0, w1):
+            return (ParsedMacro("gsSP1Triangle", triIndices(w0)),)
 
-    vert0 = Vector(getPosition(vertexBuffer, index0))
-    vert1 = Vector(getPosition(vertexBuffer, index1))
-    vert2 = Vector(getPosition(vertexBuffer, index2))
+    elif f3d.F3DEX_GBI:
 
-    verts[0] = vertSeq.new(vert0)
-    verts[1] = vertSeq.new(vert1)
-    verts[2] = vertSeq.new(vert2)
+        def decodeVertex(w0, w1):
+            return (ParsedMacro("gsSPVertex", [w1, bitMask(w0, 10, 6), bitMask(w0, 16, 8) // 2]),)
 
-    tri = faceSeq.new(verts)
+        def decodeTri1(w0, w1):
+            return (ParsedMacro("gsSP1Triangle", triIndices(w1)),)
 
-    # Assign vertex group
-    for vert in tri.verts:
-        vert[deform_layer][groupIndex] = 1
+    else:
 
-    loopIndex = 0
-    for loop in tri.loops:
-        loop[uv_layer].uv = Vector(getUV(vertexBuffer, int(command[5 + loopIndex] / 0x0A)))
-        loopIndex += 1
+        def decodeVertex(w0, w1):
+            return (ParsedMacro("gsSPVertex", [w1, bitMask(w0, 20, 4) + 1, bitMask(w0, 16, 4)]),)
 
-    return verts
+        def decodeTri1(w0, w1):
+            return (ParsedMacro("gsSP1Triangle", triIndices(w1)),)
 
+    def decodeTri2(w0, w1):
+        return (ParsedMacro("gsSP2Triangles", triIndices(w0) + triIndices(w1)),)
 
-def interpretSetTImage(command, levelData):
-    segmentedAddr = command[4:8]
-    return decodeSegmentedAddr(segmentedAddr, levelData)
+    setDecoder("G_VTX", decodeVertex)
+    setDecoder("G_TRI1", decodeTri1)
+    if not f3d.F3D_OLD_GBI:
+        setDecoder("G_TRI2", decodeTri2)
+        setDecoder("G_QUAD", decodeTri2)
 
+    def decodeDisplayList(w0, w1):
+        # G_DL_PUSH is 0, G_DL_NOPUSH is 1
+        return (ParsedMacro("gsSPBranchList" if bitMask(w0, 16, 8) else "gsSPDisplayList", [w1]),)
 
-def interpretLoadBlock(command, romfile, textureStart, textureSize, colorFormat, colorDepth):
-    numTexels = ((int.from_bytes(command[6:8], "big")) >> 12) + 1
+    setDecoder("G_DL", decodeDisplayList)
+    setDecoder("G_ENDDL", lambda w0, w1: (ParsedMacro("gsSPEndDisplayList", []),))
+    if f3d.F3DEX_GBI_2:
+        # Params are stored with G_MTX_PUSH inverted, and the pop size in bytes
+        setDecoder("G_MTX", lambda w0, w1: (ParsedMacro("gsSPMatrix", [w1, bitMask(w0, 0, 8) ^ f3d.G_MTX_PUSH]),))
 
-    # This is currently broken.
-    # createNewTextureMaterial(romfile, textureStart, textureSize, numTexels, colorFormat, colorDepth, obj)
+        def decodePopMatrix(w0, w1):
+            count = w1 // 64
+            if count == 1:
+                return (ParsedMacro("gsSPPopMatrix", [f3d.G_MTX_MODELVIEW]),)
+            return (ParsedMacro("gsSPPopMatrixN", [f3d.G_MTX_MODELVIEW, count]),)
 
+        setDecoder("G_POPMTX", decodePopMatrix)
+    else:
+        setDecoder("G_MTX", lambda w0, w1: (ParsedMacro("gsSPMatrix", [w1, bitMask(w0, 16, 8)]),))
+        setDecoder("G_POPMTX", lambda w0, w1: (ParsedMacro("gsSPPopMatrix", [w1]),))
+
+    if f3d.F3DEX_GBI_2:
+
+        def decodeGeometryMode(w0, w1):
+            clearBits = ~w0 & 0xFFFFFF
+            if clearBits == 0xFFFFFF:
+                return (ParsedMacro("gsSPLoadGeometryMode", [w1]),)
+            if clearBits == 0:
+                return (ParsedMacro("gsSPSetGeometryMode", [w1]),)
+            if w1 == 0:
+                return (ParsedMacro("gsSPClearGeometryMode", [clearBits]),)
+            return (
+                ParsedMacro("gsSPClearGeometryMode", [clearBits]),
+                ParsedMacro("gsSPSetGeometryMode", [w1]),
+            )
 
-def printvbuf(vertexBuffer):
-    for i in range(0, int(len(vertexBuffer) / 16)):
-        print(getPosition(vertexBuffer, i))
-        print(getNormalorColor(vertexBuffer, i))
-        print(getUV(vertexBuffer, i))
+        setDecoder("G_GEOMETRYMODE", decodeGeometryMode)
 
+        def decodeTexture(w0, w1):
+            params = [bitMask(w1, 16, 16), bitMask(w1, 0, 16), bitMask(w0, 11, 3), bitMask(w0, 8, 3), bitMask(w0, 1, 7)]
+            return (ParsedMacro("gsSPTexture", params),)
 
-def createBlankMaterial(obj):
-    material = createF3DMat(obj)
-    update_preset_manual(material, bpy.context)
+        def decodeOtherMode(w0, w1):
+            length = bitMask(w0, 0, 8) + 1
+            shift = 32 - bitMask(w0, 8, 8) - length
+            return (ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_H, shift, length, w1]),)
 
+        def decodeOtherModeL(w0, w1):
+            length = bitMask(w0, 0, 8) + 1
+            shift = 32 - bitMask(w0, 8, 8) - length
+            return (ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_L, shift, length, w1]),)
 
-def createNewTextureMaterial(romfile, textureStart, textureSize, texelCount, colorFormat, colorDepth, obj):
-    newMat = bpy.data.materials.new("f3d_material")
-    newTex = bpy.data.textures.new("f3d_texture", "IMAGE")
-    newImg = bpy.data.images.new("f3d_texture", *textureSize, True, True)
+    else:
+        setDecoder("G_SETGEOMETRYMODE", lambda w0, w1: (ParsedMacro("gsSPSetGeometryMode", [w1]),))
+        setDecoder("G_CLEARGEOMETRYMODE", lambda w0, w1: (ParsedMacro("gsSPClearGeometryMode", [w1]),))
+
+        def decodeTexture(w0, w1):
+            params = [bitMask(w1, 16, 16), bitMask(w1, 0, 16), bitMask(w0, 11, 3), bitMask(w0, 8, 3), bitMask(w0, 0, 8)]
+            return (ParsedMacro("gsSPTexture", params),)
+
+        def decodeOtherMode(w0, w1):
+            return (ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_H, bitMask(w0, 8, 8), bitMask(w0, 0, 8), w1]),)
+
+        def decodeOtherModeL(w0, w1):
+            return (ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_L, bitMask(w0, 8, 8), bitMask(w0, 0, 8), w1]),)
+
+    setDecoder("G_TEXTURE", decodeTexture)
+    setDecoder("G_SETOTHERMODE_H", decodeOtherMode)
+    setDecoder("G_SETOTHERMODE_L", decodeOtherModeL)
+
+    # gsSPLightColor writes the color to both words of the light, only the first one becomes a record
+    lightColorOffsets = {}
+    lightColorCopyOffsets = set()
+    for n in range(1, 11):
+        if hasattr(f3d, "G_MWO_aLIGHT_" + str(n)):
+            lightColorOffsets[getattr(f3d, "G_MWO_aLIGHT_" + str(n))] = "LIGHT_" + str(n)
+            lightColorCopyOffsets.add(getattr(f3d, "G_MWO_bLIGHT_" + str(n)))
+
+    def decodeMoveWord(w0, w1):
+        if f3d.F3DEX_GBI_2:
+            index, offset = bitMask(w0, 16, 8), bitMask(w0, 0, 16)
+        else:
+            index, offset = bitMask(w0, 0, 8), bitMask(w0, 8, 16)
+        if f3d.F3DEX_GBI_3 and offset & f3d.G_MW_HALFWORD_FLAG:
+            return (ParsedMacro("gsMoveHalfwd", [index, offset & 0xFFF, w1]),)
+        if index == f3d.G_MW_SEGMENT:
+            return (ParsedMacro("gsSPSegment", [offset // 4, w1]),)
+        if index == f3d.G_MW_NUMLIGHT:
+            if f3d.F3DEX_GBI_3:
+                count = w1 // 0x10
+            elif f3d.F3DEX_GBI_2:
+                count = w1 // 24
+            else:
+                count = ((w1 & 0x7FFFFFFF) // 32) - 1
+            return (ParsedMacro("gsSPNumLights", ["NUMLIGHTS_" + str(count)]),)
+        if index == f3d.G_MW_LIGHTCOL:
+            if offset in lightColorOffsets:
+                return (ParsedMacro("gsSPLightColor", [lightColorOffsets[offset], w1]),)
+            if offset in lightColorCopyOffsets:
+                return ()
+        if not f3d.F3DEX_GBI_3 and index == f3d.G_MW_CLIP:
+            # gsSPClipRatio writes the ratio to all four clip words, the first one holds it unnegated
+            return (ParsedMacro("gsSPClipRatio", [w1]),) if offset == f3d.G_MWO_CLIP_RNX else ()
+        if index == f3d.G_MW_FOG and offset == f3d.G_MWO_FOG:
+            fm = int.from_bytes(w1.to_bytes(4, "big")[0:2], "big", signed=True)
+            fo = int.from_bytes(w1.to_bytes(4, "big")[2:4], "big", signed=True)
+            if fm == 0:
+                return (ParsedMacro("gsSPFogFactor", [fm, fo]),)
+            # inverse of gsSPFogPosition, where fm = 128000 / (max - min) and fo = (500 - min) * 256 / (max - min)
+            fogRange = 128000 / fm
+            fogMin = 500 - fo * fogRange / 256
+            return (ParsedMacro("gsSPFogPosition", [round(fogMin), round(fogMin + fogRange)]),)
+        return (ParsedMacro("gsMoveWd", [index, offset, w1]),)
+
+    setDecoder("G_MOVEWORD", decodeMoveWord)
+
+    def decodeMoveMem(w0, w1):
+        if f3d.F3DEX_GBI_2:
+            index, offset = bitMask(w0, 0, 8), bitMask(w0, 8, 8) * 8
+            if index == f3d.G_MV_LIGHT and not f3d.F3DEX_GBI_3 and offset >= f3d.G_MVO_L0:
+                return (ParsedMacro("gsSPLight", [w1, offset // 24 - 1]),)
+            return (ParsedMacro("gsMoveMem", [index, offset, w1]),)
+        index = bitMask(w0, 16, 8)
+        if f3d.G_MV_L0 <= index <= f3d.G_MV_L7:
+            return (ParsedMacro("gsSPLight", [w1, (index - f3d.G_MV_L0) // 2 + 1]),)
+        return (ParsedMacro("gsMoveMem", [index, 0, w1]),)
+
+    setDecoder("G_MOVEMEM", decodeMoveMem)
+
+    # RDP commands, which are shared between microcodes
+    def decodeCombine(w0, w1):
+        params = [
+            combinerAList[bitMask(w0, 20, 4)],
+            combinerBList[bitMask(w1, 28, 4)],
+            combinerCList[bitMask(w0, 15, 5)],
+            combinerDList[bitMask(w1, 15, 3)],
+            combinerAAlphaList[bitMask(w0, 12, 3)],
+            combinerBAlphaList[bitMask(w1, 12, 3)],
+            combinerCAlphaList[bitMask(w0, 9, 3)],
+            combinerDAlphaList[bitMask(w1, 9, 3)],
+            combinerAList[bitMask(w0, 5, 4)],
+            combinerBList[bitMask(w1, 24, 4)],
+            combinerCList[bitMask(w0, 0, 5)],
+            combinerDList[bitMask(w1, 6, 3)],
+            combinerAAlphaList[bitMask(w1, 21, 3)],
+            combinerBAlphaList[bitMask(w1, 3, 3)],
+            combinerCAlphaList[bitMask(w1, 18, 3)],
+            combinerDAlphaList[bitMask(w1, 0, 3)],
+        ]
+        return (ParsedMacro("gsDPSetCombineLERP", params),)
+
+    def colorDecoder(name):
+        def decodeColor(w0, w1):
+            return (ParsedMacro(name, [bitMask(w1, 24, 8), bitMask(w1, 16, 8), bitMask(w1, 8, 8), bitMask(w1, 0, 8)]),)
+
+        return decodeColor
+
+    def decodePrimColor(w0, w1):
+        params = [bitMask(w0, 8, 8), bitMask(w0, 0, 8)]
+        params += [bitMask(w1, 24, 8), bitMask(w1, 16, 8), bitMask(w1, 8, 8), bitMask(w1, 0, 8)]
+        return (ParsedMacro("gsDPSetPrimColor", params),)
+
+    def decodeTextureImage(w0, w1):
+        params = [bitMask(w0, 21, 3), bitMask(w0, 19, 2), bitMask(w0, 0, 12) + 1, w1]
+        return (ParsedMacro("gsDPSetTextureImage", params),)
+
+    def decodeSetTile(w0, w1):
+        params = [
+            bitMask(w0, 21, 3),  # fmt
+            bitMask(w0, 19, 2),  # siz
+            bitMask(w0, 9, 9),  # line
+            bitMask(w0, 0, 9),  # tmem
+            bitMask(w1, 24, 3),  # tile
+            bitMask(w1, 20, 4),  # palette
+            bitMask(w1, 18, 2),  # cmt
+            bitMask(w1, 14, 4),  # maskt
+            bitMask(w1, 10, 4),  # shiftt
+            bitMask(w1, 8, 2),  # cms
+            bitMask(w1, 4, 4),  # masks
+            bitMask(w1, 0, 4),  # shifts
+        ]
+        return (ParsedMacro("gsDPSetTile", params),)
+
+    def tileRectDecoder(name):
+        def decodeTileRect(w0, w1):
+            params = [
+                bitMask(w1, 24, 3),
+                bitMask(w0, 12, 12),
+                bitMask(w0, 0, 12),
+                bitMask(w1, 12, 12),
+                bitMask(w1, 0, 12),
+            ]
+            return (ParsedMacro(name, params),)
 
-    newTex.image = newImg
-    newSlot = newMat.texture_slots.add()
-    newSlot.texture = newTex
+        return decodeTileRect
 
-    obj.data.materials.append(newMat)
+    def decodeLoadTLUT(w0, w1):
+        return (ParsedMacro("gsDPLoadTLUTCmd", [bitMask(w1, 24, 3), bitMask(w1, 14, 10)]),)
 
-    romfile.seek(textureStart)
-    texelSize = int(colorDepth / 8)
-    dataLength = texelCount * texelSize
-    textureData = romfile.read(dataLength)
+    def decodeRDPOtherMode(w0, w1):
+        return (
+            ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_H, 0, 24, w0 & 0xFFFFFF]),
+            ParsedMacro("gsSPSetOtherMode", [f3d.G_SETOTHERMODE_L, 0, 32, w1]),
+        )
 
-    if colorDepth != 16:
-        print("Warning: Only 16bit RGBA supported, input was " + str(colorDepth) + "bit " + colorFormat)
-    else:
-        print(str(texelSize) + " " + str(colorDepth))
-        for n in range(0, dataLength, texelSize):
-            oldPixel = textureData[n : n + texelSize]
-            newImg.pixels[n : n + 4] = read16bitRGBA(int.from_bytes(oldPixel, "big"))
+    setDecoder("G_SETCOMBINE", decodeCombine)
+    setDecoder("G_SETENVCOLOR", colorDecoder("gsDPSetEnvColor"))
+    setDecoder("G_SETPRIMCOLOR", decodePrimColor)
+    setDecoder("G_SETBLENDCOLOR", colorDecoder("gsDPSetBlendColor"))
+    setDecoder("G_SETFOGCOLOR", colorDecoder("gsDPSetFogColor"))
+    setDecoder("G_SETFILLCOLOR", lambda w0, w1: (ParsedMacro("gsDPSetFillColor", [w1]),))
+    setDecoder("G_SETTIMG", decodeTextureImage)
+    setDecoder("G_SETTILE", decodeSetTile)
+    setDecoder("G_LOADBLOCK", tileRectDecoder("gsDPLoadBlock"))
+    setDecoder("G_LOADTILE", tileRectDecoder("gsDPLoadTile"))
+    setDecoder("G_SETTILESIZE", tileRectDecoder("gsDPSetTileSize"))
+    setDecoder("G_LOADTLUT", decodeLoadTLUT)
+    setDecoder("G_RDPSETOTHERMODE", decodeRDPOtherMode)
+    setDecoder("G_RDPFULLSYNC", lambda w0, w1: (ParsedMacro("gsDPFullSync", []),))
+    setDecoder("G_RDPTILESYNC", lambda w0, w1: (ParsedMacro("gsDPTileSync", []),))
+    setDecoder("G_RDPPIPESYNC", lambda w0, w1: (ParsedMacro("gsDPPipeSync", []),))
+    setDecoder("G_RDPLOADSYNC", lambda w0, w1: (ParsedMacro("gsDPLoadSync", []),))
+
+    return table
+
+
+def decodeF3DBinary(data, f3d: F3D, offset: int = 0):
+    """
+    Decodes the display list in data (bytes or a memoryview) starting at offset, without following calls.
+    Yields (offset, ParsedMacro) pairs, stopping after gsSPEndDisplayList or gsSPBranchList.
+    """
+    decodeTable = getF3DBinaryDecodeTable(f3d)
+    unpackCommand = struct.Struct(">II").unpack_from
+    while offset + 8 <= len(data):
+        w0, w1 = unpackCommand(data, offset)
+        decoder = decodeTable[w0 >> 24]
+        if decoder is not None:
+            for command in decoder(w0, w1):
+                yield offset, command
+                if command.name == "gsSPEndDisplayList" or command.name == "gsSPBranchList":
+                    return
+        offset += 8
 
 
 def math_eval(s, f3d):
@@ -957,45 +1048,6 @@ class F3DContext:
         lerp0 = [value.strip() for value in lerp0]
         lerp1 = [value.strip() for value in lerp1]
 
-        # Padding since index can go up to 31
-        combinerAList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "NOISE"] + ["0"] * 24
-        combinerBList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "CENTER", "K4"] + [
-            "0"
-        ] * 24
-        combinerCList = [
-            "COMBINED",
-            "TEXEL0",
-            "TEXEL1",
-            "PRIMITIVE",
-            "SHADE",
-            "ENVIRONMENT",
-            "SCALE",
-            "COMBINED_ALPHA",
-            "TEXEL0_ALPHA",
-            "TEXEL1_ALPHA",
-            "PRIMITIVE_ALPHA",
-            "SHADE_ALPHA",
-            "ENV_ALPHA",
-            "LOD_FRACTION",
-            "PRIM_LOD_FRAC",
-            "K5",
-        ] + ["0"] * 16
-        combinerDList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"] + ["0"] * 24
-
-        combinerAAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
-        combinerBAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
-        combinerCAlphaList = [
-            "LOD_FRACTION",
-            "TEXEL0",
-            "TEXEL1",
-            "PRIMITIVE",
-            "SHADE",
-            "ENVIRONMENT",
-            "PRIM_LOD_FRAC",
-            "0",
-        ]
-        combinerDAlphaList = ["COMBINED", "TEXEL0", "TEXEL1", "PRIMITIVE", "SHADE", "ENVIRONMENT", "1", "0"]
-
         for i in range(0, 4):
             lerp0[i] = math_eval("G_CCMUX_" + lerp0[i], self.f3d)
             lerp1[i] = math_eval("G_CCMUX_" + lerp1[i], self.f3d)
@@ -1341,6 +1393,10 @@ class F3DContext:
 
         tileSizeSettings = self.getTileSizeSettings(params[4])
 
+    def loadBlock(self, params):
+        # Blocks end up in tmem like tiles, only the region they are loaded from differs
+        self.loadTile(params)
+
     def loadTile(self, params):
         tileSettings = self.getTileSettings(params[0])
         """
@@ -1495,9 +1551,7 @@ class F3DContext:
 
         # TODO: Textures are sometimes loaded in with different dimensions than for rendering.
         # This means width is incorrect?
-        image, loadedFromImageFile = parseTextureData(
-            data, textureName, self, tileSettings.fmt, siz, width, isLUT, self.f3d
-        )
+        image, loadedFromImageFile = self.parseTexture(data, textureName, tileSettings.fmt, siz, width, isLUT)
         if loadedFromImageFile:
             self.imagesDontApplyTlut.add(image)
 
@@ -1540,9 +1594,7 @@ class F3DContext:
 
             # print(command.name + " " + str(command.params))
             if command.name == "gsSPVertex":
-                vertexDataName, vertexDataOffset = getVertexDataStart(command.params[0], self.f3d)
-                parseVertexData(dlData, vertexDataName, self)
-                self.addVertices(command.params[1], command.params[2], vertexDataName, vertexDataOffset)
+                self.loadVertices(dlData, command)
             elif command.name == "gsSPMatrix":
                 self.setCurrentTransform(command.params[0], command.params[1])
             elif command.name == "gsSPPopMatrix":
@@ -1554,7 +1606,7 @@ class F3DContext:
             elif command.name == "gsSPDisplayList" or command.name.startswith("gsSPBranch"):
                 newDLName = self.processDLName(command.params[0])
                 if newDLName is not None:
-                    newDLCommands = parseDLData(dlData, newDLName)
+                    newDLCommands = self.getDLCommands(dlData, newDLName)
                     # Use -1 index so that it will be incremented to 0 at end of loop
                     parsedCommands = F3DParsedCommands(newDLName, newDLCommands, -1)
                     if command.name == "gsSPDisplayList":
@@ -1680,9 +1732,7 @@ class F3DContext:
                     flags = math_eval(command.params[0] + " | " + command.params[1], self.f3d)
                     self.setRenderMode(flags)
                 elif command.name == "gsDPSetTextureImage":
-                    # Are other params necessary?
-                    # The params are set in SetTile commands.
-                    self.currentTextureName = command.params[3]
+                    self.setTextureImage(command)
                 elif command.name == "gsDPSetCombineMode":
                     self.setCombineMode(command)
                 elif command.name == "gsDPSetCombineLERP":
@@ -1732,7 +1782,7 @@ class F3DContext:
                 elif command.name == "gsDPSetTile":
                     self.setTile(command.params, dlData)
                 elif command.name == "gsDPLoadBlock":
-                    self.loadTile(command.params)
+                    self.loadBlock(command.params)
                 elif command.name == "gsDPLoadTLUTCmd":
                     self.loadTLUT(command.params, dlData)
 
@@ -1812,6 +1862,24 @@ class F3DContext:
     def processDLName(self, name: str) -> Optional[str]:
         return name
 
+    # The methods below read the data referenced by commands, override them to read it from somewhere other than C.
+    def getDLCommands(self, dlData: str, dlName: str) -> "list[ParsedMacro]":
+        return parseDLData(dlData, dlName)
+
+    def loadVertices(self, dlData: str, command: "ParsedMacro"):
+        vertexDataName, vertexDataOffset = getVertexDataStart(command.params[0], self.f3d)
+        parseVertexData(dlData, vertexDataName, self)
+        self.addVertices(command.params[1], command.params[2], vertexDataName, vertexDataOffset)
+
+    def setTextureImage(self, command: "ParsedMacro"):
+        # Are other params necessary?
+        # The params are set in SetTile commands.
+        self.currentTextureName = command.params[3]
+
+    # returns (image or F3DTextureReference, whether the image was loaded from an image file)
+    def parseTexture(self, data: str, name: str, fmt: str, siz: str, width: int, isLUT: bool):
+        return parseTextureData(data, name, self, fmt, siz, width, isLUT, self.f3d)
+
     def deleteMaterialContext(self):
         if self.materialContext is not None:
             bpy.data.materials.remove(self.materialContext)
@@ -1819,17 +1887,50 @@ class F3DContext:
             raise PluginError("Attempting to delete material context that is None.")
 
     # if deleteMaterialContext is False, then manually call self.deleteMaterialContext() later.
-    def createMesh(self, obj, removeDoubles, importNormals, callDeleteMaterialContext: bool):
+    # If weldAcrossLimbs is False, only vertices of the same limb are welded.
+    def createMesh(
+        self, obj, removeDoubles, importNormals, callDeleteMaterialContext: bool, weldAcrossLimbs: bool = True
+    ):
         mesh = obj.data
         if len(self.verts) % 3 != 0:
             print(len(self.verts))
             raise PluginError("Number of verts in mesh not divisible by 3, currently " + str(len(self.verts)))
 
         triangleCount = int(len(self.verts) / 3)
-        verts = [f3dVert.position for f3dVert in self.verts]
-        faces = [[3 * i + j for j in range(3)] for i in range(triangleCount)]
         print("Vertices: " + str(len(self.verts)) + ", Triangles: " + str(triangleCount))
 
+        # Every triangle has its own 3 vertices, so loop data can be indexed like self.verts.
+        # Doubles are welded before building the mesh instead of using bpy.ops.mesh.remove_doubles.
+        if removeDoubles:
+            vertLimbs = None
+            if not weldAcrossLimbs:
+                vertLimbs = [None] * len(self.verts)
+                for groupName, indices in self.limbGroups.items():
+                    for index in indices:
+                        vertLimbs[index] = groupName
+            verts, vertRemap = weldVertexPositions([f3dVert.position for f3dVert in self.verts], groups=vertLimbs)
+        else:
+            verts = [f3dVert.position for f3dVert in self.verts]
+            vertRemap = range(len(self.verts))
+
+        # Welding can collapse triangles or make them duplicates of each other. Like remove_doubles,
+        # those are removed along with their loop data, and the first of duplicate triangles is kept.
+        triIndices = []
+        faces = []
+        faceVerts = set()
+        for i in range(triangleCount):
+            face = [vertRemap[3 * i + j] for j in range(3)]
+            if face[0] == face[1] or face[1] == face[2] or face[0] == face[2]:
+                continue
+            if removeDoubles:
+                key = frozenset(face)
+                if key in faceVerts:
+                    continue
+                faceVerts.add(key)
+            triIndices.append(i)
+            faces.append(face)
+        loopVerts = [self.verts[3 * i + j] for i in triIndices for j in range(3)]
+
         mesh.from_pydata(vertices=verts, edges=[], faces=faces)
         uv_layer_name = mesh.uv_layers.new().name
         # if self.materialContext.f3d_mat.rdp_settings.g_lighting:
@@ -1839,31 +1940,35 @@ class F3DContext:
             # Changed in Blender 4.1: "Meshes now always use custom normals if they exist." (and use_auto_smooth was removed)
             if bpy.app.version < (4, 1, 0):
                 mesh.use_auto_smooth = True
-            mesh.normals_split_custom_set([f3dVert.normal for f3dVert in self.verts])
+            mesh.normals_split_custom_set([f3dVert.normal for f3dVert in loopVerts])
 
+        # Welded vertices keep the limb of their first occurrence, like remove_doubles keeps the merge target.
+        vertGroups = {}
         for groupName, indices in self.limbGroups.items():
+            for index in indices:
+                vertGroups.setdefault(vertRemap[index], groupName)
+        groupIndices = {}
+        for index, groupName in vertGroups.items():
+            groupIndices.setdefault(groupName, []).append(index)
+        for groupName, indices in groupIndices.items():
             group = obj.vertex_groups.new(name=self.limbToBoneName[groupName])
             group.add(indices, 1, "REPLACE")
 
-        for i in range(len(mesh.polygons)):
-            mesh.polygons[i].material_index = self.triMatIndices[i]
+        mesh.polygons.foreach_set("material_index", [self.triMatIndices[i] for i in triIndices])
+        if not importNormals:
+            mesh.polygons.foreach_set("use_smooth", [True] * len(faces))
 
         # Workaround for an issue in Blender 3.5 where putting this above the `if importNormals` block
         # causes wrong uvs/normals and sometimes crashes.
         uv_layer = mesh.uv_layers[uv_layer_name].data
-
-        for i in range(len(mesh.loops)):
-            # This should be okay, since we aren't trying to optimize vertices
-            # There will be one loop for every vertex
-            uv_layer[i].uv = self.verts[i].uv
+        uv_layer.foreach_set("uv", [value for f3dVert in loopVerts for value in f3dVert.uv[0:2]])
 
         color_layer = mesh.vertex_colors.new(name="Col").data
-        for i in range(len(mesh.loops)):
-            color_layer[i].color = self.verts[i].rgb.to_4d()
+        color_layer.foreach_set("color", [value for f3dVert in loopVerts for value in (*f3dVert.rgb[0:3], 1)])
 
         alpha_layer = mesh.vertex_colors.new(name="Alpha").data
-        for i in range(len(mesh.loops)):
-            alpha_layer[i].color = [self.verts[i].alpha] * 3 + [1]
+        alpha_layer.foreach_set("color", [value for f3dVert in loopVerts for value in [f3dVert.alpha] * 3 + [1]])
+        mesh.update()
 
         if bpy.context.mode != "OBJECT":
             bpy.ops.object.mode_set(mode="OBJECT")
@@ -1873,13 +1978,6 @@ class F3DContext:
 
         for material in self.materials:
             obj.data.materials.append(material)
-        if not importNormals:
-            bpy.ops.object.shade_smooth()
-        if removeDoubles:
-            bpy.ops.object.mode_set(mode="EDIT")
-            bpy.ops.mesh.select_all(action="SELECT")
-            bpy.ops.mesh.remove_doubles()
-            bpy.ops.object.mode_set(mode="OBJECT")
 
         obj.location = bpy.context.scene.cursor.location
 
@@ -1894,6 +1992,148 @@ class F3DContext:
             self.deleteMaterialContext()
 
 
+class F3DBinaryContext(F3DContext):
+    """
+    Imports display lists from ROM data, decoded by decodeF3DBinary into the commands the C importer handles.
+    Display lists are named after their ROM address, and vertices, textures and lights after their segmented address.
+    """
+
+    # s16 xyz, u16 flag, s16 st, u8 rgba / s8 normal
+    vertexStruct = struct.Struct(">hhhHhhBBBB")
+
+    def __init__(self, f3d: F3D, romData: bytes, segmentData: dict, materialContext: bpy.types.Material):
+        self.romData = romData
+        self.segmentData = segmentData
+        self.dlCommands: dict[str, list[ParsedMacro]] = {}  # dl name : decoded commands
+        # Texture sizes aren't stored in the ROM, so the size of the last load of each texture is used.
+        self.textureLoadSizes: dict[str, int] = {}  # texture name : size in bytes
+        self.textureImageWidth = 1
+        super().__init__(f3d, None, materialContext)
+
+    def newMeshContext(self) -> "F3DBinaryContext":
+        """Returns a context for another mesh, sharing the decoded display lists, materials and textures."""
+        f3dContext = copy.copy(self)
+        f3dContext.clearGeometry()
+        return f3dContext
+
+    def getAddressName(self, address: int) -> str:
+        return f"0x{address:08X}"
+
+    def readSegmentedData(self, segmentedAddress: int, size: int) -> Optional[bytes]:
+        """Returns None if the segment isn't loaded."""
+        if segmentedAddress >> 24 not in self.segmentData:
+            return None
+        address = decodeSegmentedAddr(segmentedAddress.to_bytes(4, "big"), self.segmentData)
+        return self.romData[address : address + size]
+
+    def processDLName(self, name: "str | int") -> Optional[str]:
+        # Called with a segmented address for gsSPDisplayList / gsSPBranchList
+        if isinstance(name, int):
+            if name >> 24 not in self.segmentData:
+                print("Skipping display list in unloaded segment: " + self.getAddressName(name))
+                return None
+            return self.getAddressName(decodeSegmentedAddr(name.to_bytes(4, "big"), self.segmentData))
+        return name
+
+    def getDLCommands(self, dlData: str, dlName: str) -> "list[ParsedMacro]":
+        if dlName not in self.dlCommands:
+            if int(dlName, 16) >= len(self.romData):
+                raise PluginError("Display list at " + dlName + " is past the end of the ROM.")
+            decodedCommands = decodeF3DBinary(self.romData, self.f3d, int(dlName, 16))
+            self.dlCommands[dlName] = [command for _, command in decodedCommands]
+        return self.dlCommands[dlName]
+
+    def setCurrentTransform(self, name, flagList="G_MTX_NOPUSH | G_MTX_LOAD | G_MTX_MODELVIEW"):
+        if isinstance(name, int):
+            print("gsSPMatrix not handled: " + self.getAddressName(name))
+            return
+        super().setCurrentTransform(name, flagList)
+
+    def loadVertices(self, dlData: str, command: "ParsedMacro"):
+        segmentedAddress, count, start = command.params
+        name = self.getAddressName(segmentedAddress)
+        if name not in self.vertexData or len(self.vertexData[name]) < count:
+            data = self.readSegmentedData(segmentedAddress, count * self.vertexStruct.size)
+            if data is None:
+                raise PluginError("Vertices at " + name + " are in an unloaded segment.")
+            self.vertexData[name] = [
+                F3DVert(Vector((x, y, z)), Vector((s, t)), Vector((r, g, b)), unpackNormal(flag), a)
+                for x, y, z, flag, s, t, r, g, b, a in self.vertexStruct.iter_unpack(data)
+            ]
+        self.addVertices(count, start, name, 0)
+
+    # The ambient light is loaded after the directional lights, as in gsSPSetLights.
+    def setLight(self, data, command):
+        self.mat().set_lights = True
+        segmentedAddress, lightIndex = command.params
+        lightData = self.readSegmentedData(segmentedAddress, 16)
+        if lightData is None:
+            print("Skipping light in unloaded segment: " + self.getAddressName(segmentedAddress))
+            return
+
+        color = Vector(gammaInverse([value / 255 for value in lightData[0:3]]))
+        if lightIndex == max(self.numLights, 1) + 1:
+            self.lights.a = Ambient(color)
+        elif lightIndex <= len(self.lights.l):
+            self.lights.l[lightIndex - 1] = Light(color, Vector(bytesToNormal(lightData[8:11])))
+            self.numLights = max(self.numLights, lightIndex)
+
+    def setTextureImage(self, command: "ParsedMacro"):
+        self.currentTextureName = self.getAddressName(command.params[3])
+        self.textureImageWidth = command.params[2]
+
+    def getTexelBits(self, tile) -> int:
+        return int(self.getTileSettings(tile).siz[9:-1])
+
+    def loadTile(self, params):
+        rows = (params[4] >> self.f3d.G_TEXTURE_IMAGE_FRAC) + 1
+        loadSize = rows * self.textureImageWidth * self.getTexelBits(params[0]) // 8
+        self.textureLoadSizes[self.currentTextureName] = loadSize
+        super().loadTile(params)
+
+    def loadBlock(self, params):
+        self.textureLoadSizes[self.currentTextureName] = (params[3] + 1) * self.getTexelBits(params[0]) // 8
+        super().loadTile(params)
+
+    def loadTLUT(self, params, dlData):
+        self.textureLoadSizes[self.currentTextureName] = (params[1] + 1) * 2
+        super().loadTLUT(params, dlData)
+
+    def parseTexture(self, data: str, name: str, fmt: str, siz: str, width: int, isLUT: bool):
+        values = None
+        if name in self.textureLoadSizes:
+            values = self.readSegmentedData(int(name, 16), self.textureLoadSizes[name])
+        if values is None:
+            print("Cannot read texture at " + name)
+            return F3DTextureReference(name, width), False
+        return decodeTextureData(values, name, fmt, siz, width, isLUT), False
+
+
+def weldVertexPositions(positions, mergeDistance=0.0001, groups=None):
+    """
+    Merges positions which fall in the same cell of a grid of size mergeDistance.
+    If groups is given, only positions with the same group value are merged.
+    Returns the unique positions and, for each input position, the index of its unique position.
+    """
+    uniquePositions = []
+    remap = []
+    indices = {}
+    for i, position in enumerate(positions):
+        key = (
+            round(position[0] / mergeDistance),
+            round(position[1] / mergeDistance),
+            round(position[2] / mergeDistance),
+            groups[i] if groups is not None else None,
+        )
+        index = indices.get(key)
+        if index is None:
+            index = len(uniquePositions)
+            indices[key] = index
+            uniquePositions.append(position)
+        remap.append(index)
+    return uniquePositions, remap
+
+
 class ParsedMacro:
     def __init__(self, name: str, params: "list[str]"):
         self.name = name
@@ -1929,13 +2169,30 @@ def parseF3D(
 
     processedDLName = f3dContext.processDLName(dlName)
     if processedDLName is not None:
-        dlCommands = parseDLData(dlData, processedDLName)
+        dlCommands = f3dContext.getDLCommands(dlData, processedDLName)
         f3dContext.processCommands(dlData, processedDLName, dlCommands)
 
     if callClearMaterial:
         f3dContext.clearMaterial()
 
 
+# Binary counterpart of parseF3D, for a display list at romAddress in f3dContext.romData.
+def parseF3DBinary(
+    romAddress: int,
+    transformMatrix: mathutils.Matrix,
+    limbName: str,
+    boneName: str,
+    drawLayerPropName: str,
+    drawLayer: str,
+    f3dContext: F3DBinaryContext,
+    callClearMaterial: bool = True,
+):
+    dlName = f3dContext.getAddressName(romAddress)
+    parseF3D(
+        None, dlName, transformMatrix, limbName, boneName, drawLayerPropName, drawLayer, f3dContext, callClearMaterial
+    )
+
+
 def parseDLData(dlData: str, dlName: str):
     matchResult = re.search(r"Gfx\s*" + re.escape(dlName) + r"\s*\[\s*\w*\s*\]\s*=\s*\{([^\}]*)\}", dlData)
     if matchResult is None:
@@ -2112,65 +2369,73 @@ def parseTextureData(dlData, textureName, f3dContext, imageFormat, imageSize, wi
                 size = 8
             newValues.extend(int.to_bytes(intValue, size, "big")[:])
         values = newValues
+        image = decodeTextureData(values, textureName, imageFormat, imageSize, width, isLUT)
 
-        if width == 0:
-            width = 16
-        height = int(ceil(len(values) / (width * int(imageSize[9:-1]) / 8)))
-        # print("Texture: " + str(len(values)) + ", width = " + str(width) + ", height = " + str(height))
-        image = bpy.data.images.new(textureName, width, height, alpha=True)
-        if imageFormat == "G_IM_FMT_RGBA":
-            if imageSize == "G_IM_SIZ_16b":
-                for i in range(int(len(values) / 2)):
-                    image.pixels[4 * i : 4 * (i + 1)] = RGBA16toRGBA32(
-                        int.from_bytes(values[2 * i : 2 * (i + 1)], "big")
-                    )
-            elif imageSize == "G_IM_SIZ_32b":
-                image.pixels[:] = values
-            else:
-                print("Unhandled size for RGBA: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_IA":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = IA4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = IA4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = IA8toRGBA32(values[i])
-            elif imageSize == "G_IM_SIZ_16b":
-                for i in range(int(len(values) / 2)):
-                    image.pixels[4 * i : 4 * (i + 1)] = IA16toRGBA32(int.from_bytes(values[2 * i : 2 * (i + 1)], "big"))
-            else:
-                print("Unhandled size for IA: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_I":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = I4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = I4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = I8toRGBA32(values[i])
-            else:
-                print("Unhandled size for I: " + str(imageSize))
-        elif imageFormat == "G_IM_FMT_CI":
-            if imageSize == "G_IM_SIZ_4b":
-                for i in range(len(values)):
-                    image.pixels[8 * i : 8 * i + 4] = CI4toRGBA32((values[i] >> 4) & 15)
-                    image.pixels[8 * i + 4 : 8 * i + 8] = CI4toRGBA32(values[i] & 15)
-            elif imageSize == "G_IM_SIZ_8b":
-                for i in range(len(values)):
-                    image.pixels[4 * i : 4 * (i + 1)] = CI8toRGBA32(values[i])
-            else:
-                print("Unhandled size for CI: " + str(imageSize))
+    return image, loadedFromImageFile
 
-        # Blender UV origin is bottom right, while N64 is top right, so we must flip non LUT
-        if not isLUT:
-            flippedValues = image.pixels[:]
-            for j in range(height):
-                image.pixels[width * j * 4 : width * (j + 1) * 4] = flippedValues[
-                    width * (height - (j + 1)) * 4 : width * (height - j) * 4
-                ]
 
-    return image, loadedFromImageFile
+def decodeTextureData(values, textureName, imageFormat, imageSize, width, isLUT):
+    """
+    Creates an image from texture bytes, with as many rows of width texels as the bytes hold.
+    Pixels are decoded into one list that is assigned to the image at once.
+    """
+    if width == 0:
+        width = 16
+    height = int(ceil(len(values) / (width * int(imageSize[9:-1]) / 8)))
+    # print("Texture: " + str(len(values)) + ", width = " + str(width) + ", height = " + str(height))
+
+    pixels = []
+    if imageFormat == "G_IM_FMT_RGBA":
+        if imageSize == "G_IM_SIZ_16b":
+            for i in range(len(values) // 2):
+                pixels.extend(RGBA16toRGBA32(int.from_bytes(values[2 * i : 2 * (i + 1)], "big")))
+        elif imageSize == "G_IM_SIZ_32b":
+            pixels = [value / 255 for value in values]
+        else:
+            print("Unhandled size for RGBA: " + str(imageSize))
+    elif imageFormat == "G_IM_FMT_IA":
+        if imageSize == "G_IM_SIZ_4b":
+            for value in values:
+                pixels.extend(IA4toRGBA32((value >> 4) & 15) + IA4toRGBA32(value & 15))
+        elif imageSize == "G_IM_SIZ_8b":
+            for value in values:
+                pixels.extend(IA8toRGBA32(value))
+        elif imageSize == "G_IM_SIZ_16b":
+            for i in range(len(values) // 2):
+                pixels.extend(IA16toRGBA32(int.from_bytes(values[2 * i : 2 * (i + 1)], "big")))
+        else:
+            print("Unhandled size for IA: " + str(imageSize))
+    elif imageFormat == "G_IM_FMT_I":
+        if imageSize == "G_IM_SIZ_4b":
+            for value in values:
+                pixels.extend(I4toRGBA32((value >> 4) & 15) + I4toRGBA32(value & 15))
+        elif imageSize == "G_IM_SIZ_8b":
+            for value in values:
+                pixels.extend(I8toRGBA32(value))
+        else:
+            print("Unhandled size for I: " + str(imageSize))
+    elif imageFormat == "G_IM_FMT_CI":
+        if imageSize == "G_IM_SIZ_4b":
+            for value in values:
+                pixels.extend(CI4toRGBA32((value >> 4) & 15) + CI4toRGBA32(value & 15))
+        elif imageSize == "G_IM_SIZ_8b":
+            for value in values:
+                pixels.extend(CI8toRGBA32(value))
+        else:
+            print("Unhandled size for CI: " + str(imageSize))
+
+    # Texels past the end of the data keep the color of a new image
+    pixelCount = width * height
+    pixels = pixels[: pixelCount * 4] + [0, 0, 0, 1] * (pixelCount - len(pixels) // 4)
+
+    # Blender UV origin is bottom right, while N64 is top right, so we must flip non LUT
+    if not isLUT:
+        rowSize = width * 4
+        pixels = [value for j in reversed(range(height)) for value in pixels[rowSize * j : rowSize * (j + 1)]]
+
+    image = bpy.data.images.new(textureName, width, height, alpha=True)
+    image.pixels[:] = pixels
+    return image
 
 
 def parseMacroList(data: str):
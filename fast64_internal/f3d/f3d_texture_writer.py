@@ -1,6 +1,6 @@
 from typing import Union, Optional
 from dataclasses import dataclass, field
-import bpy
+import bpy, struct
 from math import ceil, floor
 
 from .f3d_enums import *
@@ -1071,51 +1071,71 @@ def savePaletteLoad(
 
 # Functions for converting and writing texture and palette data
 
+# Blender's luminance coefficients, as plain floats so they can be used without a mathutils call per pixel
+LUM_R, LUM_G, LUM_B = RGB_TO_LUM_COEF
 
-def extractConvertCIPixel(image, pixels, i, j, palFormat):
-    color = [1, 1, 1, 1]
-    for field in range(image.channels):
-        color[field] = pixels[(j * image.size[0] + i) * image.channels + field]
+
+def getImagePixelsRGBA(image: bpy.types.Image) -> list[float]:
+    """
+    Reads the pixels of an image once, as a flat RGBA float list in N64 row order (top row first).
+    Accessing image.pixels / image.size is an RNA call, so this should be the only place touching the image.
+    """
+    width, height = image.size
+    channels = image.channels
+    pixels = image.pixels[:]
+    rowLength = width * channels
+    # N64 is -Y, Blender is +Y
+    ordered = [value for j in reversed(range(height)) for value in pixels[j * rowLength : (j + 1) * rowLength]]
+    if channels == 4:
+        return ordered
+    # missing channels default to 1, like an opaque white pixel
+    rgba = [1.0] * (width * height * 4)
+    for field in range(min(channels, 4)):
+        rgba[field::4] = ordered[field::channels]
+    return rgba
+
+
+def getPaletteColorsOfPixels(rgba: list[float], palFormat: str) -> list[int]:
     if palFormat == "RGBA16":
-        pixelColor = getRGBA16Tuple(color)
+        return [
+            ((int(round(r * 0x1F)) & 0x1F) << 11)
+            | ((int(round(g * 0x1F)) & 0x1F) << 6)
+            | ((int(round(b * 0x1F)) & 0x1F) << 1)
+            | (1 if a > 0.5 else 0)
+            for r, g, b, a in zip(rgba[0::4], rgba[1::4], rgba[2::4], rgba[3::4])
+        ]
     elif palFormat == "IA16":
-        pixelColor = getIA16Tuple(color)
+        return [
+            (int(round((LUM_R * r + LUM_G * g + LUM_B * b) * 0xFF)) << 8) | int(a * 0xFF)
+            for r, g, b, a in zip(rgba[0::4], rgba[1::4], rgba[2::4], rgba[3::4])
+        ]
     else:
         raise PluginError("Internal error, palette format is " + palFormat)
-    return pixelColor
 
 
 def getColorsUsedInImage(image, palFormat):
-    palette = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                palette.append(pixelColor)
-    return palette
+    # dict keeps the order colors are first seen in
+    return list(dict.fromkeys(getPaletteColorsOfPixels(getImagePixelsRGBA(image), palFormat)))
 
 
 def mergePalettes(pal0, pal1):
     palette = [c for c in pal0]
+    colorsInPalette = set(palette)
     for c in pal1:
-        if c not in palette:
+        if c not in colorsInPalette:
             palette.append(c)
+            colorsInPalette.add(c)
     return palette
 
 
 def getColorIndicesOfTexture(image, palette, palFormat):
-    texture = []
-    # N64 is -Y, Blender is +Y
-    pixels = image.pixels[:]
-    for j in reversed(range(image.size[1])):
-        for i in range(image.size[0]):
-            pixelColor = extractConvertCIPixel(image, pixels, i, j, palFormat)
-            if pixelColor not in palette:
-                raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
-            texture.append(palette.index(pixelColor))
-    return texture
+    paletteIndices = {}
+    for index, color in enumerate(palette):
+        paletteIndices.setdefault(color, index)
+    try:
+        return [paletteIndices[color] for color in getPaletteColorsOfPixels(getImagePixelsRGBA(image), palFormat)]
+    except KeyError:
+        raise PluginError(f"Bug: {image.name} palette len {len(palette)} missing CI")
 
 
 def compactNibbleArray(texture, width, height):
@@ -1133,9 +1153,16 @@ def compactNibbleArray(texture, width, height):
 def writePaletteData(fPalette: FImage, palette: list[int]):
     if fPalette.converted:
         return
-    for color in palette:
-        fPalette.data.extend(color.to_bytes(2, "big"))
-    fPalette.converted = True
+    palette = list(palette)
+    fPalette.setDataSource(lambda: bytearray(b"".join(color.to_bytes(2, "big") for color in palette)))
+
+
+def encodeCITextureData(image: bpy.types.Image, palette: list[int], palFmt: str, texFmt: str) -> bytearray:
+    texture = getColorIndicesOfTexture(image, palette, palFmt)
+
+    if texFmt == "CI4":
+        return compactNibbleArray(texture, image.size[0], image.size[1])
+    return bytearray(texture)
 
 
 def writeCITextureData(
@@ -1147,198 +1174,52 @@ def writeCITextureData(
 ):
     if fImage.converted:
         return
-
-    texture = getColorIndicesOfTexture(image, palette, palFmt)
-
-    if texFmt == "CI4":
-        fImage.data = compactNibbleArray(texture, image.size[0], image.size[1])
-    else:
-        fImage.data = bytearray(texture)
-    fImage.converted = True
+    palette = list(palette)
+    fImage.setDataSource(lambda: encodeCITextureData(image, palette, palFmt, texFmt))
 
 
-def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
-    if fImage.converted:
-        return
+def encodeNonCITextureData(rgba: list[float], texFmt: str) -> bytearray:
+    """Converts RGBA pixels from getImagePixelsRGBA into texture bytes. Doesn't touch bpy."""
     fmt = texFormatOf[texFmt]
     bitSize = texBitSizeF3D[texFmt]
 
-    pixels = image.pixels[:]
     if fmt == "G_IM_FMT_RGBA":
         if bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 0] * 0x1F)) & 0x1F) << 3)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x1F)
-                                    >> 2
-                                )
-                            ),
-                            (
-                                ((int(round(pixels[(j * image.size[0] + i) * image.channels + 1] * 0x1F)) & 0x03) << 6)
-                                | (
-                                    (int(round(pixels[(j * image.size[0] + i) * image.channels + 2] * 0x1F)) & 0x1F)
-                                    << 1
-                                )
-                                | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                            ),
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
-            )
+            colors = getPaletteColorsOfPixels(rgba, "RGBA16")
+            return bytearray(struct.pack(f">{len(colors)}H", *colors))
         elif bitSize == "G_IM_SIZ_32b":
-            fImage.data = bytearray(
-                [
-                    int(round(pixels[(j * image.size[0] + i) * image.channels + field] * 0xFF)) & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                    for field in range(image.channels)
-                ]
-            )
+            return bytearray(int(round(value * 0xFF)) & 0xFF for value in rgba)
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
 
     elif fmt == "G_IM_FMT_YUV":
         raise PluginError("YUV not yet implemented.")
-        if bitSize == "G_IM_SIZ_16b":
-            pass
-        else:
-            raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
 
     elif fmt == "G_IM_FMT_CI":
         raise PluginError("Internal error, writeNonCITextureData called for CI image.")
 
-    elif fmt == "G_IM_FMT_IA":
+    luminance = [LUM_R * r + LUM_G * g + LUM_B * b for r, g, b in zip(rgba[0::4], rgba[1::4], rgba[2::4])]
+    alpha = rgba[3::4]
+    if fmt == "G_IM_FMT_IA":
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0x7
-                                )
-                            )
-                            & 0x7
-                        )
-                        << 1
-                    )
-                    | (1 if pixels[(j * image.size[0] + i) * image.channels + 3] > 0.5 else 0)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            data = [((int(round(lum * 0x7)) & 0x7) << 1) | (1 if a > 0.5 else 0) for lum, a in zip(luminance, alpha)]
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    (
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xF
-                                )
-                            )
-                            & 0xF
-                        )
-                        << 4
-                    )
-                    | (int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xF)) & 0xF)
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            data = [
+                ((int(round(lum * 0xF)) & 0xF) << 4) | (int(round(a * 0xF)) & 0xF) for lum, a in zip(luminance, alpha)
+            ]
         elif bitSize == "G_IM_SIZ_16b":
-            fImage.data = bytearray(
-                [
-                    byteVal
-                    for doubleByte in [
-                        (
-                            int(
-                                round(
-                                    colorToLuminance(
-                                        pixels[
-                                            (j * image.size[0] + i)
-                                            * image.channels : (j * image.size[0] + i)
-                                            * image.channels
-                                            + 3
-                                        ]
-                                    )
-                                    * 0xFF
-                                )
-                            )
-                            & 0xFF,
-                            int(round(pixels[(j * image.size[0] + i) * image.channels + 3] * 0xFF)) & 0xFF,
-                        )
-                        for j in reversed(range(image.size[1]))
-                        for i in range(image.size[0])
-                    ]
-                    for byteVal in doubleByte
-                ]
-            )
+            data = [
+                byteVal
+                for lum, a in zip(luminance, alpha)
+                for byteVal in (int(round(lum * 0xFF)) & 0xFF, int(round(a * 0xFF)) & 0xFF)
+            ]
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     elif fmt == "G_IM_FMT_I":
         if bitSize == "G_IM_SIZ_4b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xF
-                        )
-                    )
-                    & 0xF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            data = [int(round(lum * 0xF)) & 0xF for lum in luminance]
         elif bitSize == "G_IM_SIZ_8b":
-            fImage.data = bytearray(
-                [
-                    int(
-                        round(
-                            colorToLuminance(
-                                pixels[
-                                    (j * image.size[0] + i) * image.channels : (j * image.size[0] + i) * image.channels
-                                    + 3
-                                ]
-                            )
-                            * 0xFF
-                        )
-                    )
-                    & 0xFF
-                    for j in reversed(range(image.size[1]))
-                    for i in range(image.size[0])
-                ]
-            )
+            data = [int(round(lum * 0xFF)) & 0xFF for lum in luminance]
         else:
             raise PluginError("Invalid combo: " + fmt + ", " + bitSize)
     else:
@@ -1346,6 +1227,11 @@ def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
 
     # We stored 4bit values in byte arrays, now to convert
     if bitSize == "G_IM_SIZ_4b":
-        fImage.data = compactNibbleArray(fImage.data, image.size[0], image.size[1])
+        return compactNibbleArray(data, len(data), 1)
+    return bytearray(data)
+
 
-    fImage.converted = True
+def writeNonCITextureData(image: bpy.types.Image, fImage: FImage, texFmt: str):
+    if fImage.converted:
+        return
+    fImage.setDataSource(lambda: encodeNonCITextureData(getImagePixelsRGBA(image), texFmt))
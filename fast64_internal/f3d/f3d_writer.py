@@ -18,6 +18,7 @@ from .f3d_gbi import *
 from .f3d_bleed import BleedGraphics
 
 from ..utility import *
+from ..export_source import combined_export_object
 
 
 def getColorLayer(mesh: bpy.types.Mesh, layer="Col"):
@@ -537,22 +538,13 @@ def addCullCommand(obj, fMesh, transformMatrix, matWriteMethod):
 
 
 def exportF3DCommon(obj, fModel, transformMatrix, includeChildren, name, DLFormat, convertTextureData):
-    tempObj, meshList = combineObjects(obj, includeChildren, None, None)
-    try:
-        infoDict = getInfoDict(tempObj)
-        triConverterInfo = TriangleConverterInfo(tempObj, None, fModel.f3d, transformMatrix, infoDict)
+    with combined_export_object(obj, includeChildren) as exportObj:
+        infoDict = getInfoDict(exportObj)
+        triConverterInfo = TriangleConverterInfo(exportObj, None, fModel.f3d, transformMatrix, infoDict)
         revert_materials = fModel.matWriteMethod == GfxMatWriteMethod.WriteDifferingAndRevert
         fMeshes = saveStaticModel(
-            triConverterInfo, fModel, tempObj, transformMatrix, name, convertTextureData, revert_materials, None
+            triConverterInfo, fModel, exportObj, transformMatrix, name, convertTextureData, revert_materials, None
         )
-        cleanupCombineObj(tempObj, meshList)
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-    except Exception as e:
-        cleanupCombineObj(tempObj, meshList)
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-        raise Exception(str(e))
 
     return fMeshes
 
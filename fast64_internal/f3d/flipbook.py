@@ -253,23 +253,81 @@ def ootFlipbookAnimUpdate(self, armatureObj: bpy.types.Object, segment: str, ind
 # END GAME SPECIFIC CALLBACKS
 
 
+def isFlipbookAnimatedArmature(obj: bpy.types.Object) -> bool:
+    # we only want to update texture on keyframed armatures.
+    # this somewhat mitigates the issue of two skeletons using the same flipbook material.
+    if obj.type != "ARMATURE" or obj.animation_data is None or obj.animation_data.action is None:
+        return False
+    action = obj.animation_data.action
+    return not (
+        action.fcurves.find("ootLinkTextureAnim.eyes") is None
+        or action.fcurves.find("ootLinkTextureAnim.mouth") is None
+    )
+
+
+class FlipbookArmatureIndex:
+    """
+    Armatures whose actions keyframe ootLinkTextureAnim, along with the eyes/mouth indices last applied to each.
+    Rebuilt on the next frame change after objects or actions are updated, a file is loaded or an undo step is applied.
+    Material updates can change the texture an index resolves to, so they only reset the last applied indices.
+    """
+
+    def __init__(self):
+        self.armatureObjs: list[bpy.types.Object] | None = None
+        self.objectCount = -1
+        # armature name : (eyes, mouth)
+        self.lastIndices: dict[str, tuple[int, int]] = {}
+
+    def invalidate(self):
+        self.armatureObjs = None
+        self.lastIndices.clear()
+
+    def getArmatureObjects(self) -> list[bpy.types.Object]:
+        if self.armatureObjs is None or self.objectCount != len(bpy.data.objects):
+            self.armatureObjs = [obj for obj in bpy.data.objects if isFlipbookAnimatedArmature(obj)]
+            self.objectCount = len(bpy.data.objects)
+            self.lastIndices.clear()
+        return self.armatureObjs
+
+
+flipbookArmatureIndex = FlipbookArmatureIndex()
+
+
+@persistent
+def flipbookArmatureIndexDepsgraphHandler(scene, depsgraph):
+    if depsgraph.id_type_updated("ACTION") or depsgraph.id_type_updated("OBJECT"):
+        flipbookArmatureIndex.invalidate()
+    elif depsgraph.id_type_updated("MATERIAL"):
+        # setTexNodeImage only writes changed images, so reapplying after its own update settles in one frame
+        flipbookArmatureIndex.lastIndices.clear()
+
+
+@persistent
+def flipbookArmatureIndexResetHandler(*args):
+    flipbookArmatureIndex.invalidate()
+
+
+flipbookIndexResetHandlers = ("load_post", "undo_post", "redo_post")
+
+
 # we use a handler since update functions are not called when a property is animated.
 @persistent
 def flipbookAnimHandler(dummy):
     if bpy.context.scene.gameEditorMode == "OOT":
-        for obj in bpy.data.objects:
-            if obj.type == "ARMATURE":
-                # we only want to update texture on keyframed armatures.
-                # this somewhat mitigates the issue of two skeletons using the same flipbook material.
-                if obj.animation_data is None or obj.animation_data.action is None:
-                    continue
-                action = obj.animation_data.action
-                if not (
-                    action.fcurves.find("ootLinkTextureAnim.eyes") is None
-                    or action.fcurves.find("ootLinkTextureAnim.mouth") is None
-                ):
-                    ootFlipbookAnimUpdate(obj.data, obj, "8", obj.ootLinkTextureAnim.eyes)
-                    ootFlipbookAnimUpdate(obj.data, obj, "9", obj.ootLinkTextureAnim.mouth)
+        lastIndices = flipbookArmatureIndex.lastIndices
+        try:
+            for obj in flipbookArmatureIndex.getArmatureObjects():
+                eyes = obj.ootLinkTextureAnim.eyes
+                mouth = obj.ootLinkTextureAnim.mouth
+                lastEyes, lastMouth = lastIndices.get(obj.name, (None, None))
+                if eyes != lastEyes:
+                    ootFlipbookAnimUpdate(obj.data, obj, "8", eyes)
+                if mouth != lastMouth:
+                    ootFlipbookAnimUpdate(obj.data, obj, "9", mouth)
+                lastIndices[obj.name] = (eyes, mouth)
+        except ReferenceError:
+            # An indexed armature was removed without an update reaching the index
+            flipbookArmatureIndex.invalidate()
     else:
         pass
 
@@ -325,6 +383,9 @@ def flipbook_register():
         register_class(cls)
 
     bpy.app.handlers.frame_change_pre.append(flipbookAnimHandler)
+    bpy.app.handlers.depsgraph_update_post.append(flipbookArmatureIndexDepsgraphHandler)
+    for handlerName in flipbookIndexResetHandlers:
+        getattr(bpy.app.handlers, handlerName).append(flipbookArmatureIndexResetHandler)
     bpy.types.Material.flipbookGroup = bpy.props.PointerProperty(type=FlipbookGroupProperty)
 
 
@@ -333,4 +394,8 @@ def flipbook_unregister():
         unregister_class(cls)
 
     bpy.app.handlers.frame_change_pre.remove(flipbookAnimHandler)
+    bpy.app.handlers.depsgraph_update_post.remove(flipbookArmatureIndexDepsgraphHandler)
+    for handlerName in flipbookIndexResetHandlers:
+        getattr(bpy.app.handlers, handlerName).remove(flipbookArmatureIndexResetHandler)
+    flipbookArmatureIndex.invalidate()
     del bpy.types.Material.flipbookGroup
@@ -1,5 +1,7 @@
 # This is not in the f3d package since copying materials requires copying collision settings from all games as well.
 
+from contextlib import contextmanager
+
 import bpy
 from bpy.utils import register_class, unregister_class
 from .f3d.f3d_material import *
@@ -8,9 +10,39 @@ from .utility import *
 from bl_operators.presets import AddPresetBase
 
 
+# material : every (object, slot index) that uses it
+MaterialUsers = dict[bpy.types.Material, list[tuple[bpy.types.Object, int]]]
+
+
+def collect_material_users(objs) -> MaterialUsers:
+    """
+    Shared materials are listed once, so each is converted once no matter how many objects use it.
+    Materials are ordered by their first use.
+    """
+    users: MaterialUsers = {}
+    for obj in objs:
+        for index, slot in enumerate(obj.material_slots):
+            if slot.material is not None:
+                users.setdefault(slot.material, []).append((obj, index))
+    return users
+
+
+@contextmanager
+def material_progress(total: int):
+    """Yields a function that reports how many materials are done in the window manager's progress cursor."""
+    wm = bpy.context.window_manager
+    if wm is None or total == 0:
+        yield lambda done: None
+        return
+    wm.progress_begin(0, total)
+    try:
+        yield wm.progress_update
+    finally:
+        wm.progress_end()
+
+
 def upgrade_f3d_version_all_meshes() -> None:
     objs = [obj for obj in bpy.data.objects if obj.type == "MESH"]
-    f3d_node_tree = get_f3d_node_tree()
 
     # Remove original v2 node groups so that they can be recreated.
     deleteGroups = []
@@ -22,19 +54,19 @@ def upgrade_f3d_version_all_meshes() -> None:
 
     set_best_draw_layer_for_materials()
 
-    # Dict of non-f3d materials : converted f3d materials
-    # handles cases where materials are used in multiple objects
-    materialDict = {}
-    for obj in objs:
-        upgradeF3DVersionOneObject(obj, materialDict, f3d_node_tree)
+    upgrade_f3d_version_materials(collect_material_users(objs))
 
 
-def upgradeF3DVersionOneObject(obj, materialDict, f3d_node_tree: bpy.types.NodeTree):
-    for index in range(len(obj.material_slots)):
-        material = obj.material_slots[index].material
-        if material is not None and material.is_f3d and material not in materialDict:
+def upgrade_f3d_version_materials(users: MaterialUsers):
+    f3d_node_tree = get_f3d_node_tree()
+    materials = [material for material in users if material.is_f3d]
+    with material_progress(len(materials)) as progress:
+        for done, material in enumerate(materials):
+            obj, index = users[material][0]
             convertF3DtoNewVersion(obj, index, material, f3d_node_tree)
-            materialDict[material] = material
+            progress(done + 1)
+        # Node updates from the conversions are queued, apply them once per material before returning
+        flush_f3d_node_updates()
 
 
 V4PresetName = {
@@ -78,6 +110,31 @@ def has_valid_mat_ver(material: bpy.types.Material):
     return getattr(material, "mat_ver", -1) >= 1
 
 
+def set_material_draw_layer(mat: bpy.types.Material, draw_layer: str):
+    mat.f3d_update_flag = True
+    with bpy.context.temp_override(material=mat):
+        mat.f3d_mat.draw_layer.sm64 = draw_layer
+
+
+def get_first_polygon_per_material(obj: bpy.types.Object) -> dict[bpy.types.Material, int]:
+    """Index of the first polygon using each material, read with one foreach_get instead of visiting every polygon."""
+    polygons = obj.data.polygons
+    material_indices = [0] * len(polygons)
+    polygons.foreach_get("material_index", material_indices)
+
+    first_polygons: dict[bpy.types.Material, int] = {}
+    slots = obj.material_slots
+    seen_slots = set()
+    for polygon_index, slot_index in enumerate(material_indices):
+        if slot_index in seen_slots or slot_index >= len(slots):
+            continue
+        seen_slots.add(slot_index)
+        first_polygons.setdefault(slots[slot_index].material, polygon_index)
+        if len(seen_slots) == len(slots):
+            break
+    return first_polygons
+
+
 def set_best_draw_layer_for_materials():
     bone_map = {}
     for armature in bpy.data.armatures:
@@ -87,48 +144,38 @@ def set_best_draw_layer_for_materials():
 
     finished_mats = set()
 
-    objects = bpy.data.objects
+    def needs_draw_layer(mat: bpy.types.Material):
+        return has_valid_mat_ver(mat) and mat.mat_ver < 4 and mat.name not in finished_mats
+
+    objects = [obj for obj in bpy.data.objects if obj.type == "MESH"]
     obj: bpy.types.Object = None
     for obj in objects:
-        if obj.type != "MESH" or len(obj.material_slots) < 1:
+        if len(obj.material_slots) < 1:
             continue
 
-        p: bpy.types.MeshPolygon = None
-        for p in obj.data.polygons:
-            mat: bpy.types.Material = obj.material_slots[p.material_index].material
-            if not has_valid_mat_ver(mat) or mat.mat_ver >= 4 or mat.name in finished_mats:
+        for mat, polygon_index in get_first_polygon_per_material(obj).items():
+            if not needs_draw_layer(mat):
                 continue
-            mat.f3d_update_flag = True
             # default to object's draw layer
-            with bpy.context.temp_override(material=mat):
-                mat.f3d_mat.draw_layer.sm64 = obj.draw_layer_static
+            set_material_draw_layer(mat, obj.draw_layer_static)
 
             if len(obj.vertex_groups) == 0:
-                continue  # object doesn't have vertex groups
+                # object doesn't have vertex groups, a later object with vertex groups can still override it
+                continue
 
             # get vertex group in the polygon
-            group = get_group_from_polygon(obj, p)
+            group = get_group_from_polygon(obj, obj.data.polygons[polygon_index])
             if isinstance(group, bpy.types.VertexGroup):
                 # check for matching bone from group name
                 bone = bone_map.get(group.name)
                 if bone is not None:
-                    mat.f3d_update_flag = True
                     # override material draw later with bone's draw layer
-                    with bpy.context.temp_override(material=mat):
-                        mat.f3d_mat.draw_layer.sm64 = bone.draw_layer
+                    set_material_draw_layer(mat, bone.draw_layer)
             finished_mats.add(mat.name)
 
-    for obj in objects:
-        if obj.type != "MESH":
-            continue
-        for mat_slot in obj.material_slots:
-            mat: bpy.types.Material = mat_slot.material
-            if not has_valid_mat_ver(mat) or mat.mat_ver >= 4 or mat.name in finished_mats:
-                continue
-
-            mat.f3d_update_flag = True
-            with bpy.context.temp_override(material=mat):
-                mat.f3d_mat.draw_layer.sm64 = obj.draw_layer_static
+    for mat, users in collect_material_users(objects).items():
+        if needs_draw_layer(mat):
+            set_material_draw_layer(mat, users[0][0].draw_layer_static)
             finished_mats.add(mat.name)
 
 
@@ -165,22 +212,25 @@ def convertF3DtoNewVersion(
 
 
 def convertAllBSDFtoF3D(objs, renameUV):
-    # Dict of non-f3d materials : converted f3d materials
-    # handles cases where materials are used in multiple objects
-    materialDict = {}
-    for obj in objs:
-        if renameUV:
+    if renameUV:
+        for obj in objs:
             for uv_layer in obj.data.uv_layers:
                 uv_layer.name = "UVMap"
-        for index in range(len(obj.material_slots)):
-            material = obj.material_slots[index].material
-            if material is not None and not material.is_f3d:
-                if material in materialDict:
-                    print("Existing material")
+
+    # Each non-f3d material is converted once for its first user, then the other slots are reassigned in bulk.
+    users = {material: slots for material, slots in collect_material_users(objs).items() if not material.is_f3d}
+    # Dict of non-f3d materials : converted f3d materials
+    materialDict = {}
+    with material_progress(len(users)) as progress:
+        for done, (material, slots) in enumerate(users.items()):
+            obj, index = slots[0]
+            convertBSDFtoF3D(obj, index, material, materialDict)
+            if material in materialDict:
+                for obj, index in slots[1:]:
                     obj.material_slots[index].material = materialDict[material]
-                else:
-                    print("New material")
-                    convertBSDFtoF3D(obj, index, material, materialDict)
+            progress(done + 1)
+        flush_f3d_node_updates()
+    print(f"Converted {len(materialDict)} of {len(users)} materials.")
 
 
 def convertBSDFtoF3D(obj, index, material, materialDict):
@@ -287,7 +337,7 @@ class MatUpdateConvert(bpy.types.Operator):
                     raise PluginError("Mesh not selected.")
 
                 obj = context.selected_objects[0]
-                upgradeF3DVersionOneObject(obj, {}, get_f3d_node_tree())
+                upgrade_f3d_version_materials(collect_material_users([obj]))
 
         except Exception as e:
             raisePluginError(self, e)
@@ -1,6 +1,6 @@
 from os import path
 from dataclasses import dataclass
-from .oot_getters import getXMLRoot
+from .oot_getters import getXMLRoot, loadCachedXMLData
 from .oot_data import OoT_BaseElement
 
 
@@ -16,6 +16,9 @@ class OoT_ActorData:
     def __init__(self):
         # Path to the ``ActorList.xml`` file
         actorXML = path.dirname(path.abspath(__file__)) + "/xml/ActorList.xml"
+        loadCachedXMLData(self, actorXML, self.loadFromXML)
+
+    def loadFromXML(self, actorXML: str):
         actorRoot = getXMLRoot(actorXML)
 
         # general actor list
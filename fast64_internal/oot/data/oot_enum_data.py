@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from os import path
-from .oot_getters import getXMLRoot
+from .oot_getters import getXMLRoot, loadCachedXMLData
 from .oot_data import OoT_BaseElement
 
 # Note: "enumData" in this context refers to an OoT Object file (like ``gameplay_keep``)
@@ -55,11 +55,14 @@ class OoT_EnumData:
     """Cutscene and misc enum data"""
 
     def __init__(self):
+        # Path to the ``EnumData.xml`` file
+        enumDataXML = path.dirname(path.abspath(__file__)) + "/xml/EnumData.xml"
+        loadCachedXMLData(self, enumDataXML, self.loadFromXML)
+
+    def loadFromXML(self, enumDataXML: str):
         # general enumData list
         self.enumDataList: list[OoT_EnumElement] = []
 
-        # Path to the ``EnumData.xml`` file
-        enumDataXML = path.dirname(path.abspath(__file__)) + "/xml/EnumData.xml"
         enumDataRoot = getXMLRoot(enumDataXML)
 
         for enum in enumDataRoot.iterfind("Enum"):
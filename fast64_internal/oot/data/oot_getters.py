@@ -1,5 +1,12 @@
+import os, pickle
+from functools import cache
+from hashlib import sha256
+from typing import Any, Callable
 from xml.etree.ElementTree import parse as parseXML, Element
 
+# Modules that define what the cached data holds, a change to any of them rebuilds existing caches
+XML_LOADER_MODULES = ("oot_getters.py", "oot_data.py", "oot_actor_data.py", "oot_object_data.py", "oot_enum_data.py")
+
 
 def getXMLRoot(xmlPath: str) -> Element:
     """Parse an XML file and return its root element"""
@@ -9,3 +16,85 @@ def getXMLRoot(xmlPath: str) -> Element:
         from ...utility import PluginError
 
         raise PluginError(f"ERROR: File '{xmlPath}' is missing or malformed.")
+
+
+def getXMLCachePath(xmlPath: str) -> str:
+    return xmlPath + ".cache"
+
+
+@cache
+def getXMLLoaderHash() -> str:
+    """Hash of the sources of the XML loading classes"""
+    loaderHash = sha256()
+    for moduleName in XML_LOADER_MODULES:
+        with open(os.path.join(os.path.dirname(__file__), moduleName), "rb") as moduleFile:
+            loaderHash.update(moduleFile.read())
+    return loaderHash.hexdigest()
+
+
+def readXMLCache(xmlPath: str, xmlStat: os.stat_result, dataType: type) -> dict[str, Any] | None:
+    """Returns the cached attributes, or None if the cache is missing, unreadable or stale"""
+    try:
+        with open(getXMLCachePath(xmlPath), "rb") as cacheFile:
+            header, data = pickle.load(cacheFile)
+        if not isinstance(header, dict) or not isinstance(data, dict):
+            return None
+        if header.get("loader") != getXMLLoaderHash() or header.get("type") != dataType.__qualname__:
+            return None
+        if header.get("mtime") == xmlStat.st_mtime_ns and header.get("size") == xmlStat.st_size:
+            return data
+        cachedHash = header.get("hash")
+    except Exception:
+        # missing, corrupted, or written by another version (e.g. the classes moved)
+        return None
+
+    # The file was touched (e.g. by a checkout), only rebuild if its contents changed
+    with open(xmlPath, "rb") as xmlFile:
+        if cachedHash != sha256(xmlFile.read()).hexdigest():
+            return None
+    writeXMLCache(xmlPath, xmlStat, dataType, data)
+    return data
+
+
+def writeXMLCache(xmlPath: str, xmlStat: os.stat_result, dataType: type, data: dict[str, Any]):
+    with open(xmlPath, "rb") as xmlFile:
+        xmlHash = sha256(xmlFile.read()).hexdigest()
+    header = {
+        "loader": getXMLLoaderHash(),
+        "type": dataType.__qualname__,
+        "mtime": xmlStat.st_mtime_ns,
+        "size": xmlStat.st_size,
+        "hash": xmlHash,
+    }
+    cachePath = getXMLCachePath(xmlPath)
+    tempPath = f"{cachePath}.{os.getpid()}.tmp"
+    try:
+        with open(tempPath, "wb") as cacheFile:
+            pickle.dump((header, data), cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tempPath, cachePath)
+    except OSError:
+        # the addon folder may be read only, parsing every time still works
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+
+
+def loadCachedXMLData(dataObj: object, xmlPath: str, loadFromXML: Callable[[str], None]):
+    """
+    Fills dataObj's attributes from a pickle cache next to the XML file, keyed by the file's mtime and hash
+    and by the hash of the loader modules.
+    If the cache is stale, loadFromXML parses the XML instead and the cache is rewritten.
+    """
+    try:
+        xmlStat = os.stat(xmlPath)
+    except OSError:
+        xmlStat = None
+
+    if xmlStat is not None:
+        data = readXMLCache(xmlPath, xmlStat, type(dataObj))
+        if data is not None:
+            dataObj.__dict__.update(data)
+            return
+
+    loadFromXML(xmlPath)
+    if xmlStat is not None:
+        writeXMLCache(xmlPath, xmlStat, type(dataObj), dataObj.__dict__)
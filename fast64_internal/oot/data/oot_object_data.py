@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from os import path
 from ...utility import PluginError
-from .oot_getters import getXMLRoot
+from .oot_getters import getXMLRoot, loadCachedXMLData
 from .oot_data import OoT_BaseElement
 
 # Note: "object" in this context refers to an OoT Object file (like ``gameplay_keep``)
@@ -16,11 +16,14 @@ class OoT_ObjectData:
     """Everything related to OoT objects"""
 
     def __init__(self):
+        # Path to the ``ObjectList.xml`` file
+        objectXML = path.dirname(path.abspath(__file__)) + "/xml/ObjectList.xml"
+        loadCachedXMLData(self, objectXML, self.loadFromXML)
+
+    def loadFromXML(self, objectXML: str):
         # general object list
         self.objectList: list[OoT_ObjectElement] = []
 
-        # Path to the ``ObjectList.xml`` file
-        objectXML = path.dirname(path.abspath(__file__)) + "/xml/ObjectList.xml"
         objectRoot = getXMLRoot(objectXML)
 
         for obj in objectRoot.iterfind("Object"):
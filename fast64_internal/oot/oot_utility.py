@@ -4,23 +4,23 @@ import os
 import re
 
 from ast import parse, Expression, Num, UnaryOp, USub, Invert, BinOp
-from mathutils import Vector
+from mathutils import Matrix, Vector
 from bpy.types import Object
 from bpy.utils import register_class, unregister_class
+from bpy.app.handlers import persistent
 from bpy.types import Object
 from typing import Callable, Optional, TYPE_CHECKING
 from .oot_constants import ootSceneIDToName
 from dataclasses import dataclass
 
+from ..export_source import ExportHierarchy, get_export_objects
 from ..utility import (
     PluginError,
     prop_split,
     getDataFromFile,
     saveDataToFile,
-    attemptModifierApply,
-    setOrigin,
-    applyRotation,
     cleanupDuplicatedObjects,
+    transform_mtx_blender_to_n64,
     ootGetSceneOrRoomHeader,
     hexOrDecInt,
     binOps,
@@ -292,49 +292,37 @@ class OOTObjectCategorizer:
 
 # This also sets all origins relative to the scene object.
 def ootDuplicateHierarchy(obj, ignoreAttr, includeEmpties, objectCategorizer) -> tuple[Object, list[Object]]:
-    # Duplicate objects to apply scale / modifiers / linked data
-    bpy.ops.object.select_all(action="DESELECT")
-    ootSelectMeshChildrenOnly(obj, includeEmpties)
-    obj.select_set(True)
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.duplicate()
-    try:
-        tempObj = bpy.context.view_layer.objects.active
-        allObjs = bpy.context.selected_objects
-        bpy.ops.object.make_single_user(obdata=True)
+    exportObjs = get_export_objects(
+        obj,
+        lambda child: child.type == "MESH" or (includeEmpties and child.type in {"EMPTY", "CAMERA", "CURVE"}),
+    )
+    for exportObj in exportObjs:
+        exportObj.original_name = exportObj.name
 
+    # Copies objects with modifiers applied and single user data
+    hierarchy = ExportHierarchy(exportObjs)
+    allObjs = hierarchy.objects
+    try:
+        tempObj = hierarchy.copies[obj]
         objectCategorizer.sortObjects(allObjs)
         meshObjs = objectCategorizer.meshes
-        bpy.ops.object.select_all(action="DESELECT")
-        for selectedObj in meshObjs:
-            selectedObj.select_set(True)
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True, properties=False)
-
+        hierarchy.apply_transform(meshObjs, location=False, rotation=True, scale=True)
         for selectedObj in meshObjs:
-            bpy.ops.object.select_all(action="DESELECT")
-            selectedObj.select_set(True)
-            bpy.context.view_layer.objects.active = selectedObj
-            for modifier in selectedObj.modifiers:
-                attemptModifierApply(modifier)
-        for selectedObj in meshObjs:
-            setOrigin(obj, selectedObj)
+            hierarchy.apply_transform([selectedObj], location=True, rotation=True, scale=True)
+            hierarchy.set_origin(selectedObj, obj.location)
         if ignoreAttr is not None:
             for selectedObj in meshObjs:
                 if getattr(selectedObj, ignoreAttr):
-                    for child in selectedObj.children:
-                        bpy.ops.object.select_all(action="DESELECT")
-                        child.select_set(True)
-                        bpy.ops.object.parent_clear(type="CLEAR_KEEP_TRANSFORM")
-                        selectedObj.parent.select_set(True)
-                        bpy.ops.object.parent_set(keep_transform=True)
-                    selectedObj.parent = None
+                    for child in hierarchy.children(selectedObj):
+                        hierarchy.reparent(child, selectedObj.parent)
+                    hierarchy.reparent(selectedObj, None)
 
         # Assume objects with these types of constraints are parented, and are
         # intended to be parented in-game, i.e. rendered as an extra DL alongside
         # a skeletal mesh, e.g. for a character to be wearing or holding it.
         # In this case we purely want the transformation of the object relative
         # to whatever it's parented to. Getting rid of the constraint and then
-        # doing transform_apply() sets up this transformation.
+        # applying the transform sets up this transformation.
         hasConstraint = False
         for constraint in tempObj.constraints:
             if (
@@ -357,35 +345,25 @@ def ootDuplicateHierarchy(obj, ignoreAttr, includeEmpties, objectCategorizer) ->
                 tempObj.constraints.remove(constraint)
         if not hasConstraint:
             # For normal objects, the game's coordinate system is 90 degrees
-            # away from Blender's.
-            applyRotation([tempObj], math.radians(90), "X")
+            # away from Blender's. The rotation is around the object's origin, and its children follow it.
+            world = hierarchy.worlds[tempObj]
+            pivot = Matrix.Translation(world.translation)
+            rotation = pivot @ transform_mtx_blender_to_n64() @ pivot.inverted()
+            hierarchy.set_world(tempObj, rotation @ world, moveChildren=True)
+            hierarchy.apply_transform([tempObj], location=False, rotation=True, scale=True)
         else:
             # This is a relative transform we care about so the 90 degrees
             # doesn't matter (since they're both right-handed).
             print("Applying transform")
-            bpy.ops.object.select_all(action="DESELECT")
-            tempObj.select_set(True)
-            bpy.context.view_layer.objects.active = tempObj
-            bpy.ops.object.transform_apply()
+            hierarchy.apply_transform([tempObj], location=True, rotation=True, scale=True)
 
+        hierarchy.update()
         return tempObj, allObjs
     except Exception as e:
         cleanupDuplicatedObjects(allObjs)
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
         raise Exception(str(e))
 
 
-def ootSelectMeshChildrenOnly(obj, includeEmpties):
-    isMesh = obj.type == "MESH"
-    isEmpty = (obj.type == "EMPTY" or obj.type == "CAMERA" or obj.type == "CURVE") and includeEmpties
-    if isMesh or isEmpty:
-        obj.select_set(True)
-        obj.original_name = obj.name
-    for child in obj.children:
-        ootSelectMeshChildrenOnly(child, includeEmpties)
-
-
 def ootCleanupScene(originalSceneObj, allObjs):
     cleanupDuplicatedObjects(allObjs)
     originalSceneObj.select_set(True)
@@ -747,6 +725,69 @@ def getHeaderSettings(actorObj: bpy.types.Object):
     return headerSettings
 
 
+class OOTObjectRegistry:
+    """
+    Caches scene/room objects and actor/path objects, so header tab changes don't scan all of bpy.data.objects.
+    The cache is rebuilt on next access after objects are added or removed, an object's OoT type changes,
+    a file is loaded or an undo step is applied.
+    """
+
+    def __init__(self):
+        self.headerObjs: list[bpy.types.Object] = []
+        self.actorObjs: list[bpy.types.Object] = []
+        self.objectCount = -1
+        self.valid = False
+
+    def invalidate(self):
+        self.valid = False
+
+    def refresh(self):
+        if self.valid and self.objectCount == len(bpy.data.objects):
+            return
+        headerObjs = []
+        actorObjs = []
+        for obj in bpy.data.objects:
+            if obj.ootEmptyType in {"Scene", "Room"}:
+                headerObjs.append(obj)
+            elif obj.ootEmptyType in {"Actor", "Transition Actor", "Entrance"} or isPathObject(obj):
+                actorObjs.append(obj)
+        self.headerObjs = headerObjs
+        self.actorObjs = actorObjs
+        self.objectCount = len(bpy.data.objects)
+        self.valid = True
+
+    def getHeaderObjects(self) -> list[bpy.types.Object]:
+        self.refresh()
+        return self.headerObjs
+
+    def getActorObjects(self) -> list[bpy.types.Object]:
+        self.refresh()
+        return self.actorObjs
+
+
+ootObjectRegistry = OOTObjectRegistry()
+
+
+def invalidateOOTObjectRegistry(self=None, context=None):
+    """Can be used directly as a property update callback."""
+    ootObjectRegistry.invalidate()
+
+
+@persistent
+def ootObjectRegistryDepsgraphHandler(scene, depsgraph):
+    # Only the object count is checked here, since header tab changes are object property updates too
+    if ootObjectRegistry.objectCount != len(bpy.data.objects):
+        ootObjectRegistry.invalidate()
+
+
+@persistent
+def ootObjectRegistryResetHandler(*args):
+    ootObjectRegistry.invalidate()
+
+
+registryResetHandlers = ("load_post", "undo_post", "redo_post")
+
+
 oot_utility_classes = (
     OOTCollectionAdd,
     OOTCollectionRemove,
@@ -758,15 +799,27 @@ def oot_utility_register():
     for cls in oot_utility_classes:
         register_class(cls)
 
+    bpy.app.handlers.depsgraph_update_post.append(ootObjectRegistryDepsgraphHandler)
+    for handlerName in registryResetHandlers:
+        getattr(bpy.app.handlers, handlerName).append(ootObjectRegistryResetHandler)
+
 
 def oot_utility_unregister():
+    for handlerName in registryResetHandlers:
+        handlers = getattr(bpy.app.handlers, handlerName)
+        if ootObjectRegistryResetHandler in handlers:
+            handlers.remove(ootObjectRegistryResetHandler)
+    if ootObjectRegistryDepsgraphHandler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(ootObjectRegistryDepsgraphHandler)
+    ootObjectRegistry.invalidate()
+
     for cls in reversed(oot_utility_classes):
         unregister_class(cls)
 
 
 def getActiveHeaderIndex() -> int:
     # All scenes/rooms should have synchronized tabs from property callbacks
-    headerObjs = [obj for obj in bpy.data.objects if obj.ootEmptyType == "Scene" or obj.ootEmptyType == "Room"]
+    headerObjs = ootObjectRegistry.getHeaderObjects()
     if len(headerObjs) == 0:
         return 0
 
@@ -801,13 +854,7 @@ def getActiveHeaderIndex() -> int:
 def setAllActorsVisibility(self, context: bpy.types.Context):
     activeHeaderInfo = getActiveHeaderIndex()
 
-    actorObjs = [
-        obj
-        for obj in bpy.data.objects
-        if obj.ootEmptyType in ["Actor", "Transition Actor", "Entrance"] or isPathObject(obj)
-    ]
-
-    for actorObj in actorObjs:
+    for actorObj in ootObjectRegistry.getActorObjects():
         setActorVisibility(actorObj, activeHeaderInfo)
 
 
@@ -822,13 +869,18 @@ def setActorVisibility(actorObj: bpy.types.Object, activeHeaderInfo: tuple[int,
     if headerSettings is None:
         return
     if headerSettings.sceneSetupPreset == "All Scene Setups":
-        actorObj.hide_set(False)
+        hide = False
     elif headerSettings.sceneSetupPreset == "All Non-Cutscene Scene Setups":
-        actorObj.hide_set(headerIndex >= 4)
+        hide = headerIndex >= 4
     elif headerSettings.sceneSetupPreset == "Custom":
-        actorObj.hide_set(not headerSettings.checkHeader(headerIndex))
+        hide = not headerSettings.checkHeader(headerIndex)
     else:
         print("Error: unhandled header case")
+        return
+
+    # hide_set tags the view layer for an update, so skip objects that are already in the right state
+    if actorObj.hide_get() != hide:
+        actorObj.hide_set(hide)
 
 
 def onMenuTabChange(self, context: bpy.types.Context):
@@ -866,11 +918,7 @@ def onHeaderPropertyChange(self, context: bpy.types.Context, callback: Callable[
 
     thisHeader = self
     thisObj = context.object
-    otherObjs = [
-        obj
-        for obj in bpy.data.objects
-        if (obj.ootEmptyType == "Scene" or obj.ootEmptyType == "Room") and obj != thisObj
-    ]
+    otherObjs = [obj for obj in ootObjectRegistry.getHeaderObjects() if obj != thisObj]
 
     for otherObj in otherObjs:
         callback(thisHeader, otherObj)
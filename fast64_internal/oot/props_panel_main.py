@@ -1,7 +1,7 @@
 import bpy
 from bpy.utils import register_class, unregister_class
 from ..utility import prop_split, gammaInverse
-from .oot_utility import getSceneObj, getRoomObj
+from .oot_utility import getSceneObj, getRoomObj, invalidateOOTObjectRegistry
 from .scene.properties import OOTSceneProperties
 from .room.properties import OOTObjectProperty, OOTRoomHeaderProperty, OOTAlternateRoomHeaderProperty
 from .collision.properties import OOTWaterBoxProperty
@@ -18,7 +18,7 @@ from .actor.properties import (
     OOTEntranceProperty,
 )
 
-# Make sure to add exceptions in utility.py - selectMeshChildrenOnly
+# Make sure to add exceptions in oot_utility.py - ootDuplicateHierarchy
 ootEnumEmptyType = [
     ("None", "None", "None"),
     ("Scene", "Scene", "Scene"),
@@ -67,6 +67,7 @@ def setLightPropertyValues(lightProp, ambient, diffuse0, diffuse1, fogColor, fog
 
 
 def onUpdateOOTEmptyType(self, context):
+    invalidateOOTObjectRegistry()
     isNoneEmpty = self.ootEmptyType == "None"
     isBoxEmpty = self.ootEmptyType == "Water Box"
     isSphereEmpty = self.ootEmptyType == "Cull Group"
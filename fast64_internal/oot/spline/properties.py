@@ -2,7 +2,7 @@ from bpy.types import PropertyGroup, Object, UILayout
 from bpy.props import EnumProperty, PointerProperty, StringProperty, IntProperty
 from bpy.utils import register_class, unregister_class
 from ...utility import prop_split
-from ..oot_utility import drawEnumWithCustom
+from ..oot_utility import drawEnumWithCustom, invalidateOOTObjectRegistry
 from ..collision.constants import ootEnumCameraCrawlspaceSType
 from ..actor.properties import OOTActorHeaderProperty
 from ..scene.properties import OOTAlternateSceneHeaderProperty
@@ -12,7 +12,7 @@ ootSplineEnum = [("Path", "Path", "Path"), ("Crawlspace", "Crawlspace", "Crawlsp
 
 
 class OOTSplineProperty(PropertyGroup):
-    splineType: EnumProperty(items=ootSplineEnum, default="Path")
+    splineType: EnumProperty(items=ootSplineEnum, default="Path", update=invalidateOOTObjectRegistry)
     index: IntProperty(min=0)  # only used for crawlspace, not path
     headerSettings: PointerProperty(type=OOTActorHeaderProperty)
     camSType: EnumProperty(items=ootEnumCameraCrawlspaceSType, default="CAM_SET_CRAWLSPACE")
@@ -55,6 +55,14 @@ class SM64_Properties(PropertyGroup):
         description=f"Sets bank 4 range to ({hex(defaultExtendSegment4[0])}, "
         f"{hex(defaultExtendSegment4[1])}) and copies data from old bank",
     )
+    compress_segment: BoolProperty(
+        name="Compress Exported Segment (MIO0)",
+        description="After a binary export, MIO0 compresses the whole segment the data was exported into, "
+        "writes it to the compressed data range and changes the segment's level script load to LOAD_MIO0. "
+        "Doesn't apply to bank 0 or DMA exports",
+    )
+    compressed_segment_start: StringProperty(name="Start", default="3E00000")
+    compressed_segment_end: StringProperty(name="End", default="4000000")
 
     address_converter: PointerProperty(type=SM64_AddrConvProperties)
     # C
@@ -81,6 +89,10 @@ class SM64_Properties(PropertyGroup):
         description="Exports account for matstack fix requirements",
     )
 
+    @property
+    def compressed_segment_range(self):
+        return (int(self.compressed_segment_start, 16), int(self.compressed_segment_end, 16))
+
     @property
     def binary_export(self):
         return self.export_type in ["Binary", "Insertable Binary"]
@@ -145,6 +157,10 @@ class SM64_Properties(PropertyGroup):
             export_rom_ui_warnings(col, self.export_rom)
             col.prop(self, "output_rom")
             col.prop(self, "extend_bank_4")
+            col.prop(self, "compress_segment")
+            if self.compress_segment:
+                prop_split(col, self, "compressed_segment_start", "Compressed Data Start")
+                prop_split(col, self, "compressed_segment_end", "Compressed Data End")
         elif not self.binary_export:
             prop_split(col, self, "decomp_path", "Decomp Path")
             directory_ui_warnings(col, abspath(self.decomp_path))
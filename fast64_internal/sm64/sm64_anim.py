@@ -1,8 +1,9 @@
-import bpy, os, copy, shutil, mathutils, math
+import bpy, os, copy, shutil, mathutils, math, struct
 from bpy.utils import register_class, unregister_class
 from ..panels import SM64_Panel
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_level_parser import parseLevelAtPointer, checkExportAddress
 from .sm64_rom_tweaks import ExtendBank0x04
+from .sm64_compression import compressExportedSegment
 from .sm64_geolayout_bone import animatableBoneTypes
 
 from ..utility import (
@@ -34,6 +35,7 @@ from ..utility import (
     writeBoxExportType,
     stashActionInArmature,
     enumExportHeaderType,
+    ArmaturePoseSampler,
 )
 
 from .sm64_constants import (
@@ -99,6 +101,79 @@ class SM64_ShortArray:
         return data
 
 
+class SM64_AnimValuePool:
+    """
+    Builds a shared values table for animation channels.
+    Identical channels and channels contained in already emitted data reuse the existing offset,
+    and a channel whose start matches the end of the table only appends its non overlapping part.
+    """
+
+    hashBase = 0x10001
+    hashMod = (1 << 61) - 1
+
+    def __init__(self):
+        self.values: list[int] = []
+        self.valuesBytes = bytearray()  # big endian copy of values, for substring search
+        self.offsets: dict[tuple[int, ...], int] = {}
+        self.requestedSize = 0
+
+    def add_channels(self, channels: list[list[int]]) -> list[int]:
+        """Adds all channels at once and returns their offsets into the table, in the same order."""
+        channels = [tuple(channel) for channel in channels]
+        self.requestedSize += sum(len(channel) for channel in channels)
+
+        # Longest first, so that shorter channels are more likely to be found inside longer ones.
+        for channel in sorted(set(channels), key=len, reverse=True):
+            if channel not in self.offsets:
+                self.offsets[channel] = self.insert(channel)
+
+        return [self.offsets[channel] for channel in channels]
+
+    def insert(self, channel: tuple[int, ...]) -> int:
+        if len(channel) == 0:
+            return len(self.values)
+
+        index = self.find(channel)
+        if index is not None:
+            return index
+
+        overlap = self.suffix_prefix_overlap(channel)
+        offset = len(self.values) - overlap
+        self.values.extend(channel[overlap:])
+        self.valuesBytes += b"".join(value.to_bytes(2, "big") for value in channel[overlap:])
+        return offset
+
+    def find(self, channel: tuple[int, ...]):
+        valuesBytes = self.valuesBytes
+        channelBytes = b"".join(value.to_bytes(2, "big") for value in channel)
+        index = valuesBytes.find(channelBytes)
+        while index != -1:
+            if index % 2 == 0:
+                return index // 2
+            index = valuesBytes.find(channelBytes, index + 1)
+        return None
+
+    def suffix_prefix_overlap(self, channel: tuple[int, ...]) -> int:
+        """Longest k such that the last k table values equal the first k channel values, using rolling hashes."""
+        values = self.values
+        base, mod = SM64_AnimValuePool.hashBase, SM64_AnimValuePool.hashMod
+        prefixHash = 0
+        suffixHash = 0
+        power = 1
+        best = 0
+        for k in range(1, min(len(values), len(channel)) + 1):
+            prefixHash = (prefixHash * base + channel[k - 1]) % mod
+            suffixHash = (values[-k] * power + suffixHash) % mod
+            power = (power * base) % mod
+            if prefixHash == suffixHash and list(channel[:k]) == values[-k:]:
+                best = k
+        return best
+
+    @property
+    def bytes_saved(self) -> int:
+        return (self.requestedSize - len(self.values)) * 2
+
+
 class SM64_AnimationHeader:
     def __init__(
         self,
@@ -119,6 +194,7 @@ class SM64_AnimationHeader:
         self.transformValuesStart = transformValuesStart
         self.transformIndicesStart = transformIndicesStart
         self.animSize = animSize  # DMA animations only
+        self.valuesName = name + "_values"  # differs when the values table is shared between animations
 
         self.transformIndices = []
 
@@ -171,8 +247,8 @@ class SM64_AnimationHeader:
             + self.name
             + "_indices),\n"
             + "\t"
-            + self.name
-            + "_values,\n"
+            + self.valuesName
+            + ",\n"
             + "\t"
             + self.name
             + "_indices,\n"
@@ -276,22 +352,24 @@ def exportAnimationC(armatureObj, loopAnim, dirPath, dirName, groupName, customE
             f.write(stringData)
 
     if not customExport:
-        if headerType == "Actor":
-            groupPathC = os.path.join(dirPath, groupName + ".c")
-            groupPathH = os.path.join(dirPath, groupName + ".h")
-
-            writeIfNotFound(groupPathC, '\n#include "' + dirName + '/anims/data.inc.c"', "")
-            writeIfNotFound(groupPathC, '\n#include "' + dirName + '/anims/table.inc.c"', "")
-            writeIfNotFound(groupPathH, '\n#include "' + dirName + '/anim_header.h"', "#endif")
-        elif headerType == "Level":
-            groupPathC = os.path.join(dirPath, "leveldata.c")
-            groupPathH = os.path.join(dirPath, "header.h")
-
-            writeIfNotFound(groupPathC, '\n#include "levels/' + levelName + "/" + dirName + '/anims/data.inc.c"', "")
-            writeIfNotFound(groupPathC, '\n#include "levels/' + levelName + "/" + dirName + '/anims/table.inc.c"', "")
-            writeIfNotFound(
-                groupPathH, '\n#include "levels/' + levelName + "/" + dirName + '/anim_header.h"', "\n#endif"
-            )
+        writeAnimGroupIncludes(dirPath, dirName, groupName, headerType, levelName)
+
+
+def writeAnimGroupIncludes(dirPath, dirName, groupName, headerType, levelName):
+    if headerType == "Actor":
+        groupPathC = os.path.join(dirPath, groupName + ".c")
+        groupPathH = os.path.join(dirPath, groupName + ".h")
+
+        writeIfNotFound(groupPathC, '\n#include "' + dirName + '/anims/data.inc.c"', "")
+        writeIfNotFound(groupPathC, '\n#include "' + dirName + '/anims/table.inc.c"', "")
+        writeIfNotFound(groupPathH, '\n#include "' + dirName + '/anim_header.h"', "#endif")
+    elif headerType == "Level":
+        groupPathC = os.path.join(dirPath, "leveldata.c")
+        groupPathH = os.path.join(dirPath, "header.h")
+
+        writeIfNotFound(groupPathC, '\n#include "levels/' + levelName + "/" + dirName + '/anims/data.inc.c"', "")
+        writeIfNotFound(groupPathC, '\n#include "levels/' + levelName + "/" + dirName + '/anims/table.inc.c"', "")
+        writeIfNotFound(groupPathH, '\n#include "levels/' + levelName + "/" + dirName + '/anim_header.h"', "\n#endif")
 
 
 def exportAnimationBinary(romfile, exportRange, armatureObj, DMAAddresses, segmentData, isDMA, loopAnim):
@@ -345,7 +423,161 @@ def exportAnimationInsertableBinary(filepath, armatureObj, isDMA, loopAnim):
     )
 
 
-def exportAnimationCommon(armatureObj, loopAnim, name):
+def getArmatureActions(armatureObj):
+    """Returns the active action followed by the actions stashed in the armature's NLA tracks, without duplicates."""
+    actions = []
+    animData = armatureObj.animation_data
+    if animData is None:
+        return actions
+    if animData.action is not None:
+        actions.append(animData.action)
+    for track in animData.nla_tracks:
+        for strip in track.strips:
+            if strip.action is not None and strip.action not in actions:
+                actions.append(strip.action)
+    return actions
+
+
+def exportAnimationTableCommon(armatureObj, actions, loopAnim, name, shareValues):
+    """
+    Converts every action in one pass, reusing the bone traversal order.
+    If shareValues is set, all animations point into a single values table.
+    DMA animations are loaded one at a time, so they must each keep their own table.
+    """
+    if len(actions) == 0:
+        raise PluginError("No actions to export.")
+
+    animBones = getAnimBones(armatureObj)
+    valuePool = SM64_AnimValuePool() if shareValues else None
+    sm64_anims = []
+    previousAction = armatureObj.animation_data.action
+    try:
+        for action in actions:
+            armatureObj.animation_data.action = action
+            sm64_anims.append(exportAnimationCommon(armatureObj, loopAnim, name, animBones, valuePool))
+    finally:
+        armatureObj.animation_data.action = previousAction
+
+    if valuePool is not None:
+        for sm64_anim in sm64_anims:
+            sm64_anim.header.valuesName = toAlnum(name) + "_values"
+        print(
+            f"Animation table values: {len(valuePool.values) * 2} bytes, {valuePool.bytes_saved} bytes saved by sharing."
+        )
+
+    return sm64_anims, valuePool
+
+
+def exportAnimationTableC(
+    armatureObj, actions, loopAnim, dirPath, dirName, groupName, customExport, headerType, levelName
+):
+    dirPath, texDir = getExportDir(customExport, dirPath, headerType, levelName, "", dirName)
+
+    animsName = dirName + "_anims"
+    sm64_anims, valuePool = exportAnimationTableCommon(armatureObj, actions, loopAnim, dirName + "_anim", True)
+
+    geoDirPath = os.path.join(dirPath, toAlnum(dirName))
+    if not os.path.exists(geoDirPath):
+        os.mkdir(geoDirPath)
+
+    animDirPath = os.path.join(geoDirPath, "anims")
+    if not os.path.exists(animDirPath):
+        os.mkdir(animDirPath)
+
+    values = SM64_ShortArray(sm64_anims[0].header.valuesName, True)
+    values.shortData = valuePool.values
+    data = values.to_c() + "\n"
+    for sm64_anim in sm64_anims:
+        data += sm64_anim.indices.to_c() + "\n" + sm64_anim.header.to_c() + "\n"
+
+    with open(os.path.join(animDirPath, "data.inc.c"), "w", newline="\n") as dataFile:
+        dataFile.write(data)
+
+    table = "const struct Animation *const " + animsName + "[] = {\n"
+    for sm64_anim in sm64_anims:
+        table += f"\t&{sm64_anim.header.name},\n"
+    table += "\tNULL,\n};\n"
+    with open(os.path.join(animDirPath, "table.inc.c"), "w", newline="\n") as tableFile:
+        tableFile.write(table)
+
+    with open(os.path.join(geoDirPath, "anim_header.h"), "w", newline="\n") as headerFile:
+        headerFile.write("extern const struct Animation *const " + animsName + "[];\n")
+
+    if not customExport:
+        writeAnimGroupIncludes(dirPath, dirName, groupName, headerType, levelName)
+
+    return len(sm64_anims)
+
+
+def getAnimationTableBinaryData(sm64_anims, valuePool, segmentData, isDMA, startAddress):
+    """
+    DMA tables use the vanilla Mario layout: count, source address (set at runtime), then an offset/size pair
+    per animation, relative to the start of the table. Each animation is self contained.
+    Otherwise, all headers and indices are followed by the shared values table and a NULL terminated pointer table.
+    Returns the data and the offset of the table within it.
+    """
+    data = bytearray()
+    if isDMA:
+        entriesSize = 8 + 8 * len(sm64_anims)
+        animsData = bytearray()
+        entries = bytearray()
+        for sm64_anim in sm64_anims:
+            offset = get64bitAlignedAddr(entriesSize + len(animsData))
+            animsData.extend(bytearray(offset - entriesSize - len(animsData)))
+            animData = sm64_anim.to_binary(segmentData, True, 0)
+            entries.extend(offset.to_bytes(4, "big") + len(animData).to_bytes(4, "big"))
+            animsData.extend(animData)
+        data.extend(len(sm64_anims).to_bytes(4, "big") + bytearray(4) + entries + animsData)
+        return data, 0
+
+    # Headers are 0x1A bytes, padded so every header starts 8 byte aligned and its values/indices pointers 4 byte aligned
+    headerSize = get64bitAlignedAddr(0x1A)
+    indicesStart = headerSize * len(sm64_anims)
+    valuesStart = indicesStart + sum(len(sm64_anim.indices.shortData) * 2 for sm64_anim in sm64_anims)
+    headers = bytearray()
+    indices = bytearray()
+    for sm64_anim in sm64_anims:
+        sm64_anim.header.transformIndicesStart = indicesStart + len(indices)
+        sm64_anim.header.transformValuesStart = valuesStart
+        header = sm64_anim.header.to_binary(segmentData, False, startAddress)
+        headers.extend(header + bytearray(headerSize - len(header)))
+        indices.extend(sm64_anim.indices.to_binary())
+
+    values = SM64_ShortArray("values", True)
+    values.shortData = valuePool.values
+    data.extend(headers + indices + values.to_binary())
+
+    tableOffset = get64bitAlignedAddr(len(data))
+    data.extend(bytearray(tableOffset - len(data)))
+    for i in range(len(sm64_anims)):
+        data.extend(encodeSegmentedAddr(startAddress + headerSize * i, segmentData))
+    data.extend(bytearray(4))
+    return data, tableOffset
+
+
+def exportAnimationTableBinary(romfile, exportRange, armatureObj, actions, segmentData, isDMA, loopAnim):
+    startAddress = get64bitAlignedAddr(exportRange[0])
+    sm64_anims, valuePool = exportAnimationTableCommon(armatureObj, actions, loopAnim, armatureObj.name, not isDMA)
+    data, tableOffset = getAnimationTableBinaryData(sm64_anims, valuePool, segmentData, isDMA, startAddress)
+
+    if startAddress + len(data) > exportRange[1]:
+        raise PluginError(
+            "Size too big: Data ends at "
+            + hex(startAddress + len(data))
+            + ", which is larger than the specified range."
+        )
+
+    romfile.seek(startAddress)
+    romfile.write(data)
+
+    return (startAddress, startAddress + len(data)), startAddress + tableOffset, len(sm64_anims)
+
+
+def exportAnimationCommon(armatureObj, loopAnim, name, animBones=None, valuePool=None):
+    """
+    Converts the active action of the armature.
+    animBones and valuePool can be shared between calls when exporting several actions, see exportAnimationTableCommon.
+    """
     if armatureObj.animation_data is None or armatureObj.animation_data.action is None:
         raise PluginError("No active animation selected.")
 
@@ -363,12 +595,12 @@ def exportAnimationCommon(armatureObj, loopAnim, name):
         armatureObj,
         frame_start=frame_start,
         frame_count=(frame_last - frame_start + 1),
+        animBones=animBones,
     )
 
     repetitions = 0 if loopAnim else 1
     marioYOffset = 0x00  # ??? Seems to be this value for most animations
 
-    transformValuesOffset = 0
     headerSize = 0x1A
     transformIndicesStart = headerSize  # 0x18 if including animSize?
 
@@ -378,30 +610,30 @@ def exportAnimationCommon(armatureObj, loopAnim, name):
     # transformValuesStart = transformIndicesStart + (nodeCount + 1) * 3 * 4
     transformValuesStart = transformIndicesStart
 
-    for translationFrameProperty in translationData:
-        frameCount = len(translationFrameProperty.frames)
-        sm64_anim.indices.shortData.append(frameCount)
-        sm64_anim.indices.shortData.append(transformValuesOffset)
+    channels = [
+        [
+            int.from_bytes(value.to_bytes(2, "big", signed=True), byteorder="big", signed=False)
+            for value in translationFrameProperty.frames
+        ]
+        for translationFrameProperty in translationData
+    ]
+    for boneFrameData in armatureFrameData:
+        for boneFrameDataProperty in boneFrameData:
+            channels.append(boneFrameDataProperty.frames)
+
+    # Constant, repeated and overlapping channels share their values, like in vanilla animations.
+    sharedValues = valuePool is not None
+    if not sharedValues:
+        valuePool = SM64_AnimValuePool()
+    for channel, transformValuesOffset in zip(channels, valuePool.add_channels(channels)):
         if (transformValuesOffset) > 2**16 - 1:
             raise PluginError("Animation is too large.")
-        transformValuesOffset += frameCount
+        sm64_anim.indices.shortData.append(len(channel))
+        sm64_anim.indices.shortData.append(transformValuesOffset)
         transformValuesStart += 4
-        for value in translationFrameProperty.frames:
-            sm64_anim.values.shortData.append(
-                int.from_bytes(value.to_bytes(2, "big", signed=True), byteorder="big", signed=False)
-            )
-
-    for boneFrameData in armatureFrameData:
-        for boneFrameDataProperty in boneFrameData:
-            frameCount = len(boneFrameDataProperty.frames)
-            sm64_anim.indices.shortData.append(frameCount)
-            sm64_anim.indices.shortData.append(transformValuesOffset)
-            if (transformValuesOffset) > 2**16 - 1:
-                raise PluginError("Animation is too large.")
-            transformValuesOffset += frameCount
-            transformValuesStart += 4
-            for value in boneFrameDataProperty.frames:
-                sm64_anim.values.shortData.append(value)
+    sm64_anim.values.shortData = valuePool.values
+    if not sharedValues:
+        print(f"Animation values: {len(valuePool.values) * 2} bytes, {valuePool.bytes_saved} bytes saved by sharing.")
 
     animSize = headerSize + len(sm64_anim.indices.shortData) * 2 + len(sm64_anim.values.shortData) * 2
 
@@ -419,16 +651,14 @@ def exportAnimationCommon(armatureObj, loopAnim, name):
     return sm64_anim
 
 
-def convertAnimationData(anim, armatureObj, *, frame_start, frame_count):
+def getAnimBones(armatureObj):
     bonesToProcess = findStartBones(armatureObj)
-    currentBone = armatureObj.data.bones[bonesToProcess[0]]
     animBones = []
 
     # Get animation bones in order
     while len(bonesToProcess) > 0:
         boneName = bonesToProcess[0]
         currentBone = armatureObj.data.bones[boneName]
-        currentPoseBone = armatureObj.pose.bones[boneName]
         bonesToProcess = bonesToProcess[1:]
 
         # Only handle 0x13 bones for animation
@@ -439,40 +669,44 @@ def convertAnimationData(anim, armatureObj, *, frame_start, frame_count):
         childrenNames = sorted([bone.name for bone in currentBone.children])
         bonesToProcess = childrenNames + bonesToProcess
 
+    return animBones
+
+
+def convertAnimationData(anim, armatureObj, *, frame_start, frame_count, animBones=None):
+    if animBones is None:
+        animBones = getAnimBones(armatureObj)
+
     # list of boneFrameData, which is [[x frames], [y frames], [z frames]]
     translationData = [ValueFrameData(0, i, []) for i in range(3)]
     armatureFrameData = [
         [ValueFrameData(i, 0, []), ValueFrameData(i, 1, []), ValueFrameData(i, 2, [])] for i in range(len(animBones))
     ]
 
-    currentFrame = bpy.context.scene.frame_current
-    for frame in range(frame_start, frame_start + frame_count):
-        bpy.context.scene.frame_set(frame)
-        rootPoseBone = armatureObj.pose.bones[animBones[0]]
+    scaleMatrix = mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4)
+    restInverses = [armatureObj.data.bones[boneName].matrix.to_4x4().inverted() for boneName in animBones]
+    parentNames = [
+        currentBone.parent.name if currentBone.parent is not None else None
+        for currentBone in (armatureObj.data.bones[boneName] for boneName in animBones)
+    ]
 
-        translation = (
-            mathutils.Matrix.Scale(bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4) @ rootPoseBone.matrix_basis
-        ).decompose()[0]
+    for poseFrame in ArmaturePoseSampler(armatureObj).sample(frame_start, frame_count):
+        translation = (scaleMatrix @ poseFrame.matrix_basis[animBones[0]]).decompose()[0]
         saveTranslationFrame(translationData, translation)
 
         for boneIndex in range(len(animBones)):
-            boneName = animBones[boneIndex]
-            currentBone = armatureObj.data.bones[boneName]
-            currentPoseBone = armatureObj.pose.bones[boneName]
+            poseMatrix = poseFrame.matrix[animBones[boneIndex]]
+            parentName = parentNames[boneIndex]
 
-            rotationValue = (currentBone.matrix.to_4x4().inverted() @ currentPoseBone.matrix).to_quaternion()
-            if currentBone.parent is not None:
+            # rest pose local, compared to current pose local
+            if parentName is not None:
                 rotationValue = (
-                    currentBone.matrix.to_4x4().inverted()
-                    @ currentPoseBone.parent.matrix.inverted()
-                    @ currentPoseBone.matrix
+                    restInverses[boneIndex] @ poseFrame.matrix[parentName].inverted() @ poseMatrix
                 ).to_quaternion()
-
-                # rest pose local, compared to current pose local
+            else:
+                rotationValue = (restInverses[boneIndex] @ poseMatrix).to_quaternion()
 
             saveQuaternionFrame(armatureFrameData[boneIndex], rotationValue)
 
-    bpy.context.scene.frame_set(currentFrame)
     removeTrailingFrames(translationData)
     for frameData in armatureFrameData:
         removeTrailingFrames(frameData)
@@ -521,25 +755,16 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
     # property index = 0,1,2 (aka x,y,z)
     for boneFrameData in armatureFrameData:
         if isRootTranslation:
-            for propertyIndex in range(3):
-                fcurve = anim.fcurves.new(
-                    data_path='pose.bones["' + startBoneName + '"].location',
-                    index=propertyIndex,
-                    action_group=startBoneName,
-                )
-                for frame in range(len(boneFrameData[propertyIndex])):
-                    fcurve.keyframe_points.insert(frame, boneFrameData[propertyIndex][frame])
+            dataPath = 'pose.bones["' + startBoneName + '"].location'
+            groupName = startBoneName
             isRootTranslation = False
         else:
             bone, boneStack = getNextBone(boneStack, armatureObj)
-            for propertyIndex in range(3):
-                fcurve = anim.fcurves.new(
-                    data_path='pose.bones["' + bone.name + '"].rotation_euler',
-                    index=propertyIndex,
-                    action_group=bone.name,
-                )
-                for frame in range(len(boneFrameData[propertyIndex])):
-                    fcurve.keyframe_points.insert(frame, boneFrameData[propertyIndex][frame])
+            dataPath = 'pose.bones["' + bone.name + '"].rotation_euler'
+            groupName = bone.name
+        for propertyIndex in range(3):
+            fcurve = anim.fcurves.new(data_path=dataPath, index=propertyIndex, action_group=groupName)
+            insertKeyframes(fcurve, boneFrameData[propertyIndex])
 
     if armatureObj.animation_data is None:
         armatureObj.animation_data_create()
@@ -548,6 +773,16 @@ def importAnimationToBlender(romfile, startAddress, armatureObj, segmentData, is
     armatureObj.animation_data.action = anim
 
 
+def insertKeyframes(fcurve, values):
+    """Adds one keyframe per frame, starting at frame 0, in a single batch."""
+    coordinates = [0.0] * (len(values) * 2)
+    coordinates[0::2] = range(len(values))
+    coordinates[1::2] = values
+    fcurve.keyframe_points.add(len(values))
+    fcurve.keyframe_points.foreach_set("co", coordinates)
+    fcurve.update()
+
+
 def readAnimation(name, romfile, startAddress, segmentData, isDMA):
     animationHeader = readAnimHeader(name, romfile, startAddress, segmentData, isDMA)
 
@@ -564,65 +799,52 @@ def readAnimation(name, romfile, startAddress, segmentData, isDMA):
     # SM64toBlender: ZXY (set anim keyframes and model armature)
     # new bones should extrude in +Y direction
 
+    # Values are read as one table, sized to the furthest frame referenced by any index.
+    valuesSize = max(
+        index.startOffset + index.numFrames * 2
+        for indexNode in animationHeader.transformIndices
+        for index in (indexNode.x, indexNode.y, indexNode.z)
+    )
+    romfile.seek(animationHeader.transformValuesStart)
+    valuesData = romfile.read(valuesSize)
+    valueCount = len(valuesData) // 2
+    unsignedValues = struct.unpack(">" + str(valueCount) + "H", valuesData[: valueCount * 2])
+    signedValues = struct.unpack(">" + str(valueCount) + "h", valuesData[: valueCount * 2])
+
     # handle root translation
-    boneFrameData = [[], [], []]
     rootIndexNode = animationHeader.transformIndices[0]
-    boneFrameData[0] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.x)
-    ]
-    boneFrameData[1] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.y)
-    ]
-    boneFrameData[2] = [
-        n for n in getKeyFramesTranslation(romfile, animationHeader.transformValuesStart, rootIndexNode.z)
-    ]
-    armatureFrameData.append(boneFrameData)
+    armatureFrameData.append(
+        [
+            getKeyFramesTranslation(signedValues, rootIndexNode.x),
+            getKeyFramesTranslation(signedValues, rootIndexNode.y),
+            getKeyFramesTranslation(signedValues, rootIndexNode.z),
+        ]
+    )
 
     # handle rotations
     for boneIndexNode in animationHeader.transformIndices[1:]:
-        boneFrameData = [[], [], []]
-
         # Transforming SM64 space to Blender space
-        boneFrameData[0] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.x)
-        ]
-        boneFrameData[1] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.y)
-        ]
-        boneFrameData[2] = [
-            n for n in getKeyFramesRotation(romfile, animationHeader.transformValuesStart, boneIndexNode.z)
-        ]
-
-        armatureFrameData.append(boneFrameData)
+        armatureFrameData.append(
+            [
+                getKeyFramesRotation(unsignedValues, boneIndexNode.x),
+                getKeyFramesRotation(unsignedValues, boneIndexNode.y),
+                getKeyFramesRotation(unsignedValues, boneIndexNode.z),
+            ]
+        )
 
     return (animationHeader, armatureFrameData)
 
 
-def getKeyFramesRotation(romfile, transformValuesStart, boneIndex):
-    ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
-
-    keyframes = []
-    for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        value = int.from_bytes(romfile.read(2), "big") * 360 / (2**16)
-        keyframes.append(math.radians(value))
+def getKeyFramesRotation(values, boneIndex):
+    start = boneIndex.startOffset // 2
+    scale = math.radians(360 / (2**16))
+    return [value * scale for value in values[start : start + boneIndex.numFrames]]
 
-    return keyframes
 
-
-def getKeyFramesTranslation(romfile, transformValuesStart, boneIndex):
-    ptrToValue = transformValuesStart + boneIndex.startOffset
-    romfile.seek(ptrToValue)
-
-    keyframes = []
-    for frame in range(boneIndex.numFrames):
-        romfile.seek(ptrToValue + frame * 2)
-        keyframes.append(
-            int.from_bytes(romfile.read(2), "big", signed=True) / bpy.context.scene.fast64.sm64.blender_to_sm64_scale
-        )
-
-    return keyframes
+def getKeyFramesTranslation(values, boneIndex):
+    start = boneIndex.startOffset // 2
+    scale = bpy.context.scene.fast64.sm64.blender_to_sm64_scale
+    return [value / scale for value in values[start : start + boneIndex.numFrames]]
 
 
 def readAnimHeader(name, romfile, startAddress, segmentData, isDMA):
@@ -666,36 +888,28 @@ def readAnimHeader(name, romfile, startAddress, segmentData, isDMA):
 
 
 def readAnimIndices(romfile, ptrAddress, nodeCount):
-    indices = []
-
-    # Handle root transform
-    rootPosIndex = readTransformIndex(romfile, ptrAddress)
-    indices.append(rootPosIndex)
+    # root translation, then one rotation per node, each as (numFrames, startOffset) for x, y and z
+    romfile.seek(ptrAddress)
+    indexData = struct.unpack(">" + str((nodeCount + 1) * 6) + "H", romfile.read((nodeCount + 1) * 12))
 
-    # Handle rotations
-    for i in range(nodeCount):
-        rotationIndex = readTransformIndex(romfile, ptrAddress + (i + 1) * 12)
-        indices.append(rotationIndex)
+    indices = []
+    for i in range(0, len(indexData), 6):
+        indices.append(
+            SM64_AnimIndexNode(
+                readValueIndex(indexData, i),
+                readValueIndex(indexData, i + 2),
+                readValueIndex(indexData, i + 4),
+            )
+        )
 
     return indices
 
 
-def readTransformIndex(romfile, startAddress):
-    x = readValueIndex(romfile, startAddress + 0)
-    y = readValueIndex(romfile, startAddress + 4)
-    z = readValueIndex(romfile, startAddress + 8)
-
-    return SM64_AnimIndexNode(x, y, z)
-
-
-def readValueIndex(romfile, startAddress):
-    romfile.seek(startAddress)
-    numFrames = int.from_bytes(romfile.read(2), "big")
-    romfile.seek(startAddress + 2)
+def readValueIndex(indexData, position):
+    numFrames = indexData[position]
 
     # multiply 2 because value is the index in array of shorts (???)
-    startOffset = int.from_bytes(romfile.read(2), "big") * 2
-    # print(str(hex(startAddress)) + ": " + str(numFrames) + " " + str(startOffset))
+    startOffset = indexData[position + 1] * 2
     return SM64_AnimIndex(numFrames, startOffset)
 
 
@@ -776,6 +990,8 @@ class SM64_ExportAnimMario(bpy.types.Operator):
                 segmentData = levelParsed.segmentData
                 if context.scene.fast64.sm64.extend_bank_4:
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
+                if not context.scene.isDMAExport:
+                    checkExportAddress(levelParsed, int(context.scene.animExportStart, 16))
 
                 DMAAddresses = None
                 if context.scene.animOverwriteDMAEntry:
@@ -807,6 +1023,11 @@ class SM64_ExportAnimMario(bpy.types.Operator):
                 else:
                     segmentedPtr = None
 
+                if context.scene.fast64.sm64.compress_segment and not context.scene.isDMAExport:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
                 romfileOutput.close()
                 if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
                     os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
@@ -858,6 +1079,121 @@ class SM64_ExportAnimMario(bpy.types.Operator):
         return {"FINISHED"}  # must return a set
 
 
+class SM64_ExportAnimTable(bpy.types.Operator):
+    bl_idname = "object.sm64_export_anim_table"
+    bl_label = "Export Animation Table"
+    bl_description = "Exports the active action and all actions stashed in the armature as one animation table"
+    bl_options = {"REGISTER", "UNDO", "PRESET"}
+
+    # Called on demand (i.e. button press, menu item)
+    # Can also be called from operator search menu (Spacebar)
+    def execute(self, context):
+        romfileOutput = None
+        tempROM = None
+        try:
+            if len(context.selected_objects) == 0 or not isinstance(
+                context.selected_objects[0].data, bpy.types.Armature
+            ):
+                raise PluginError("Armature not selected.")
+            if len(context.selected_objects) > 1:
+                raise PluginError("Multiple objects selected, make sure to select only one.")
+            if context.scene.fast64.sm64.export_type == "Insertable Binary":
+                raise PluginError("Animation tables cannot be exported as insertable binaries.")
+            armatureObj = context.selected_objects[0]
+            actions = getArmatureActions(armatureObj)
+            if context.mode != "OBJECT":
+                bpy.ops.object.mode_set(mode="OBJECT")
+        except Exception as e:
+            raisePluginError(self, e)
+            return {"CANCELLED"}
+
+        try:
+            # Rotate all armatures 90 degrees
+            applyRotation([armatureObj], math.radians(90), "X")
+
+            if context.scene.fast64.sm64.export_type == "C":
+                exportPath, levelName = getPathAndLevel(
+                    context.scene.animCustomExport,
+                    context.scene.animExportPath,
+                    context.scene.animLevelName,
+                    context.scene.animLevelOption,
+                )
+                if not context.scene.animCustomExport:
+                    applyBasicTweaks(exportPath)
+                animCount = exportAnimationTableC(
+                    armatureObj,
+                    actions,
+                    context.scene.loopAnimation,
+                    exportPath,
+                    bpy.context.scene.animName,
+                    bpy.context.scene.animGroupName,
+                    context.scene.animCustomExport,
+                    context.scene.animExportHeaderType,
+                    levelName,
+                )
+                self.report({"INFO"}, "Success! Exported " + str(animCount) + " animations.")
+            else:
+                export_rom_checks(bpy.path.abspath(context.scene.fast64.sm64.export_rom))
+                tempROM = tempName(context.scene.fast64.sm64.output_rom)
+                romfileExport = open(bpy.path.abspath(context.scene.fast64.sm64.export_rom), "rb")
+                shutil.copy(bpy.path.abspath(context.scene.fast64.sm64.export_rom), bpy.path.abspath(tempROM))
+                romfileExport.close()
+                romfileOutput = open(bpy.path.abspath(tempROM), "rb+")
+
+                levelParsed = parseLevelAtPointer(romfileOutput, level_pointers[context.scene.levelAnimExport])
+                segmentData = levelParsed.segmentData
+                if context.scene.fast64.sm64.extend_bank_4:
+                    ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
+                if not context.scene.isDMAExport:
+                    checkExportAddress(levelParsed, int(context.scene.animExportStart, 16))
+
+                addrRange, tableAddress, animCount = exportAnimationTableBinary(
+                    romfileOutput,
+                    [int(context.scene.animExportStart, 16), int(context.scene.animExportEnd, 16)],
+                    armatureObj,
+                    actions,
+                    segmentData,
+                    context.scene.isDMAExport,
+                    context.scene.loopAnimation,
+                )
+
+                if context.scene.fast64.sm64.compress_segment and not context.scene.isDMAExport:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
+                romfileOutput.close()
+                if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
+                    os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
+                os.rename(bpy.path.abspath(tempROM), bpy.path.abspath(context.scene.fast64.sm64.output_rom))
+
+                self.report(
+                    {"INFO"},
+                    "Success! "
+                    + str(animCount)
+                    + " animations at ("
+                    + hex(addrRange[0])
+                    + ", "
+                    + hex(addrRange[1])
+                    + "), table at "
+                    + hex(tableAddress)
+                    + ".",
+                )
+
+            applyRotation([armatureObj], math.radians(-90), "X")
+        except Exception as e:
+            applyRotation([armatureObj], math.radians(-90), "X")
+
+            if romfileOutput is not None:
+                romfileOutput.close()
+            if tempROM is not None and os.path.exists(bpy.path.abspath(tempROM)):
+                os.remove(bpy.path.abspath(tempROM))
+            raisePluginError(self, e)
+            return {"CANCELLED"}  # must return a set
+
+        return {"FINISHED"}  # must return a set
+
+
 class SM64_ExportAnimPanel(SM64_Panel):
     bl_idname = "SM64_PT_export_anim"
     bl_label = "SM64 Animation Exporter"
@@ -867,6 +1203,8 @@ class SM64_ExportAnimPanel(SM64_Panel):
     def draw(self, context):
         col = self.layout.column()
         propsAnimExport = col.operator(SM64_ExportAnimMario.bl_idname)
+        if context.scene.fast64.sm64.export_type != "Insertable Binary":
+            col.operator(SM64_ExportAnimTable.bl_idname)
 
         col.prop(context.scene, "loopAnimation")
 
@@ -1029,6 +1367,7 @@ class SM64_ImportAnimPanel(SM64_Panel):
 
 sm64_anim_classes = (
     SM64_ExportAnimMario,
+    SM64_ExportAnimTable,
     SM64_ImportAnimMario,
     SM64_ImportAllMarioAnims,
 )
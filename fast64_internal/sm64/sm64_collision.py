@@ -10,8 +10,9 @@ from .sm64_constants import (
 )
 from .sm64_utility import export_rom_checks
 from .sm64_objects import SM64_Area, start_process_sm64_objects
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_level_parser import parseLevelAtPointer, checkExportAddress
 from .sm64_rom_tweaks import ExtendBank0x04
+from .sm64_compression import compressExportedSegment
 from ..panels import SM64_Panel
 
 from ..utility import (
@@ -400,7 +401,22 @@ def exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren
         bpy.context.view_layer.objects.active = obj
         raise Exception(str(e))
 
-    collision = Collision(toAlnum(name) + "_collision")
+    collision = buildCollision(toAlnum(name) + "_collision", collisionDict)
+    if includeSpecials:
+        area = SM64_Area(areaIndex, "", "", "", None, None, [], name, None)
+        # This assumes that only levels will export with included specials,
+        # And that the collision exporter never will.
+        start_process_sm64_objects(obj, area, transformMatrix, True)
+        collision.specials = area.specials
+        collision.water_boxes = area.water_boxes
+
+    return collision
+
+
+# collisionDict is a dict of collisionType : list of (rounded face positions, specialParam, room),
+# as filled in by addCollisionTriangles. Doesn't touch bpy, so it can be benchmarked on its own.
+def buildCollision(name, collisionDict):
+    collision = Collision(name)
     for collisionType, faces in collisionDict.items():
         collision.triangles[collisionType] = []
         for faceVerts, specialParam, room in faces:
@@ -413,14 +429,6 @@ def exportCollisionCommon(obj, transformMatrix, includeSpecials, includeChildren
                 else:
                     indices.append(index)
             collision.triangles[collisionType].append(CollisionTriangle(indices, specialParam, room))
-    if includeSpecials:
-        area = SM64_Area(areaIndex, "", "", "", None, None, [], name, None)
-        # This assumes that only levels will export with included specials,
-        # And that the collision exporter never will.
-        start_process_sm64_objects(obj, area, transformMatrix, True)
-        collision.specials = area.specials
-        collision.water_boxes = area.water_boxes
-
     return collision
 
 
@@ -545,6 +553,7 @@ class SM64_ExportCollision(bpy.types.Operator):
 
                 if context.scene.fast64.sm64.extend_bank_4:
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
+                checkExportAddress(levelParsed, int(context.scene.colStartAddr, 16))
 
                 addrRange = exportCollisionBinary(
                     obj,
@@ -562,6 +571,11 @@ class SM64_ExportCollision(bpy.types.Operator):
                     romfileOutput.write(segAddress)
                 segPointer = bytesToHex(segAddress)
 
+                if context.scene.fast64.sm64.compress_segment:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
                 romfileOutput.close()
 
                 if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
@@ -0,0 +1,327 @@
+from ..utility import PluginError, get64bitAlignedAddr, getSegment
+from .sm64_level_constants import L_LOAD_ROM_SEG, L_LOAD_MIO0_SEG
+
+# Both formats share the same 4KB sliding window and 3 byte minimum match.
+LZ_WINDOW_SIZE = 0x1000
+LZ_MIN_MATCH = 3
+MIO0_MAX_MATCH = 0x12
+YAY0_MAX_MATCH = 0x111
+
+# How many previous occurrences of a 3 byte sequence are tried before giving up.
+# Higher values improve ratio at the cost of throughput.
+LZ_MAX_CHAIN = 64
+
+compressionHeaders = {
+    "mio0": b"MIO0",
+    "yay0": b"Yay0",
+}
+
+
+class HashChainMatchFinder:
+    """
+    Finds the longest previous match for a position using hash chains keyed on the next 3 bytes.
+    Since the key is the sequence itself, every candidate in a chain matches at least LZ_MIN_MATCH bytes.
+    """
+
+    def __init__(self, data: bytes, maxLength: int, maxChain: int = LZ_MAX_CHAIN):
+        self.data = data
+        self.maxLength = maxLength
+        self.maxChain = maxChain
+        self.head: dict[bytes, int] = {}
+        self.prev = [-1] * len(data)
+        self.inserted = 0
+
+    def insertUpTo(self, position: int):
+        data, head, prev = self.data, self.head, self.prev
+        end = min(position, len(data) - LZ_MIN_MATCH + 1)
+        for i in range(self.inserted, end):
+            key = data[i : i + LZ_MIN_MATCH]
+            prev[i] = head.get(key, -1)
+            head[key] = i
+        self.inserted = max(self.inserted, end)
+
+    def find(self, position: int) -> tuple[int, int]:
+        """Returns (length, distance), with a length of 0 if no match was found."""
+        data = self.data
+        limit = min(self.maxLength, len(data) - position)
+        if limit < LZ_MIN_MATCH:
+            return 0, 0
+
+        self.insertUpTo(position)
+        candidate = self.head.get(data[position : position + LZ_MIN_MATCH], -1)
+        minPosition = position - LZ_WINDOW_SIZE
+        bestLength = 0
+        bestDistance = 0
+        chain = self.maxChain
+        while candidate >= 0 and candidate >= minPosition and chain > 0:
+            # Cheap rejection: a longer match must also match at the current best length.
+            if data[candidate + bestLength] == data[position + bestLength]:
+                length = LZ_MIN_MATCH
+                while length < limit and data[candidate + length] == data[position + length]:
+                    length += 1
+                if length > bestLength:
+                    bestLength = length
+                    bestDistance = position - candidate
+                    if length == limit:
+                        break
+            candidate = self.prev[candidate]
+            chain -= 1
+
+        return bestLength, bestDistance
+
+
+def lzTokens(data: bytes, maxLength: int, maxChain: int = LZ_MAX_CHAIN):
+    """
+    Yields an int for each literal byte and a (length, distance) tuple for each back reference.
+    Uses one step lazy matching, which usually gains a few percent over greedy parsing.
+    """
+    finder = HashChainMatchFinder(data, maxLength, maxChain)
+    position = 0
+    dataLength = len(data)
+    nextMatch = None
+    while position < dataLength:
+        length, distance = nextMatch if nextMatch is not None else finder.find(position)
+        nextMatch = None
+        if length < LZ_MIN_MATCH:
+            yield data[position]
+            position += 1
+            continue
+
+        if length < maxLength and position + 1 < dataLength:
+            nextMatch = finder.find(position + 1)
+            if nextMatch[0] > length:
+                yield data[position]
+                position += 1
+                continue
+            nextMatch = None
+
+        yield (length, distance)
+        position += length
+
+
+class LZBitWriter:
+    def __init__(self):
+        self.words = bytearray()
+        self.current = 0
+        self.count = 0
+
+    def write(self, bit: bool):
+        self.current = (self.current << 1) | int(bit)
+        self.count += 1
+        if self.count == 32:
+            self.words += self.current.to_bytes(4, "big")
+            self.current = 0
+            self.count = 0
+
+    def getvalue(self) -> bytes:
+        if self.count > 0:
+            return bytes(self.words + (self.current << (32 - self.count)).to_bytes(4, "big"))
+        return bytes(self.words)
+
+
+def compressMIO0(data: bytes, maxChain: int = LZ_MAX_CHAIN) -> bytes:
+    data = bytes(data)
+    layout = LZBitWriter()
+    compressed = bytearray()
+    uncompressed = bytearray()
+    for token in lzTokens(data, MIO0_MAX_MATCH, maxChain):
+        if isinstance(token, int):
+            layout.write(True)
+            uncompressed.append(token)
+        else:
+            length, distance = token
+            layout.write(False)
+            compressed += (((length - 3) << 12) | (distance - 1)).to_bytes(2, "big")
+
+    layoutData = layout.getvalue()
+    compressedOffset = 0x10 + len(layoutData)
+    uncompressedOffset = compressedOffset + len(compressed)
+    header = (
+        compressionHeaders["mio0"]
+        + len(data).to_bytes(4, "big")
+        + compressedOffset.to_bytes(4, "big")
+        + uncompressedOffset.to_bytes(4, "big")
+    )
+    return header + layoutData + compressed + uncompressed
+
+
+def compressYay0(data: bytes, maxChain: int = LZ_MAX_CHAIN) -> bytes:
+    data = bytes(data)
+    layout = LZBitWriter()
+    links = bytearray()
+    chunks = bytearray()
+    for token in lzTokens(data, YAY0_MAX_MATCH, maxChain):
+        if isinstance(token, int):
+            layout.write(True)
+            chunks.append(token)
+        else:
+            length, distance = token
+            layout.write(False)
+            if length >= 0x12:
+                links += (distance - 1).to_bytes(2, "big")
+                chunks.append(length - 0x12)
+            else:
+                links += (((length - 2) << 12) | (distance - 1)).to_bytes(2, "big")
+
+    layoutData = layout.getvalue()
+    linkOffset = 0x10 + len(layoutData)
+    chunkOffset = linkOffset + len(links)
+    header = (
+        compressionHeaders["yay0"]
+        + len(data).to_bytes(4, "big")
+        + linkOffset.to_bytes(4, "big")
+        + chunkOffset.to_bytes(4, "big")
+    )
+    return header + layoutData + links + chunks
+
+
+def decompressMIO0(data: bytes) -> bytes:
+    if data[0:4] != compressionHeaders["mio0"]:
+        raise PluginError("Data does not start with a MIO0 header.")
+    size = int.from_bytes(data[4:8], "big")
+    compressedOffset = int.from_bytes(data[8:12], "big")
+    uncompressedOffset = int.from_bytes(data[12:16], "big")
+
+    output = bytearray()
+    layoutOffset = 0x10
+    bitsLeft = 0
+    layout = 0
+    while len(output) < size:
+        if bitsLeft == 0:
+            layout = int.from_bytes(data[layoutOffset : layoutOffset + 4], "big")
+            layoutOffset += 4
+            bitsLeft = 32
+        bitsLeft -= 1
+        if layout & (1 << bitsLeft):
+            output.append(data[uncompressedOffset])
+            uncompressedOffset += 1
+        else:
+            link = int.from_bytes(data[compressedOffset : compressedOffset + 2], "big")
+            compressedOffset += 2
+            start = len(output) - ((link & 0xFFF) + 1)
+            for i in range((link >> 12) + 3):
+                output.append(output[start + i])
+
+    return bytes(output[:size])
+
+
+def decompressYay0(data: bytes) -> bytes:
+    if data[0:4] != compressionHeaders["yay0"]:
+        raise PluginError("Data does not start with a Yay0 header.")
+    size = int.from_bytes(data[4:8], "big")
+    linkOffset = int.from_bytes(data[8:12], "big")
+    chunkOffset = int.from_bytes(data[12:16], "big")
+
+    output = bytearray()
+    layoutOffset = 0x10
+    bitsLeft = 0
+    layout = 0
+    while len(output) < size:
+        if bitsLeft == 0:
+            layout = int.from_bytes(data[layoutOffset : layoutOffset + 4], "big")
+            layoutOffset += 4
+            bitsLeft = 32
+        bitsLeft -= 1
+        if layout & (1 << bitsLeft):
+            output.append(data[chunkOffset])
+            chunkOffset += 1
+        else:
+            link = int.from_bytes(data[linkOffset : linkOffset + 2], "big")
+            linkOffset += 2
+            start = len(output) - ((link & 0xFFF) + 1)
+            length = link >> 12
+            if length == 0:
+                length = data[chunkOffset] + 0x12
+                chunkOffset += 1
+            else:
+                length += 2
+            for i in range(length):
+                output.append(output[start + i])
+
+    return bytes(output[:size])
+
+
+compressors = {
+    "mio0": compressMIO0,
+    "yay0": compressYay0,
+}
+
+decompressors = {
+    "mio0": decompressMIO0,
+    "yay0": decompressYay0,
+}
+
+
+def compressData(data: bytes, compressionFmt: str) -> bytes:
+    if compressionFmt not in compressors:
+        raise PluginError(f'Unsupported compression format "{compressionFmt}".')
+    return compressors[compressionFmt](data)
+
+
+def decompressData(data: bytes) -> bytes:
+    for compressionFmt, header in compressionHeaders.items():
+        if data[0:4] == header:
+            return decompressors[compressionFmt](data)
+    raise PluginError("Data is not MIO0 or Yay0 compressed.")
+
+
+def writeCompressedSegment(romfile, levelCommandPos, exportRange, compressionFmt="mio0"):
+    """
+    Compresses the ROM range loaded by the LOAD_RAW level command at levelCommandPos,
+    writes the result into exportRange and patches the command into a LOAD_MIO0 pointing at it.
+    Returns the written address range and the (uncompressed, compressed) sizes.
+    """
+    romfile.seek(levelCommandPos)
+    command = romfile.read(12)
+    if command[0] == L_LOAD_MIO0_SEG:
+        raise PluginError("Segment load at " + hex(levelCommandPos) + " is already compressed.")
+    if command[0] != L_LOAD_ROM_SEG:
+        raise PluginError("Level command at " + hex(levelCommandPos) + " is not a LOAD_RAW command.")
+
+    segmentStart = int.from_bytes(command[4:8], "big")
+    segmentEnd = int.from_bytes(command[8:12], "big")
+    romfile.seek(segmentStart)
+    data = romfile.read(segmentEnd - segmentStart)
+    compressed = compressData(data, compressionFmt)
+
+    startAddress = get64bitAlignedAddr(exportRange[0])
+    endAddress = startAddress + len(compressed)
+    if endAddress > exportRange[1]:
+        raise PluginError(
+            "Size too big: Data ends at " + hex(endAddress) + ", which is larger than the specified range."
+        )
+    romfile.seek(startAddress)
+    romfile.write(compressed)
+
+    romfile.seek(levelCommandPos)
+    romfile.write(L_LOAD_MIO0_SEG.to_bytes(1, "big"))
+    romfile.seek(levelCommandPos + 4)
+    romfile.write(startAddress.to_bytes(4, "big") + endAddress.to_bytes(4, "big"))
+
+    return (startAddress, endAddress), (len(data), len(compressed))
+
+
+def compressExportedSegment(romfile, levelParsed, exportAddress, compressedRange):
+    """
+    Used by binary exports with compression enabled. Compresses the whole segment that exportAddress was written into,
+    once all data and pointers inside it are written, and switches its load command to LOAD_MIO0.
+    """
+    segment = getSegment(exportAddress, levelParsed.segmentData)
+    if segment not in levelParsed.segmentLoadCommands:
+        raise PluginError(
+            f"Could not find the level command loading segment {segment:#04x}, so it can't be compressed."
+        )
+    # The segment's own range is free to reuse, since its data is read before the compressed data is written
+    for otherSegment, (start, end) in levelParsed.segmentData.items():
+        if otherSegment != segment and compressedRange[0] < end and start < compressedRange[1]:
+            raise PluginError(
+                f"The compressed data range overlaps segment {otherSegment:#04x} ({hex(start)}, {hex(end)}),"
+                " which is still loaded by the level. Choose a free ROM range."
+            )
+
+    addrRange, sizes = writeCompressedSegment(romfile, levelParsed.segmentLoadCommands[segment], compressedRange)
+    print(
+        f"Segment {segment:#04x} compressed from {hex(sizes[0])} to {hex(sizes[1])} bytes"
+        f" ({sizes[1] / max(sizes[0], 1):.1%}), at ({hex(addrRange[0])}, {hex(addrRange[1])})"
+    )
+    return segment, addrRange, sizes
@@ -48,7 +48,7 @@ class SM64_ImportDL(Operator):
                 else int(context.scene.DLImportStart, 16)
             )
             readObj = F3DtoBlenderObject(
-                romfileSrc, start, context.scene, "sm64_mesh", Matrix.Identity(4), segmentData, True
+                romfileSrc, start, context.scene, "sm64_mesh", Matrix.Identity(4), segmentData, context.scene.f3d_type
             )
 
             applyRotation([readObj], radians(-90), "X")
@@ -79,7 +79,7 @@ class SM64_ImportDLPanel(SM64_Panel):
         prop_split(col, context.scene, "DLImportStart", "Start Address")
         col.prop(context.scene, "levelDLImport")
         col.prop(context.scene, "isSegmentedAddrDLImport")
-        col.box().label(text="Only Fast3D mesh importing allowed.")
+        col.box().label(text="Display lists are decoded with the selected F3D Microcode.")
 
 
 sm64_dl_parser_classes = (SM64_ImportDL,)
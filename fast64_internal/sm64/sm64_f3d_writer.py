@@ -9,8 +9,9 @@ from ..f3d.f3d_texture_writer import TexInfo
 from ..f3d.f3d_material import TextureProperty, tmemUsageUI, all_combiner_uses, ui_procAnim
 from .sm64_texscroll import modifyTexScrollFiles, modifyTexScrollHeadersGroup
 from .sm64_utility import export_rom_checks, starSelectWarning
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_level_parser import parseLevelAtPointer, checkExportAddress
 from .sm64_rom_tweaks import ExtendBank0x04
+from .sm64_compression import compressExportedSegment
 from typing import Tuple, Union, Iterable
 
 from ..f3d.f3d_bleed import BleedGraphics
@@ -627,6 +628,8 @@ class SM64_ExportDL(bpy.types.Operator):
                 segmentData = levelParsed.segmentData
                 if context.scene.fast64.sm64.extend_bank_4:
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
+                if not context.scene.DLUseBank0:
+                    checkExportAddress(levelParsed, int(context.scene.DLExportStart, 16))
 
                 if context.scene.DLUseBank0:
                     startAddress, addrRange, segPointerData = exportF3DtoBinaryBank0(
@@ -651,6 +654,11 @@ class SM64_ExportDL(bpy.types.Operator):
                     romfileOutput.seek(int(context.scene.DLExportGeoPtr, 16))
                     romfileOutput.write(segPointerData)
 
+                if context.scene.fast64.sm64.compress_segment and not context.scene.DLUseBank0:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
                 romfileOutput.close()
                 if os.path.exists(bpy.path.abspath(context.scene.fast64.sm64.output_rom)):
                     os.remove(bpy.path.abspath(context.scene.fast64.sm64.output_rom))
@@ -510,6 +510,7 @@ class GeoLayoutBleed(BleedGraphics):
         for node in geo_layout_graph.startGeolayout.nodes:
             last_materials = walk(node, last_materials)
         self.clear_gfx_lists(fModel)
+        self.print_tmem_report()
 
 
 def convertAddrToFunc(addr):
@@ -1,6 +1,8 @@
-import bpy, mathutils, math, bmesh, copy
+import bpy, mathutils, math, copy
 from bpy.utils import register_class, unregister_class
-from ..f3d.f3d_parser import createBlankMaterial, parseF3DBinary
+from ..f3d.f3d_gbi import get_cached_F3D_GBI
+from ..f3d.f3d_material import createF3DMat
+from ..f3d.f3d_parser import F3DBinaryContext, parseF3DBinary
 from ..panels import SM64_Panel
 from .sm64_level_parser import parseLevelAtPointer
 from .sm64_constants import level_pointers, level_enums
@@ -69,8 +71,12 @@ def parseGeoLayout(
     convertTransformMatrix,
     useArmature,
     ignoreSwitch,
-    shadeSmooth,
+    f3dType,
 ):
+    # Display lists are decoded from the whole ROM, each mesh group gets its own context sharing the materials.
+    romfile.seek(0)
+    f3dContext = F3DBinaryContext(get_cached_F3D_GBI(f3dType), romfile.read(), segmentData, createF3DMat(None))
+
     currentAddress = startAddress
     romfile.seek(currentAddress)
 
@@ -79,10 +85,6 @@ def parseGeoLayout(
     mesh = bpy.data.meshes.new("skinnned-mesh")
     obj = bpy.data.objects.new("skinned", mesh)
     scene.collection.objects.link(obj)
-    createBlankMaterial(obj)
-
-    bMesh = bmesh.new()
-    bMesh.from_mesh(mesh)
 
     # Create new armature
     if useArmature:
@@ -107,7 +109,7 @@ def parseGeoLayout(
         [0x04, 0x00],
         [currentAddress],
         convertTransformMatrix.to_4x4(),
-        bMesh,
+        f3dContext,
         obj,
         armatureObj,
         None,
@@ -115,29 +117,18 @@ def parseGeoLayout(
         False,
         0,
         0,
-        [None] * 16 * 16,
         segmentData=segmentData,
     )
 
-    armatureMeshGroups.insert(0, (armatureObj, bMesh, obj))
+    armatureMeshGroups.insert(0, (armatureObj, f3dContext, obj))
 
+    # Dont weld across limbs, as importing geolayout all at once results
+    # in some overlapping verts from different display lists.
     for i in range(len(armatureMeshGroups)):
         listObj = armatureMeshGroups[i][2]
-        listBMesh = armatureMeshGroups[i][1]
-        listBMesh.to_mesh(listObj.data)
-        listBMesh.free()
-        listObj.data.update()
-
-        if shadeSmooth:
-            if bpy.context.mode != "OBJECT":
-                bpy.ops.object.mode_set(mode="OBJECT")
-            bpy.ops.object.select_all(action="DESELECT")
-            listObj.select_set(True)
-            bpy.ops.object.shade_smooth()
-
-    # Dont remove doubles here, as importing geolayout all at once results
-    # in some overlapping verts from different display lists.
-    # bmesh.ops.remove_doubles(bMesh, verts = bMesh.verts, dist = 0.000001)
+        listF3DContext = armatureMeshGroups[i][1]
+        listF3DContext.createMesh(listObj, True, False, False, weldAcrossLimbs=False)
+    f3dContext.deleteMaterialContext()
 
     if useArmature:
         # Set bone rotation mode.
@@ -188,7 +179,7 @@ def parseNode(
     currentCmd,
     jumps,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
@@ -196,7 +187,6 @@ def parseNode(
     ignoreNode,
     switchLevel,
     switchCount,
-    vertexBuffer,
     singleChild=False,
     endCmd=GEO_NODE_CLOSE,
     segmentData=None,
@@ -249,10 +239,11 @@ def parseNode(
                     nextParentTransform,
                     switchLevel,
                     switchCount,
+                    f3dContext,
                 )
                 armatureMeshGroups.append(armatureMeshTuple)
                 obj = armatureMeshTuple[2]
-                bMesh = armatureMeshTuple[1]
+                f3dContext = armatureMeshTuple[1]
                 nextParentBoneName = parentBoneName
                 armatureObj = armatureMeshTuple[0]
             switchLevel = switchCount
@@ -281,7 +272,7 @@ def parseNode(
                 currentCmd,
                 jumps,
                 nextParentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 nextParentBoneName,
@@ -289,7 +280,6 @@ def parseNode(
                 ignoreNode,
                 switchLevel,
                 switchCount,
-                vertexBuffer,
                 singleChild=switchActive,
                 segmentData=segmentData,
             )
@@ -330,14 +320,13 @@ def parseNode(
                 currentAddress,
                 currentCmd,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
                 ignoreNode,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_TRANSLATE:  # 0x11
@@ -346,14 +335,13 @@ def parseNode(
                 currentAddress,
                 currentCmd,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
                 ignoreNode,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_ROTATE:  # 0x12
@@ -362,14 +350,13 @@ def parseNode(
                 currentAddress,
                 currentCmd,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
                 ignoreNode,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_LOAD_DL_W_OFFSET:  # 0x13
@@ -377,7 +364,7 @@ def parseNode(
                 romfile,
                 currentAddress,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
@@ -385,7 +372,6 @@ def parseNode(
                 nodeIndex[-1],
                 currentCmd,
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_BILLBOARD:  # 0x14
@@ -394,14 +380,13 @@ def parseNode(
                 currentAddress,
                 currentCmd,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
                 ignoreNode,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_LOAD_DL:  # 0x15
@@ -409,7 +394,7 @@ def parseNode(
                 romfile,
                 currentAddress,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
@@ -417,7 +402,6 @@ def parseNode(
                 currentCmd,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_START_W_SHADOW:  # 0x16
@@ -462,14 +446,13 @@ def parseNode(
                 currentAddress,
                 currentCmd,
                 currentTransform,
-                bMesh,
+                f3dContext,
                 obj,
                 armatureObj,
                 parentBoneName,
                 ignoreNode,
                 nodeIndex[-1],
                 segmentData,
-                vertexBuffer,
             )
 
         elif currentCmd[0] == GEO_START_W_RENDERAREA:  # 0x20
@@ -738,7 +721,7 @@ def createBone(armatureObj, parentBoneName, boneName, currentTransform, boneGrou
 
 
 def createSwitchOption(
-    armatureObj, switchBoneName, boneName, currentTransform, nextParentTransform, switchLevel, switchCount
+    armatureObj, switchBoneName, boneName, currentTransform, nextParentTransform, switchLevel, switchCount, f3dContext
 ):
     bpy.ops.object.mode_set(mode="OBJECT")
     bpy.ops.object.select_all(action="DESELECT")
@@ -799,12 +782,9 @@ def createSwitchOption(
     # material.node_tree.nodes['Case A 1'].inA = '1'
     # material.set_env = False
 
-    bMesh = bmesh.new()
-    bMesh.from_mesh(mesh)
-
     addBoneToGroup(switchArmature, boneName, "SwitchOption")
 
-    return boneName, (switchArmature, bMesh, obj), finalTransform, finalNextParentTransform
+    return boneName, (switchArmature, f3dContext.newMeshContext(), obj), finalTransform, finalNextParentTransform
 
 
 def parseSwitch(
@@ -837,7 +817,7 @@ def parseDL(
     romfile,
     currentAddress,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
@@ -845,7 +825,6 @@ def parseDL(
     currentCmd,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     drawLayer = bitMask(currentCmd[1], 0, 4)
 
@@ -862,11 +841,11 @@ def parseDL(
             True,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "DisplayList",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -880,7 +859,7 @@ def parseDLWithOffset(
     romfile,
     currentAddress,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
@@ -888,7 +867,6 @@ def parseDLWithOffset(
     nodeIndex,
     currentCmd,
     segmentData,
-    vertexBuffer,
 ):
     print("DL_OFFSET " + hex(currentAddress))
     romfile.seek(currentAddress)
@@ -924,16 +902,12 @@ def parseDLWithOffset(
         if hasMeshData:
             displayListStartAddress = decodeSegmentedAddr(segmentedAddr, segmentData=segmentData)
             # print(displayListStartAddress)
+            # Vertices are stored in SM64 units
+            meshTransform = finalTransform @ mathutils.Matrix.Scale(
+                1 / bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4
+            )
             parseF3DBinary(
-                romfile,
-                displayListStartAddress,
-                bpy.context.scene,
-                bMesh,
-                obj,
-                finalTransform,
-                boneName,
-                segmentData,
-                vertexBuffer,
+                displayListStartAddress, meshTransform, boneName, boneName, "sm64", str(drawLayer), f3dContext
             )
 
     # Handle child objects
@@ -985,11 +959,11 @@ def handleNodeCommon(
     loadDL,
     command,
     segmentData,
-    bMesh,
+    f3dContext,
     obj,
     nodeIndex,
     boneGroupName,
-    vertexBuffer,
+    drawLayer,
 ):
     boneName = format(nodeIndex, "03") + "-" + boneGroupName.lower()
 
@@ -1002,17 +976,11 @@ def handleNodeCommon(
         hasMeshData = int.from_bytes(segmentedAddr, "big") != 0
         if hasMeshData:
             startAddress = decodeSegmentedAddr(segmentedAddr, segmentData)
-            parseF3DBinary(
-                romfile,
-                startAddress,
-                bpy.context.scene,
-                bMesh,
-                obj,
-                finalTransform,
-                boneName,
-                segmentData,
-                vertexBuffer,
+            # Vertices are stored in SM64 units
+            meshTransform = finalTransform @ mathutils.Matrix.Scale(
+                1 / bpy.context.scene.fast64.sm64.blender_to_sm64_scale, 4
             )
+            parseF3DBinary(startAddress, meshTransform, boneName, boneName, "sm64", str(drawLayer), f3dContext)
     elif armatureObj is not None:
         armatureObj.data.bones[boneName].use_deform = False
     return boneName
@@ -1023,14 +991,13 @@ def parseScale(
     currentAddress,
     currentCmd,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
     ignoreNode,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     print("SCALE " + hex(currentAddress))
 
@@ -1054,11 +1021,11 @@ def parseScale(
             loadDL,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "Scale",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -1076,14 +1043,13 @@ def parseTranslateRotate(
     currentAddress,
     currentCmd,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
     ignoreNode,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     print("TRANSLATE_ROTATE " + hex(currentAddress))
 
@@ -1135,11 +1101,11 @@ def parseTranslateRotate(
             loadDL,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "TranslateRotate",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -1162,14 +1128,13 @@ def parseTranslate(
     currentAddress,
     currentCmd,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
     ignoreNode,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     print("TRANSLATE " + hex(currentAddress))
 
@@ -1197,11 +1162,11 @@ def parseTranslate(
             loadDL,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "Translate",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -1219,14 +1184,13 @@ def parseRotate(
     currentAddress,
     currentCmd,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
     ignoreNode,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     print("ROTATE " + hex(currentAddress))
 
@@ -1254,11 +1218,11 @@ def parseRotate(
             loadDL,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "Rotate",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -1275,14 +1239,13 @@ def parseBillboard(
     currentAddress,
     currentCmd,
     currentTransform,
-    bMesh,
+    f3dContext,
     obj,
     armatureObj,
     parentBoneName,
     ignoreNode,
     nodeIndex,
     segmentData,
-    vertexBuffer,
 ):
     print("BILLBOARD " + hex(currentAddress))
 
@@ -1310,11 +1273,11 @@ def parseBillboard(
             loadDL,
             command,
             segmentData,
-            bMesh,
+            f3dContext,
             obj,
             nodeIndex,
             "Billboard",
-            vertexBuffer,
+            drawLayer,
         )
         if armatureObj is not None:
             bone = armatureObj.data.bones[boneName]
@@ -1555,7 +1518,7 @@ class SM64_ImportGeolayout(bpy.types.Operator):
                 finalTransform,
                 generateArmature,
                 ignoreSwitch,
-                True,
+                context.scene.f3d_type,
             )
             romfileSrc.close()
 
@@ -1612,7 +1575,7 @@ class SM64_ImportGeolayoutPanel(SM64_Panel):
             boxLayout = col.box()
             boxLayout.label(text="WARNING: May take a long time.")
             boxLayout.label(text="Switch nodes won't be setup.")
-        col.box().label(text="Only Fast3D mesh importing allowed.")
+        col.box().label(text="Display lists are decoded with the selected F3D Microcode.")
 
 
 sm64_geo_parser_classes = (SM64_ImportGeolayout,)
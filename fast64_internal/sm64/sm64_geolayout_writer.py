@@ -11,8 +11,9 @@ from .sm64_geolayout_bone import getSwitchOptionBone, animatableBoneTypes
 from .sm64_camera import saveCameraSettingsToGeolayout
 from .sm64_f3d_writer import SM64Model, SM64GfxFormatter
 from .sm64_texscroll import modifyTexScrollFiles, modifyTexScrollHeadersGroup
-from .sm64_level_parser import parseLevelAtPointer
+from .sm64_level_parser import parseLevelAtPointer, checkExportAddress
 from .sm64_rom_tweaks import ExtendBank0x04
+from .sm64_compression import compressExportedSegment
 from .sm64_utility import export_rom_checks, starSelectWarning
 
 from ..utility import (
@@ -2892,6 +2893,8 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
 
                 exportRange = [int(context.scene.geoExportStart, 16), int(context.scene.geoExportEnd, 16)]
+                if not context.scene.geoUseBank0:
+                    checkExportAddress(levelParsed, exportRange[0])
                 textDumpFilePath = (
                     bpy.path.abspath(context.scene.textDumpGeoPath) if context.scene.textDumpGeo else None
                 )
@@ -2923,6 +2926,11 @@ class SM64_ExportGeolayoutObject(ObjectDataExporter):
                         None,
                     )
 
+                if context.scene.fast64.sm64.compress_segment and not context.scene.geoUseBank0:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
                 romfileOutput.close()
                 bpy.ops.object.select_all(action="DESELECT")
                 obj.select_set(True)
@@ -3094,6 +3102,8 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
                     ExtendBank0x04(romfileOutput, segmentData, defaultExtendSegment4)
 
                 exportRange = [int(context.scene.geoExportStart, 16), int(context.scene.geoExportEnd, 16)]
+                if not context.scene.geoUseBank0:
+                    checkExportAddress(levelParsed, exportRange[0])
                 textDumpFilePath = (
                     bpy.path.abspath(context.scene.textDumpGeoPath) if context.scene.textDumpGeo else None
                 )
@@ -3127,6 +3137,11 @@ class SM64_ExportGeolayoutArmature(bpy.types.Operator):
                         None,
                     )
 
+                if context.scene.fast64.sm64.compress_segment and not context.scene.geoUseBank0:
+                    compressExportedSegment(
+                        romfileOutput, levelParsed, addrRange[0], context.scene.fast64.sm64.compressed_segment_range
+                    )
+
                 romfileOutput.close()
                 bpy.ops.object.select_all(action="DESELECT")
                 armatureObj.select_set(True)
@@ -57,12 +57,35 @@ def parseLevelAtPointer(romfile, pointerAddress):
     startAddress = decodeSegmentedAddr(command[12:16], segmentData)
 
     parsedLevel = parseLevel(romfile, startAddress, segmentData)
+    # Segments loaded by the main level script, unless the level itself reloads them
+    for segment, pointer in loadSegmentAddresses.items():
+        parsedLevel.segmentLoadCommands.setdefault(segment, pointer)
+    for segment, pointer in parsedLevel.segmentLoadCommands.items():
+        romfile.seek(pointer)
+        if romfile.read(1)[0] in (L_LOAD_MIO0_SEG, L_LOAD_MIO0_TEX):
+            parsedLevel.compressedSegments.add(segment)
     for segment, interval in parsedLevel.segmentData.items():
         print("Segment " + format(segment, "#04x") + ": " + hex(interval[0]) + " - " + hex(interval[1]))
 
     return parsedLevel
 
 
+def checkExportAddress(levelParsed, address):
+    """
+    Binary exports write uncompressed data into a segment. Once a segment is compressed its load command
+    points at the compressed data, so its old range isn't part of any segment anymore.
+    """
+    if any(address in range(*interval) for interval in levelParsed.segmentData.values()):
+        return
+    if len(levelParsed.compressedSegments) > 0:
+        compressed = ", ".join(format(segment, "#04x") for segment in sorted(levelParsed.compressedSegments))
+        raise PluginError(
+            f"Address {hex(address)} is not in any segment, and segment(s) {compressed} are already compressed"
+            " (loaded with LOAD_MIO0). Binary exports can't write into a compressed segment,"
+            " export to a ROM where the segment hasn't been compressed yet."
+        )
+
+
 def parseCommonSegmentLoad(romfile):
     segmentData = copy.deepcopy(mainLevelLoadScriptSegment)
     for segment, pointer in loadSegmentAddresses.items():
@@ -123,6 +146,7 @@ def parseLevel(romfile, startAddress, segmentData):
                 int.from_bytes(currentCmd[4:8], "big"),
                 int.from_bytes(currentCmd[8:12], "big"),
             ]
+            currentLevel.segmentLoadCommands[currentCmd[3]] = currentAddress
 
         elif currentCmd[0] == L_AREA_START:
             if currentArea is not currentLevel.nonArea:
@@ -195,6 +219,10 @@ def parseLevel(romfile, startAddress, segmentData):
 class SM64_Level:
     def __init__(self):
         self.segmentData = {}
+        # segment : ROM address of the level command that loads it
+        self.segmentLoadCommands = {}
+        # segments loaded with LOAD_MIO0, which binary exports can't write into
+        self.compressedSegments = set()
         self.geometry = []
         self.areas = []
         self.marioStartPosition = None
@@ -895,56 +895,38 @@ def get_obj_temp_mesh(obj):
             return o
 
 
-def apply_objects_modifiers_and_transformations(allObjs: Iterable[bpy.types.Object]):
-    # first apply modifiers so that any objects that affect each other are taken into consideration
-    for selectedObj in allObjs:
-        bpy.ops.object.select_all(action="DESELECT")
-        selectedObj.select_set(True)
-        bpy.context.view_layer.objects.active = selectedObj
-
-        for modifier in selectedObj.modifiers:
-            attemptModifierApply(modifier)
-
-    # apply transformations now that world space changes are applied
-    for selectedObj in allObjs:
-        bpy.ops.object.select_all(action="DESELECT")
-        selectedObj.select_set(True)
-        bpy.context.view_layer.objects.active = selectedObj
-
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True, properties=False)
-
-
 def duplicateHierarchy(obj, ignoreAttr, includeEmpties, areaIndex):
-    # Duplicate objects to apply scale / modifiers / linked data
-    bpy.ops.object.select_all(action="DESELECT")
-    selectMeshChildrenOnly(obj, None, includeEmpties, areaIndex)
-    obj.select_set(True)
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.duplicate()
+    """
+    Copies obj and its mesh (and geolayout empty) children with modifiers, rotation and scale applied.
+    Children of objects with ignoreAttr set are moved to the parent of that object.
+    Returns the copy of obj and all copies, which must be removed with cleanupDuplicatedObjects.
+    """
+    # circular import fixes
+    from .export_source import ExportHierarchy, get_export_objects
+
+    exportObjs = get_export_objects(
+        obj,
+        lambda child: child.type == "MESH"
+        or (child.type == "EMPTY" and includeEmpties and checkSM64EmptyUsesGeoLayout(child.sm64_obj_type)),
+        lambda current: getSM64ExportChildren(current, areaIndex),
+    )
+    for exportObj in exportObjs:
+        exportObj.original_name = exportObj.name
+
+    hierarchy = ExportHierarchy(exportObjs)
+    allObjs = hierarchy.objects
     try:
-        tempObj = bpy.context.view_layer.objects.active
-        allObjs = bpy.context.selected_objects
-
-        bpy.ops.object.make_single_user(obdata=True)
-
-        apply_objects_modifiers_and_transformations(allObjs)
-
-        for selectedObj in allObjs:
-            if ignoreAttr is not None and getattr(selectedObj, ignoreAttr):
-                for child in selectedObj.children:
-                    bpy.ops.object.select_all(action="DESELECT")
-                    child.select_set(True)
-                    bpy.context.view_layer.objects.active = child
-                    bpy.ops.object.parent_clear(type="CLEAR_KEEP_TRANSFORM")
-                    selectedObj.parent.select_set(True)
-                    bpy.context.view_layer.objects.active = selectedObj.parent
-                    bpy.ops.object.parent_set(keep_transform=True)
-                selectedObj.parent = None
-        return tempObj, allObjs
+        hierarchy.apply_transform(allObjs, location=False, rotation=True, scale=True)
+        if ignoreAttr is not None:
+            for objCopy in allObjs:
+                if getattr(objCopy, ignoreAttr):
+                    for child in hierarchy.children(objCopy):
+                        hierarchy.reparent(child, objCopy.parent)
+                    hierarchy.reparent(objCopy, None)
+        hierarchy.update()
+        return hierarchy.copies[obj], allObjs
     except Exception as e:
         cleanupDuplicatedObjects(allObjs)
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
         raise Exception(str(e))
 
 
@@ -979,21 +961,21 @@ def checkSM64EmptyUsesGeoLayout(sm64_obj_type):
     return sm64_obj_type in enumSM64EmptyWithGeolayout or checkIsSM64InlineGeoLayout(sm64_obj_type)
 
 
-def selectMeshChildrenOnly(obj, ignoreAttr, includeEmpties, areaIndex):
-    checkArea = areaIndex is not None and obj.type == "EMPTY"
-    if checkArea and obj.sm64_obj_type == "Area Root" and obj.areaIndex != areaIndex:
-        return
-    ignoreObj = ignoreAttr is not None and getattr(obj, ignoreAttr)
-    isMesh = obj.type == "MESH"
-    isEmpty = obj.type == "EMPTY" and includeEmpties and checkSM64EmptyUsesGeoLayout(obj.sm64_obj_type)
-    if (isMesh or isEmpty) and not ignoreObj:
-        obj.select_set(True)
-        obj.original_name = obj.name
-    for child in obj.children:
-        if checkArea and obj.sm64_obj_type == "Level Root":
-            if not (child.type == "EMPTY" and child.sm64_obj_type == "Area Root"):
-                continue
-        selectMeshChildrenOnly(child, ignoreAttr, includeEmpties, areaIndex)
+def getSM64ExportChildren(obj, areaIndex):
+    """Children of obj that are exported. With an areaIndex, only that area is exported from a level."""
+    if areaIndex is None or obj.type != "EMPTY":
+        return obj.children
+    if obj.sm64_obj_type == "Level Root":
+        return [
+            child
+            for child in obj.children
+            if child.type == "EMPTY" and child.sm64_obj_type == "Area Root" and child.areaIndex == areaIndex
+        ]
+    return [
+        child
+        for child in obj.children
+        if not (child.type == "EMPTY" and child.sm64_obj_type == "Area Root" and child.areaIndex != areaIndex)
+    ]
 
 
 def cleanupDuplicatedObjects(selected_objects):
@@ -1028,69 +1010,6 @@ def cleanupTempMeshes():
             bpy.data.curves.remove(data)
 
 
-def combineObjects(obj, includeChildren, ignoreAttr, areaIndex):
-    obj.original_name = obj.name
-
-    # Duplicate objects to apply scale / modifiers / linked data
-    bpy.ops.object.select_all(action="DESELECT")
-    if includeChildren:
-        selectMeshChildrenOnly(obj, ignoreAttr, False, areaIndex)
-    else:
-        obj.select_set(True)
-    if len(bpy.context.selected_objects) == 0:
-        return None, []
-    bpy.ops.object.duplicate()
-    joinedObj = None
-    try:
-        # duplicate obj and apply modifiers / make single user
-        allObjs = bpy.context.selected_objects
-        bpy.ops.object.make_single_user(obdata=True)
-
-        apply_objects_modifiers_and_transformations(allObjs)
-
-        bpy.ops.object.select_all(action="DESELECT")
-
-        # Joining causes orphan data, so we remove it manually.
-        meshList = []
-        for selectedObj in allObjs:
-            selectedObj.select_set(True)
-            meshList.append(selectedObj.data)
-
-        joinedObj = bpy.context.selected_objects[0]
-        bpy.context.view_layer.objects.active = joinedObj
-        joinedObj.select_set(True)
-        meshList.remove(joinedObj.data)
-        bpy.ops.object.join()
-        setOrigin(obj, joinedObj)
-
-        bpy.ops.object.select_all(action="DESELECT")
-        bpy.context.view_layer.objects.active = joinedObj
-        joinedObj.select_set(True)
-
-        # Need to clear parent transform in order to correctly apply transform.
-        bpy.ops.object.parent_clear(type="CLEAR_KEEP_TRANSFORM")
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True, properties=False)
-        bpy.context.view_layer.objects.active = joinedObj
-        joinedObj.select_set(True)
-        bpy.ops.object.transform_apply(location=False, rotation=True, scale=True, properties=False)
-
-    except Exception as e:
-        cleanupDuplicatedObjects(allObjs)
-        obj.select_set(True)
-        bpy.context.view_layer.objects.active = obj
-        raise Exception(str(e))
-
-    return joinedObj, meshList
-
-
-def cleanupCombineObj(tempObj, meshList):
-    for mesh in meshList:
-        bpy.data.meshes.remove(mesh)
-    cleanupDuplicatedObjects([tempObj])
-    # obj.select_set(True)
-    # bpy.context.view_layer.objects.active = obj
-
-
 def writeInsertableFile(filepath, dataType, address_ptrs, startPtr, data):
     address = 0
     openfile = open(filepath, "wb")
@@ -179,6 +179,174 @@ def getFrameInterval(action: bpy.types.Action):
     return range_get_by_choice[anim_range_choice]()
 
 
+class ArmaturePoseFrame:
+    def __init__(self, frame: int):
+        self.frame = frame
+        # armature space pose matrices, equivalent to pose_bone.matrix
+        self.matrix: dict[str, mathutils.Matrix] = {}
+        # equivalent to pose_bone.matrix_basis
+        self.matrix_basis: dict[str, mathutils.Matrix] = {}
+        # evaluated values of the extra property paths requested from the sampler
+        self.properties: dict[str, float] = {}
+
+
+class ArmaturePoseSampler:
+    """
+    Samples the pose of an armature over a range of frames.
+    If the pose only depends on the active action, bones are evaluated directly from the action's fcurves
+    and the scene is never changed. Otherwise (constraints, drivers, NLA blending, non default bone inheritance)
+    this falls back to scene.frame_set, which re-evaluates the whole depsgraph every frame.
+    """
+
+    poseChannels = {
+        "location": 3,
+        "rotation_quaternion": 4,
+        "rotation_euler": 3,
+        "rotation_axis_angle": 4,
+        "scale": 3,
+    }
+
+    def __init__(self, armatureObj: bpy.types.Object, propertyPaths: tuple[str, ...] = ()):
+        self.armatureObj = armatureObj
+        self.propertyPaths = propertyPaths
+
+        # bones ordered so that parents always come before their children
+        self.boneOrder: list[bpy.types.Bone] = []
+        boneStack = [bone for bone in armatureObj.data.bones if bone.parent is None]
+        while len(boneStack) > 0:
+            bone = boneStack.pop()
+            self.boneOrder.append(bone)
+            boneStack.extend(bone.children)
+
+    def canSampleFromFCurves(self) -> bool:
+        armatureObj = self.armatureObj
+        animData = armatureObj.animation_data
+        if animData is None or animData.action is None:
+            return False
+        if len(animData.drivers) > 0 or animData.use_tweak_mode:
+            return False
+        if animData.action_influence < 1.0 or animData.action_blend_type != "REPLACE":
+            return False
+        if animData.use_nla:
+            # Strips below the active action (such as stashed exports) only matter for channels it doesn't animate.
+            animatedChannels = {(fcurve.data_path, fcurve.array_index) for fcurve in animData.action.fcurves}
+            for track in animData.nla_tracks:
+                if track.mute:
+                    continue
+                for strip in track.strips:
+                    if strip.mute or strip.action is None or strip.action == animData.action:
+                        continue
+                    for fcurve in strip.action.fcurves:
+                        if (fcurve.data_path, fcurve.array_index) not in animatedChannels:
+                            return False
+
+        dataAnimData = armatureObj.data.animation_data
+        if dataAnimData is not None and (dataAnimData.action is not None or len(dataAnimData.drivers) > 0):
+            return False
+
+        for poseBone in armatureObj.pose.bones:
+            if len(poseBone.constraints) > 0:
+                return False
+            bone = poseBone.bone
+            if (
+                not bone.use_inherit_rotation
+                or bone.inherit_scale != "FULL"
+                or not bone.use_local_location
+                or bone.use_relative_parent
+            ):
+                return False
+
+        return True
+
+    def sample(self, frame_start: int, frame_count: int):
+        """Yields an ArmaturePoseFrame for each frame in the range."""
+        if self.canSampleFromFCurves():
+            yield from self.sampleFromFCurves(frame_start, frame_count)
+        else:
+            yield from self.sampleWithFrameSet(frame_start, frame_count)
+
+    def sampleWithFrameSet(self, frame_start: int, frame_count: int):
+        scene = bpy.context.scene
+        poseBones = self.armatureObj.pose.bones
+        currentFrame = scene.frame_current
+        try:
+            for frame in range(frame_start, frame_start + frame_count):
+                scene.frame_set(frame)
+                poseFrame = ArmaturePoseFrame(frame)
+                for poseBone in poseBones:
+                    poseFrame.matrix[poseBone.name] = poseBone.matrix.copy()
+                    poseFrame.matrix_basis[poseBone.name] = poseBone.matrix_basis.copy()
+                for path in self.propertyPaths:
+                    poseFrame.properties[path] = self.armatureObj.path_resolve(path)
+                yield poseFrame
+        finally:
+            scene.frame_set(currentFrame)
+
+    def sampleFromFCurves(self, frame_start: int, frame_count: int):
+        armatureObj = self.armatureObj
+        fcurves = {}
+        for fcurve in armatureObj.animation_data.action.fcurves:
+            if not fcurve.mute:
+                fcurves[(fcurve.data_path, fcurve.array_index)] = fcurve
+
+        # For each bone and channel, store the fcurves to evaluate along with the current value,
+        # which is what frame_set would leave on channels that are not animated.
+        boneChannels = []
+        for bone in self.boneOrder:
+            poseBone = armatureObj.pose.bones[bone.name]
+            bonePath = f'pose.bones["{bpy.utils.escape_identifier(bone.name)}"]'
+            channels = {}
+            for channel, size in ArmaturePoseSampler.poseChannels.items():
+                channels[channel] = (
+                    [fcurves.get((f"{bonePath}.{channel}", i)) for i in range(size)],
+                    list(getattr(poseBone, channel)),
+                )
+            restMatrix = bone.matrix_local.copy()
+            if bone.parent is not None:
+                restMatrix = bone.parent.matrix_local.inverted() @ restMatrix
+            boneChannels.append((bone, poseBone.rotation_mode, restMatrix, channels))
+
+        properties = [(path, fcurves.get((path, 0)), armatureObj.path_resolve(path)) for path in self.propertyPaths]
+
+        def evaluateChannel(channel, frame):
+            channelFCurves, values = channel
+            return [
+                fcurve.evaluate(frame) if fcurve is not None else values[i] for i, fcurve in enumerate(channelFCurves)
+            ]
+
+        for frame in range(frame_start, frame_start + frame_count):
+            poseFrame = ArmaturePoseFrame(frame)
+            for bone, rotationMode, restMatrix, channels in boneChannels:
+                location = evaluateChannel(channels["location"], frame)
+                if rotationMode == "QUATERNION":
+                    rotation = mathutils.Quaternion(evaluateChannel(channels["rotation_quaternion"], frame))
+                    rotation.normalize()
+                elif rotationMode == "AXIS_ANGLE":
+                    angle, *axis = evaluateChannel(channels["rotation_axis_angle"], frame)
+                    rotation = mathutils.Quaternion(axis, angle)
+                else:
+                    rotation = mathutils.Euler(evaluateChannel(channels["rotation_euler"], frame), rotationMode)
+                matrixBasis = mathutils.Matrix.LocRotScale(
+                    location, rotation, evaluateChannel(channels["scale"], frame)
+                )
+
+                if bone.parent is not None:
+                    matrix = poseFrame.matrix[bone.parent.name] @ restMatrix @ matrixBasis
+                else:
+                    matrix = restMatrix @ matrixBasis
+                poseFrame.matrix[bone.name] = matrix
+                poseFrame.matrix_basis[bone.name] = matrixBasis
+
+            for path, fcurve, value in properties:
+                if fcurve is None:
+                    poseFrame.properties[path] = value
+                elif isinstance(value, int):
+                    poseFrame.properties[path] = int(fcurve.evaluate(frame))
+                else:
+                    poseFrame.properties[path] = fcurve.evaluate(frame)
+            yield poseFrame
+
+
 def stashActionInArmature(armatureObj: bpy.types.Object, action: bpy.types.Action):
     """
     Stashes an animation (action) into an armature´s nla tracks.
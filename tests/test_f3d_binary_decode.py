@@ -0,0 +1,497 @@
+"""
+Round trips every f3d_gbi macro through its binary encoding and the ROM importer's display list decoder,
+once per microcode. Runs without Blender, from the root of the repo: python3 -m unittest discover tests
+"""
+
+import importlib
+import inspect
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.shims import install_blender_shims
+
+install_blender_shims()
+
+gbi = importlib.import_module("fast64_internal.f3d.f3d_gbi")
+f3d_parser = importlib.import_module("fast64_internal.f3d.f3d_parser")
+PluginError = importlib.import_module("fast64_internal.utility").PluginError
+
+F3D_TYPES = ["F3D", "F3DEX/LX", "F3DLX.Rej", "F3DLP.Rej", "F3DEX2/LX2", "F3DEX2.Rej/LX2.Rej", "F3DEX3"]
+
+SEGMENT_START = 0x80000
+SEGMENTS = {0x06: (SEGMENT_START, SEGMENT_START + 0x10000)}
+
+WRAP = ("G_TX_NOMIRROR", "G_TX_WRAP")
+CLAMP_MIRROR = ("G_TX_MIRROR", "G_TX_CLAMP")
+
+
+def at(data, offset: int):
+    """Places data (anything with a startAddress) at offset into segment 6."""
+    data.startAddress = SEGMENT_START + offset
+    return data
+
+
+def segmented(offset: int):
+    return 0x06000000 + offset
+
+
+def decode(f3d, macro):
+    data = macro.to_binary(f3d, SEGMENTS)
+    return [(command.name, command.params) for _, command in f3d_parser.decodeF3DBinary(data, f3d)]
+
+
+class Fixtures:
+    def __init__(self, f3d):
+        self.vertices = at(gbi.VtxList("vertices"), 0x100)
+        self.displayList = at(gbi.GfxList("displayList", gbi.GfxListTag.Draw, gbi.DLFormat.Static), 0x200)
+        self.viewport = at(gbi.Vp(None, None), 0x40)
+        self.image = at(gbi.FImage("image", "G_IM_FMT_RGBA", "G_IM_SIZ_16b", 32, 32, None), 0x400)
+        self.tlut = at(gbi.FImage("tlut", "G_IM_FMT_RGBA", "G_IM_SIZ_16b", 16, 1, None), 0x800)
+        self.lights = at(gbi.Lights("lights", f3d), 0x80)
+        self.lights.a = gbi.Ambient([0x3F, 0x3F, 0x3F])
+        self.lights.l = [gbi.Light([0xFF, 0xFF, 0xFF], [0x28, 0x28, 0x28]), gbi.Light([0x80, 0, 0], [0, 0x7F, 0])]
+        self.lookAt = at(gbi.LookAt("lookAt", f3d), 0xC0)
+        self.hilite = gbi.Hilite("hilite", 4, 8, 12, 16)
+
+
+def otherModeSetters(f3d):
+    # macro class : (macro args, otherMode command, shift, length, value)
+    H, L = f3d.G_SETOTHERMODE_H, f3d.G_SETOTHERMODE_L
+    return {
+        gbi.DPPipelineMode: ("G_PM_1PRIMITIVE", H, f3d.G_MDSFT_PIPELINE, 1, f3d.G_PM_1PRIMITIVE),
+        gbi.DPSetCycleType: ("G_CYC_2CYCLE", H, f3d.G_MDSFT_CYCLETYPE, 2, f3d.G_CYC_2CYCLE),
+        gbi.DPSetTexturePersp: ("G_TP_PERSP", H, f3d.G_MDSFT_TEXTPERSP, 1, f3d.G_TP_PERSP),
+        gbi.DPSetTextureDetail: ("G_TD_SHARPEN", H, f3d.G_MDSFT_TEXTDETAIL, 2, f3d.G_TD_SHARPEN),
+        gbi.DPSetTextureLOD: ("G_TL_LOD", H, f3d.G_MDSFT_TEXTLOD, 1, f3d.G_TL_LOD),
+        gbi.DPSetTextureLUT: ("G_TT_RGBA16", H, f3d.G_MDSFT_TEXTLUT, 2, f3d.G_TT_RGBA16),
+        gbi.DPSetTextureFilter: ("G_TF_BILERP", H, f3d.G_MDSFT_TEXTFILT, 2, f3d.G_TF_BILERP),
+        gbi.DPSetTextureConvert: ("G_TC_FILT", H, f3d.G_MDSFT_TEXTCONV, 3, f3d.G_TC_FILT),
+        gbi.DPSetCombineKey: ("G_CK_KEY", H, f3d.G_MDSFT_COMBKEY, 1, f3d.G_CK_KEY),
+        gbi.DPSetColorDither: ("G_CD_BAYER", H, f3d.G_MDSFT_RGBDITHER, 2, f3d.G_CD_BAYER),
+        gbi.DPSetAlphaDither: ("G_AD_NOISE", H, f3d.G_MDSFT_ALPHADITHER, 2, f3d.G_AD_NOISE),
+        gbi.DPSetAlphaCompare: ("G_AC_THRESHOLD", L, f3d.G_MDSFT_ALPHACOMPARE, 2, f3d.G_AC_THRESHOLD),
+        gbi.DPSetDepthSource: ("G_ZS_PRIM", L, f3d.G_MDSFT_ZSRCSEL, 1, f3d.G_ZS_PRIM),
+    }
+
+
+def tileRecords(f3d, fmt, siz, line, tmem, tile, palette, cmt, maskt, shiftt, cms, masks, shifts):
+    clampMirror = lambda value: f3d.G_TX_VARS[value[0]] + f3d.G_TX_VARS[value[1]]
+    params = [f3d.G_IM_FMT_VARS[fmt], f3d.G_IM_SIZ_VARS[siz], line, tmem, tile, palette]
+    params += [clampMirror(cmt), maskt, shiftt, clampMirror(cms), masks, shifts]
+    return [("gsDPSetTile", params)]
+
+
+def lightRecords(f3d, address: int, index: int):
+    if f3d.F3DEX_GBI_3:
+        return [("gsMoveMem", [f3d.G_MV_LIGHT, index * 0x10, segmented(address - SEGMENT_START)])]
+    return [("gsSPLight", [segmented(address - SEGMENT_START), index])]
+
+
+def expectedRecords(f3d, macro, fixtures: Fixtures):
+    """
+    The records the decoder should produce for macro, or PluginError when the macro can't be encoded for f3d.
+    Composite macros are checked as the primitive macros they expand to in gbi.h.
+    """
+    ex2, ex3 = f3d.F3DEX_GBI_2, f3d.F3DEX_GBI_3
+    name = type(macro).__name__
+    H, L = f3d.G_SETOTHERMODE_H, f3d.G_SETOTHERMODE_L
+
+    def expand(*macros):
+        return [record for primitive in macros for record in expectedRecords(f3d, primitive, fixtures)]
+
+    if type(macro) in otherModeSetters(f3d):
+        _, cmd, shift, length, value = otherModeSetters(f3d)[type(macro)]
+        return [("gsSPSetOtherMode", [cmd, shift, length, value])]
+
+    if name == "SPMatrix":
+        return [("gsSPMatrix", [int(macro.matrix, 16), macro.param])]
+    if name == "SPVertex":
+        address = macro.vertList.startAddress + macro.offset * gbi.VTX_SIZE
+        return [("gsSPVertex", [segmented(address - SEGMENT_START), macro.count, macro.index])]
+    if name == "SPViewport":
+        return [("gsMoveMem", [f3d.G_MV_VIEWPORT, 0, segmented(macro.viewport.startAddress - SEGMENT_START)])]
+    if name in {"SPDisplayList", "SPBranchList"}:
+        return [("gs" + name, [segmented(macro.displayList.startAddress - SEGMENT_START)])]
+    if name == "SPEndDisplayList":
+        return [("gsSPEndDisplayList", [])]
+    if name == "SP1Triangle":
+        return [("gsSP1Triangle", [macro.v0, macro.v1, macro.v2, 0])]
+    if name == "SP2Triangles":
+        if f3d.F3D_OLD_GBI:
+            return PluginError
+        return [("gsSP2Triangles", [macro.v00, macro.v01, macro.v02, 0, macro.v10, macro.v11, macro.v12, 0])]
+    if name in {"SPLine3D", "SPLineW3D"}:
+        # Lines aren't imported
+        return PluginError if ex3 else []
+    if name == "SPCullDisplayList":
+        return []
+    if name == "SPSegment":
+        return [("gsSPSegment", [macro.segment, macro.base])]
+    if name == "SPClipRatio":
+        return [] if ex3 else [("gsSPClipRatio", [macro.ratio])]
+    if name.startswith(("SPAmbOcclusion", "SPFresnel", "SPAttrOffset", "SPAlphaCompareCull", "SPNormalsMode")):
+        if not ex3:
+            return PluginError
+        fx = lambda offset, value: ("gsMoveWd", [f3d.G_MW_FX, offset, value])
+        halfword = lambda offset, value: ("gsMoveHalfwd", [f3d.G_MW_FX, offset, value])
+        if name == "SPAmbOcclusionAmb":
+            return [halfword(f3d.G_MWO_AO_AMBIENT, macro.amb)]
+        if name == "SPAmbOcclusionDir":
+            return [halfword(f3d.G_MWO_AO_DIRECTIONAL, macro.dir)]
+        if name == "SPAmbOcclusionPoint":
+            return [halfword(f3d.G_MWO_AO_POINT, macro.point)]
+        if name == "SPAmbOcclusionAmbDir":
+            return [fx(f3d.G_MWO_AO_AMBIENT, macro.amb << 16 | macro.dir)]
+        if name == "SPAmbOcclusionDirPoint":
+            return [fx(f3d.G_MWO_AO_DIRECTIONAL, macro.dir << 16 | macro.point)]
+        if name == "SPAmbOcclusion":
+            return expand(gbi.SPAmbOcclusionAmbDir(macro.amb, macro.dir), gbi.SPAmbOcclusionPoint(macro.point))
+        if name == "SPFresnelScale":
+            return [halfword(f3d.G_MWO_FRESNEL_SCALE, macro.scale)]
+        if name == "SPFresnelOffset":
+            return [halfword(f3d.G_MWO_FRESNEL_OFFSET, macro.offset)]
+        if name == "SPFresnel":
+            return [fx(f3d.G_MWO_FRESNEL_SCALE, macro.scale << 16 | macro.offset)]
+        if name == "SPAttrOffsetST":
+            return [fx(f3d.G_MWO_ATTR_OFFSET_S, macro.s << 16 | macro.t)]
+        if name == "SPAttrOffsetZ":
+            return [fx(f3d.G_MWO_ATTR_OFFSET_Z, macro.z << 16)]
+        if name == "SPAlphaCompareCull":
+            value = (getattr(f3d, macro.mode) << 8 | macro.thresh) & 0xFFFF
+            return [halfword(f3d.G_MWO_ALPHA_COMPARE_CULL, value)]
+        if name == "SPNormalsMode":
+            return [halfword(f3d.G_MWO_NORMALS_MODE, getattr(f3d, macro.mode))]
+    if name == "SPModifyVertex":
+        if f3d.F3D_OLD_GBI:
+            return [("gsMoveWd", [f3d.G_MW_POINTS, macro.vtx * 40 + macro.where, macro.val])]
+        return []
+    if name == "SPBranchLessZraw":
+        # The G_RDPHALF_1 half holding the display list isn't decoded, and G_BRANCH_Z doesn't end the list
+        return PluginError if f3d.F3D_OLD_GBI else []
+    if name == "SPNumLights":
+        return [("gsSPNumLights", [macro.n])]
+    if name == "SPAmbient":
+        if not ex3:
+            return PluginError
+        return lightRecords(f3d, macro.light, gbi.lightIndex[macro.n])
+    if name == "SPLight":
+        return lightRecords(f3d, macro.light, gbi.lightIndex[macro.n])
+    if name == "SPLightColor":
+        color = macro.col[0] << 24 | macro.col[1] << 16 | macro.col[2] << 8 | 0xFF
+        return [("gsSPLightColor", [macro.n, color])]
+    if name == "SPSetLights":
+        lights = macro.lights
+        records = expand(gbi.SPNumLights(f"NUMLIGHTS_{len(lights.l)}"))
+        if ex3:
+            address = segmented(lights.startAddress - SEGMENT_START)
+            return records + [("gsMoveMem", [f3d.G_MV_LIGHT, 0x10, address])]
+        for i in range(len(lights.l)):
+            records += lightRecords(f3d, lights.getLightPointer(i), i + 1)
+        return records + lightRecords(f3d, lights.getAmbientPointer(), len(lights.l) + 1)
+    if name == "SPLookAt":
+        address = segmented(macro.la.startAddress - SEGMENT_START)
+        if ex3:
+            return [("gsMoveMem", [f3d.G_MV_LIGHT, 8, address])]
+        if ex2:
+            return [
+                ("gsMoveMem", [f3d.G_MV_LIGHT, f3d.G_MVO_LOOKATX, address]),
+                ("gsMoveMem", [f3d.G_MV_LIGHT, f3d.G_MVO_LOOKATY, address + 16]),
+            ]
+        return [("gsMoveMem", [f3d.G_MV_LOOKATX, 0, address]), ("gsMoveMem", [f3d.G_MV_LOOKATY, 0, address + 16])]
+    if name in {"DPSetHilite1Tile", "DPSetHilite2Tile"}:
+        x, y = (macro.hilite.x1, macro.hilite.y1) if name == "DPSetHilite1Tile" else (macro.hilite.x2, macro.hilite.y2)
+        lrs, lrt = (macro.width - 1) * 4 + x, (macro.height - 1) * 4 + y
+        return [("gsDPSetTileSize", [macro.tile, x, y, lrs, lrt])]
+    if name == "SPFogFactor":
+        # only fog factors made by gsSPFogPosition are used here, so they decode to the position
+        return [("gsSPFogPosition", [970, 1000])]
+    if name == "SPFogPosition":
+        return [("gsSPFogPosition", [macro.minVal, macro.maxVal])]
+    if name == "SPTexture":
+        return [("gsSPTexture", [macro.s, macro.t, macro.level, macro.tile, macro.on])]
+    if name == "SPPerspNormalize":
+        if ex3:
+            return [("gsMoveHalfwd", [f3d.G_MW_FX, f3d.G_MWO_PERSPNORM, macro.s])]
+        return [("gsMoveWd", [f3d.G_MW_PERSPNORM, 0, macro.s])]
+    if name in {"SPGeometryMode", "SPLoadGeometryMode"}:
+        if not ex2:
+            return PluginError
+        if name == "SPLoadGeometryMode":
+            return [("gsSPLoadGeometryMode", [gbi.geoFlagListToWord(macro.flagList, f3d)])]
+        return [
+            ("gsSPClearGeometryMode", [gbi.geoFlagListToWord(macro.clearFlagList, f3d)]),
+            ("gsSPSetGeometryMode", [gbi.geoFlagListToWord(macro.setFlagList, f3d)]),
+        ]
+    if name in {"SPSetGeometryMode", "SPClearGeometryMode"}:
+        return [("gs" + name, [gbi.geoFlagListToWord(macro.flagList, f3d)])]
+    if name == "SPSetOtherMode":
+        value = 0
+        for flag in macro.flagList:
+            value |= getattr(f3d, flag)
+        return [("gsSPSetOtherMode", [getattr(f3d, macro.cmd), getattr(f3d, macro.sft), macro.length, value])]
+    if name == "DPSetRenderMode":
+        return [("gsSPSetOtherMode", [L, f3d.G_MDSFT_RENDERMODE, 29, gbi.renderFlagListToWord(macro.flagList, f3d)])]
+    if name == "DPSetTextureImage":
+        address = segmented(macro.image.startAddress - SEGMENT_START)
+        params = [f3d.G_IM_FMT_VARS[macro.fmt], f3d.G_IM_SIZ_VARS[macro.siz], macro.width, address]
+        return [("gsDPSetTextureImage", params)]
+    if name == "DPSetCombineMode":
+        params = [macro.a0, macro.b0, macro.c0, macro.d0, macro.Aa0, macro.Ab0, macro.Ac0, macro.Ad0]
+        params += [macro.a1, macro.b1, macro.c1, macro.d1, macro.Aa1, macro.Ab1, macro.Ac1, macro.Ad1]
+        return [("gsDPSetCombineLERP", params)]
+    if name in {"DPSetEnvColor", "DPSetBlendColor", "DPSetFogColor"}:
+        return [("gs" + name, [macro.r, macro.g, macro.b, macro.a])]
+    if name == "DPSetPrimColor":
+        return [("gsDPSetPrimColor", [macro.m, macro.l, macro.r, macro.g, macro.b, macro.a])]
+    if name == "DPSetFillColor":
+        return [("gsDPSetFillColor", [macro.d])]
+    if name in {"DPSetPrimDepth", "DPSetConvert", "DPSetKeyR", "DPSetKeyGB", "SPTextureRectangle"}:
+        # Not used by the importer
+        return []
+    if name in {"SPLightToRDP", "SPLightToPrimColor", "SPLightToFogColor"}:
+        return [] if ex3 else PluginError
+    if name == "SPScisTextureRectangle":
+        return PluginError
+    if name == "DPSetOtherMode":
+        return [("gsSPSetOtherMode", [H, 0, 24, macro.mode0]), ("gsSPSetOtherMode", [L, 0, 32, macro.mode1])]
+    if name in {"DPSetTileSize", "DPLoadTile"}:
+        return [("gs" + name, [macro.tile, macro.uls, macro.ult, macro.lrs, macro.lrt])]
+    if name == "DPSetTile":
+        return tileRecords(f3d, *(getattr(macro, field) for field in gbi.DPSetTile.__dataclass_fields__))
+    if name == "DPLoadBlock":
+        return [
+            ("gsDPLoadBlock", [macro.tile, macro.uls, macro.ult, min(macro.lrs, f3d.G_TX_LDBLK_MAX_TXL), macro.dxt])
+        ]
+    if name == "DPLoadTLUTCmd":
+        return [("gsDPLoadTLUTCmd", [macro.tile, macro.count])]
+    if name in {"DPFullSync", "DPTileSync", "DPPipeSync", "DPLoadSync"}:
+        return [("gs" + name, [])]
+
+    # Texture loading macros, as defined in gbi.h
+    if name in {"DPLoadTextureBlock", "DPLoadTextureBlockYuv", "_DPLoadTextureBlock", "DPLoadTextureBlock_4b"}:
+        m = macro
+        tmem = getattr(m, "tmem", 0)
+        sizVars = f3d.G_IM_SIZ_VARS
+        if name == "DPLoadTextureBlock_4b":
+            loadSiz, renderSiz = "G_IM_SIZ_16b", "G_IM_SIZ_4b"
+            lrs, dxt = ((m.width * m.height + 3) >> 2) - 1, f3d.CALC_DXT_4b(m.width)
+            line = ((m.width >> 1) + 7) >> 3
+        else:
+            loadSiz, renderSiz = m.siz + "_LOAD_BLOCK", m.siz
+            lrs = ((m.width * m.height + sizVars[m.siz + "_INCR"]) >> sizVars[m.siz + "_SHIFT"]) - 1
+            dxt = f3d.CALC_DXT(m.width, sizVars[m.siz + "_BYTES"])
+            lineBytes = 1 if name == "DPLoadTextureBlockYuv" else sizVars[m.siz + "_LINE_BYTES"]
+            line = (m.width * lineBytes + 7) >> 3
+        clampWrap = (m.cmt, m.maskt, m.shiftt, m.cms, m.masks, m.shifts)
+        return expand(
+            gbi.DPSetTextureImage(m.fmt, loadSiz, 1, m.timg),
+            gbi.DPSetTile(m.fmt, loadSiz, 0, tmem, f3d.G_TX_LOADTILE, 0, *clampWrap),
+            gbi.DPLoadSync(),
+            gbi.DPLoadBlock(f3d.G_TX_LOADTILE, 0, 0, lrs, dxt),
+            gbi.DPPipeSync(),
+            gbi.DPSetTile(m.fmt, renderSiz, line, tmem, f3d.G_TX_RENDERTILE, m.pal, *clampWrap),
+            gbi.DPSetTileSize(f3d.G_TX_RENDERTILE, 0, 0, (m.width - 1) << 2, (m.height - 1) << 2),
+        )
+    if name in {"DPLoadTextureTile", "DPLoadTextureTile_4b"}:
+        m = macro
+        clampWrap = (m.cmt, m.maskt, m.shiftt, m.cms, m.masks, m.shifts)
+        if name == "DPLoadTextureTile_4b":
+            loadSiz, renderSiz, width = "G_IM_SIZ_8b", "G_IM_SIZ_4b", m.width >> 1
+            loadLine = renderLine = (((m.lrs - m.uls + 1) >> 1) + 7) >> 3
+            loadRect = (m.uls << 1, m.ult << 2, m.lrs << 1, m.lrt << 2)
+        else:
+            loadSiz, renderSiz, width = m.siz, m.siz, m.width
+            loadLine = ((m.lrs - m.uls + 1) * f3d.G_IM_SIZ_VARS[m.siz + "_TILE_BYTES"] + 7) >> 3
+            renderLine = ((m.lrs - m.uls + 1) * f3d.G_IM_SIZ_VARS[m.siz + "_LINE_BYTES"] + 7) >> 3
+            loadRect = (m.uls << 2, m.ult << 2, m.lrs << 2, m.lrt << 2)
+        return expand(
+            gbi.DPSetTextureImage(m.fmt, loadSiz, width, m.timg),
+            gbi.DPSetTile(m.fmt, loadSiz, loadLine, 0, f3d.G_TX_LOADTILE, 0, *clampWrap),
+            gbi.DPLoadSync(),
+            gbi.DPLoadTile(f3d.G_TX_LOADTILE, *loadRect),
+            gbi.DPPipeSync(),
+            gbi.DPSetTile(m.fmt, renderSiz, renderLine, 0, f3d.G_TX_RENDERTILE, m.pal, *clampWrap),
+            gbi.DPSetTileSize(f3d.G_TX_RENDERTILE, m.uls << 2, m.ult << 2, m.lrs << 2, m.lrt << 2),
+        )
+    if name in {"DPLoadTLUT_pal16", "DPLoadTLUT_pal256", "DPLoadTLUT"}:
+        if name == "DPLoadTLUT_pal16":
+            tmem, count = 256 + (macro.pal & 0xF) * 16, 15
+        elif name == "DPLoadTLUT_pal256":
+            tmem, count = 256, 255
+        else:
+            tmem, count = macro.tmemaddr, macro.count - 1
+        return expand(
+            gbi.DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 1, macro.dram),
+            gbi.DPTileSync(),
+            gbi.DPSetTile("0", "0", 0, tmem, f3d.G_TX_LOADTILE, 0, WRAP, 0, 0, WRAP, 0, 0),
+            gbi.DPLoadSync(),
+            gbi.DPLoadTLUTCmd(f3d.G_TX_LOADTILE, count),
+            gbi.DPPipeSync(),
+        )
+
+    raise AssertionError("No expected records for " + name)
+
+
+def macroCases(f3d, fixtures: Fixtures):
+    image, tlut = fixtures.image, fixtures.tlut
+    cases = [
+        gbi.SPMatrix("0x06000300", f3d.G_MTX_NOPUSH | f3d.G_MTX_LOAD | f3d.G_MTX_MODELVIEW),
+        gbi.SPMatrix("0x06000340", f3d.G_MTX_PUSH | f3d.G_MTX_MUL | f3d.G_MTX_PROJECTION),
+        gbi.SPVertex(fixtures.vertices, 2, 5, 3),
+        gbi.SPViewport(fixtures.viewport),
+        gbi.SPDisplayList(fixtures.displayList),
+        gbi.SPBranchList(fixtures.displayList),
+        gbi.SPEndDisplayList(),
+        gbi.SP1Triangle(1, 2, 3, 0),
+        gbi.SP2Triangles(1, 2, 3, 0, 4, 5, 6, 0),
+        gbi.SPLine3D(1, 2, 0),
+        gbi.SPLineW3D(1, 2, 3, 0),
+        gbi.SPCullDisplayList(0, 7),
+        gbi.SPSegment(6, 0x80123000),
+        gbi.SPClipRatio(2),
+        gbi.SPAmbOcclusionAmb(0x1234),
+        gbi.SPAmbOcclusionDir(0x2345),
+        gbi.SPAmbOcclusionPoint(0x3456),
+        gbi.SPAmbOcclusionAmbDir(0x1234, 0x2345),
+        gbi.SPAmbOcclusionDirPoint(0x2345, 0x3456),
+        gbi.SPAmbOcclusion(0x1234, 0x2345, 0x3456),
+        gbi.SPFresnelScale(0x0123),
+        gbi.SPFresnelOffset(0x0456),
+        gbi.SPFresnel(0x0123, 0x0456),
+        gbi.SPAttrOffsetST(0x0100, 0x0200),
+        gbi.SPAttrOffsetZ(0x0300),
+        gbi.SPAlphaCompareCull("G_ALPHA_COMPARE_CULL_ABOVE", 0x80) if f3d.F3DEX_GBI_3 else None,
+        gbi.SPNormalsMode("G_NORMALS_MODE_AUTO") if f3d.F3DEX_GBI_3 else None,
+        gbi.SPModifyVertex(3, f3d.G_MWO_POINT_RGBA, 0x11223344),
+        gbi.SPBranchLessZraw(fixtures.displayList, 4, 0x12345),
+        gbi.SPNumLights("NUMLIGHTS_2"),
+        gbi.SPLight(fixtures.lights.getLightPointer(0), "LIGHT_1"),
+        gbi.SPLight(fixtures.lights.getLightPointer(1), "LIGHT_2"),
+        gbi.SPAmbient(fixtures.lights.getAmbientPointer(), "LIGHT_3"),
+        gbi.SPLightColor("LIGHT_2", [0x10, 0x20, 0x30]),
+        gbi.SPSetLights(fixtures.lights),
+        gbi.SPLookAt(fixtures.lookAt),
+        gbi.DPSetHilite1Tile(1, fixtures.hilite, 32, 16),
+        gbi.DPSetHilite2Tile(2, fixtures.hilite, 16, 32),
+        gbi.SPFogFactor(4266, -4010),
+        gbi.SPFogPosition(970, 1000),
+        gbi.SPTexture(0xFFFF, 0x8000, 1, 0, 1),
+        gbi.SPPerspNormalize(0xFFFF),
+        gbi.SPGeometryMode(["G_TEXTURE_GEN", "G_FOG"], ["G_LIGHTING", "G_SHADE"]),
+        gbi.SPSetGeometryMode(["G_ZBUFFER", "G_SHADE", "G_CULL_BACK", "G_SHADING_SMOOTH"]),
+        gbi.SPClearGeometryMode(["G_LIGHTING", "G_TEXTURE_GEN"]),
+        gbi.SPLoadGeometryMode(["G_ZBUFFER", "G_LIGHTING"]),
+        gbi.SPSetOtherMode("G_SETOTHERMODE_H", "G_MDSFT_CYCLETYPE", 2, ["G_CYC_2CYCLE"]),
+        gbi.DPSetRenderMode(["G_RM_AA_ZB_OPA_SURF", "G_RM_AA_ZB_OPA_SURF2"], None),
+        gbi.DPSetTextureImage("G_IM_FMT_RGBA", "G_IM_SIZ_16b", 32, image),
+        gbi.DPSetCombineMode(
+            *["TEXEL0", "0", "SHADE", "0", "TEXEL0", "0", "ENVIRONMENT", "0"],
+            *["COMBINED", "0", "PRIMITIVE", "0", "0", "0", "0", "COMBINED"],
+        ),
+        gbi.DPSetEnvColor(0x11, 0x22, 0x33, 0x44),
+        gbi.DPSetBlendColor(0x55, 0x66, 0x77, 0x88),
+        gbi.DPSetFogColor(0x99, 0xAA, 0xBB, 0xCC),
+        gbi.DPSetFillColor(0x12345678),
+        gbi.DPSetPrimDepth(0x1234, 0x5678),
+        gbi.DPSetPrimColor(0x10, 0x20, 0x30, 0x40, 0x50, 0x60),
+        gbi.SPLightToRDP(2, 0xFF, 0xFA000000),
+        gbi.SPLightToPrimColor(2, 0xFF, 0x10, 0x20),
+        gbi.SPLightToFogColor(2, 0xFF),
+        gbi.DPSetOtherMode(0x080CF0, 0x00552048),
+        gbi.DPSetTileSize(0, 0, 0, 31 << 2, 15 << 2),
+        gbi.DPLoadTile(7, 4, 8, 124, 60),
+        gbi.DPSetTile("G_IM_FMT_IA", "G_IM_SIZ_8b", 4, 128, 1, 0, CLAMP_MIRROR, 5, 1, WRAP, 4, 15),
+        gbi.DPLoadBlock(7, 0, 0, 1023, 256),
+        gbi.DPLoadBlock(7, 0, 0, 4095, 256),
+        gbi.DPLoadTLUTCmd(7, 15),
+        gbi.DPLoadTextureBlock(image, "G_IM_FMT_RGBA", "G_IM_SIZ_16b", 32, 32, 0, WRAP, CLAMP_MIRROR, 5, 5, 0, 0),
+        gbi.DPLoadTextureBlockYuv(image, "G_IM_FMT_YUV", "G_IM_SIZ_16b", 16, 16, 0, WRAP, WRAP, 4, 4, 0, 0),
+        gbi._DPLoadTextureBlock(image, 256, "G_IM_FMT_I", "G_IM_SIZ_8b", 32, 16, 0, WRAP, WRAP, 5, 4, 0, 0),
+        gbi.DPLoadTextureBlock_4b(image, "G_IM_FMT_CI", "G_IM_SIZ_4b", 32, 32, 1, WRAP, WRAP, 5, 5, 0, 0),
+        gbi.DPLoadTextureTile(image, "G_IM_FMT_RGBA", "G_IM_SIZ_16b", 64, 64, 0, 16, 31, 47, 0, WRAP, WRAP, 5, 5, 0, 0),
+        gbi.DPLoadTextureTile_4b(image, "G_IM_FMT_I", "G_IM_SIZ_4b", 64, 64, 0, 16, 31, 47, 0, WRAP, WRAP, 5, 5, 0, 0),
+        gbi.DPLoadTLUT_pal16(3, tlut),
+        gbi.DPLoadTLUT_pal256(tlut),
+        gbi.DPLoadTLUT(32, 384, tlut),
+        gbi.DPSetConvert(1, 2, 3, 4, 5, 6),
+        gbi.DPSetKeyR(0x10, 0x20, 0x30),
+        gbi.DPSetKeyGB(0x10, 0x20, 0x30, 0x40, 0x50, 0x60),
+        gbi.SPTextureRectangle(4, 8, 128, 64, 0, 0, 0, 1 << 10, 1 << 10),
+        gbi.SPScisTextureRectangle(4, 8, 128, 64, 0, 0, 0, 1 << 10, 1 << 10),
+        gbi.DPFullSync(),
+        gbi.DPTileSync(),
+        gbi.DPPipeSync(),
+        gbi.DPLoadSync(),
+    ]
+    cases += [setter(args[0]) for setter, args in otherModeSetters(f3d).items()]
+    return [case for case in cases if case is not None]
+
+
+def gbiMacroClasses():
+    return {
+        cls
+        for cls in vars(gbi).values()
+        if inspect.isclass(cls) and issubclass(cls, gbi.GbiMacro) and cls is not gbi.GbiMacro
+    }
+
+
+class F3DBinaryDecodeTest(unittest.TestCase):
+    def test_every_macro_has_a_case(self):
+        for f3dType in F3D_TYPES:
+            f3d = gbi.get_cached_F3D_GBI(f3dType)
+            covered = {type(macro) for macro in macroCases(f3d, Fixtures(f3d))}
+            # These two only have F3DEX3 values for their modes
+            covered |= {gbi.SPAlphaCompareCull, gbi.SPNormalsMode}
+            missing = sorted(cls.__name__ for cls in gbiMacroClasses() - covered)
+            self.assertEqual(missing, [], f"{f3dType}: macros without a round trip case")
+
+    def test_round_trip(self):
+        for f3dType in F3D_TYPES:
+            f3d = gbi.get_cached_F3D_GBI(f3dType)
+            fixtures = Fixtures(f3d)
+            for macro in macroCases(f3d, fixtures):
+                expected = expectedRecords(f3d, macro, fixtures)
+                with self.subTest(f3dType=f3dType, macro=type(macro).__name__):
+                    if expected is PluginError:
+                        with self.assertRaises(PluginError):
+                            macro.to_binary(f3d, SEGMENTS)
+                    else:
+                        self.assertEqual(decode(f3d, macro), expected, repr(macro))
+
+    def test_pop_matrix(self):
+        for f3dType in F3D_TYPES:
+            f3d = gbi.get_cached_F3D_GBI(f3dType)
+            if f3d.F3DEX_GBI_2:
+                # gsSPPopMatrixN(G_MTX_MODELVIEW, n) = gsMoveWd(G_MW_MATRIX, ...) in F3DEX2 is G_POPMTX with n * 64 bytes
+                popOne = gbi.gsDma2p(f3d.G_POPMTX, 64, 64, 2, 0)
+                popThree = gbi.gsDma2p(f3d.G_POPMTX, 3 * 64, 64, 2, 0)
+                expected = [
+                    ("gsSPPopMatrix", [f3d.G_MTX_MODELVIEW]),
+                    ("gsSPPopMatrixN", [f3d.G_MTX_MODELVIEW, 3]),
+                ]
+            else:
+                popOne = gbi.gsImmp1(f3d.G_POPMTX, f3d.G_MTX_MODELVIEW)
+                popThree = gbi.gsImmp1(f3d.G_POPMTX, f3d.G_MTX_PROJECTION)
+                expected = [
+                    ("gsSPPopMatrix", [f3d.G_MTX_MODELVIEW]),
+                    ("gsSPPopMatrix", [f3d.G_MTX_PROJECTION]),
+                ]
+            records = [
+                (command.name, command.params) for _, command in f3d_parser.decodeF3DBinary(popOne + popThree, f3d)
+            ]
+            with self.subTest(f3dType=f3dType):
+                self.assertEqual(records, expected)
+
+    def test_decoding_stops_at_end_of_list(self):
+        f3d = gbi.get_cached_F3D_GBI("F3DEX2/LX2")
+        data = gbi.DPPipeSync().to_binary(f3d, SEGMENTS) + gbi.SPEndDisplayList().to_binary(f3d, SEGMENTS)
+        data += gbi.DPLoadSync().to_binary(f3d, SEGMENTS)
+        offsets = [offset for offset, _ in f3d_parser.decodeF3DBinary(data, f3d)]
+        self.assertEqual(offsets, [0, 8])
+
+
+if __name__ == "__main__":
+    unittest.main()